@@ -6,7 +6,7 @@ Copyright (C) 2025 Apple Inc. All Rights Reserved.
 
 import click
 
-from . import predict, render
+from . import export, predict, quantize, render
 
 
 @click.group()
@@ -17,3 +17,5 @@ def main_cli():
 
 main_cli.add_command(predict.predict_cli, "predict")
 main_cli.add_command(render.render_cli, "render")
+main_cli.add_command(export.export_cli, "export")
+main_cli.add_command(quantize.quantization_report_cli, "quantization-report")
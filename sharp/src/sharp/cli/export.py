@@ -0,0 +1,80 @@
+"""Contains `sharp export` CLI implementation.
+
+For licensing see accompanying LICENSE file.
+Copyright (C) 2025 Apple Inc. All Rights Reserved.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import click
+
+from sharp.utils import logging as logging_utils
+from sharp.utils.export import DEFAULT_OPSET_VERSION, export_predictor
+
+from .predict import load_predictor
+
+LOGGER = logging.getLogger(__name__)
+
+
+@click.command()
+@click.option(
+    "-o",
+    "--output-path",
+    type=click.Path(path_type=Path, dir_okay=False),
+    help="Path to save the exported model to, e.g. sharp.onnx or sharp.pt2.",
+    required=True,
+)
+@click.option(
+    "-c",
+    "--checkpoint-path",
+    type=click.Path(path_type=Path, dir_okay=False),
+    default=None,
+    help="Path to the .pt checkpoint. If not provided, downloads the default model automatically.",
+    required=False,
+)
+@click.option(
+    "--format",
+    "export_format",
+    type=click.Choice(["onnx", "exported-program"]),
+    default="onnx",
+    help="Export an ONNX graph or a torch.export program.",
+)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Batch size the exported graph is specialized to.",
+)
+@click.option(
+    "--opset",
+    "opset_version",
+    type=int,
+    default=DEFAULT_OPSET_VERSION,
+    help="ONNX opset version.",
+)
+@click.option("-v", "--verbose", is_flag=True, help="Activate debug logs.")
+def export_cli(
+    output_path: Path,
+    checkpoint_path: Path | None,
+    export_format: str,
+    batch_size: int,
+    opset_version: int,
+    verbose: bool,
+):
+    """Export the predictor for inference without the sharp model code."""
+    logging_utils.configure(logging.DEBUG if verbose else logging.INFO)
+
+    gaussian_predictor = load_predictor(checkpoint_path, "cpu")
+
+    output_path.parent.mkdir(exist_ok=True, parents=True)
+    LOGGER.info("Exporting %s to %s", export_format, output_path)
+    export_predictor(
+        gaussian_predictor,
+        output_path,
+        export_format=export_format,
+        batch_size=batch_size,
+        opset_version=opset_version,
+    )
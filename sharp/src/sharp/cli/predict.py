@@ -22,12 +22,17 @@ from sharp.models import (
 )
 from sharp.utils import io
 from sharp.utils import logging as logging_utils
+from sharp.utils.compilation import compile_predictor
 from sharp.utils.gaussians import (
     Gaussians3D,
     SceneMetaData,
+    save_ksplat,
     save_ply,
+    sort_gaussians_spatially,
     unproject_gaussians,
 )
+from sharp.utils.precision import PrecisionMode, autocast, check_precision, get_supported_precisions
+from sharp.utils.quantization import quantize_encoders
 
 from .render import render_gaussians
 
@@ -66,6 +71,47 @@ DEFAULT_MODEL_URL = "https://ml-site.cdn-apple.com/models/sharp/sharp_2572gikvuh
     default=False,
     help="Whether to render trajectory for checkpoint.",
 )
+@click.option(
+    "--ksplat/--no-ksplat",
+    "with_ksplat",
+    is_flag=True,
+    default=False,
+    help="Whether to also save a compressed .ksplat file next to each PLY.",
+)
+@click.option(
+    "--spatial-sort/--no-spatial-sort",
+    "with_spatial_sort",
+    is_flag=True,
+    default=False,
+    help="Whether to store the Gaussians in 3D Morton order instead of per-pixel order.",
+)
+@click.option(
+    "--precision",
+    type=click.Choice(get_supported_precisions()),
+    default="fp32",
+    help="Precision to run the predictor in. bf16 works on CPU and CUDA, fp16 on CUDA and MPS.",
+)
+@click.option(
+    "--compile/--no-compile",
+    "with_compile",
+    is_flag=True,
+    default=False,
+    help="Whether to compile the predictor with torch.compile. The first image compiles.",
+)
+@click.option(
+    "--compile-cache-dir",
+    type=click.Path(path_type=Path, file_okay=False),
+    default=None,
+    help="Directory to persist compiled kernels in, so later runs skip recompiling.",
+)
+@click.option(
+    "--quantize/--no-quantize",
+    "with_quantize",
+    is_flag=True,
+    default=False,
+    help="Whether to quantize the ViT encoders to int8 (CPU only). "
+    "See `sharp quantization-report` for the accuracy impact.",
+)
 @click.option(
     "--device",
     type=str,
@@ -78,6 +124,12 @@ def predict_cli(
     output_path: Path,
     checkpoint_path: Path,
     with_rendering: bool,
+    with_ksplat: bool,
+    with_spatial_sort: bool,
+    precision: PrecisionMode,
+    with_compile: bool,
+    compile_cache_dir: Path | None,
+    with_quantize: bool,
     device: str,
     verbose: bool,
 ):
@@ -108,23 +160,25 @@ def predict_cli(
         else:
             device = "cpu"
     LOGGER.info("Using device %s", device)
+    try:
+        check_precision(precision, device)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="--precision") from e
+    LOGGER.info("Using precision %s", precision)
+    if with_quantize and (device != "cpu" or precision != "fp32"):
+        raise click.BadParameter(
+            "Quantized encoders only run on CPU in fp32.", param_hint="--quantize"
+        )
 
     if with_rendering and device != "cuda":
         LOGGER.warning("Can only run rendering with gsplat on CUDA. Rendering is disabled.")
         with_rendering = False
 
-    # Load or download checkpoint
-    if checkpoint_path is None:
-        LOGGER.info("No checkpoint provided. Downloading default model from %s", DEFAULT_MODEL_URL)
-        state_dict = torch.hub.load_state_dict_from_url(DEFAULT_MODEL_URL, progress=True)
-    else:
-        LOGGER.info("Loading checkpoint from %s", checkpoint_path)
-        state_dict = torch.load(checkpoint_path, weights_only=True)
-
-    gaussian_predictor = create_predictor(PredictorParams())
-    gaussian_predictor.load_state_dict(state_dict)
-    gaussian_predictor.eval()
-    gaussian_predictor.to(device)
+    gaussian_predictor = load_predictor(checkpoint_path, device)
+    if with_quantize:
+        quantize_encoders(gaussian_predictor)
+    if with_compile:
+        compile_predictor(gaussian_predictor, cache_dir=compile_cache_dir)
 
     output_path.mkdir(exist_ok=True, parents=True)
 
@@ -142,10 +196,16 @@ def predict_cli(
             device=device,
             dtype=torch.float32,
         )
-        gaussians = predict_image(gaussian_predictor, image, f_px, torch.device(device))
+        gaussians = predict_image(
+            gaussian_predictor, image, f_px, torch.device(device), precision=precision
+        )
+        if with_spatial_sort:
+            gaussians = sort_gaussians_spatially(gaussians)
 
         LOGGER.info("Saving 3DGS to %s", output_path)
         save_ply(gaussians, f_px, (height, width), output_path / f"{image_path.stem}.ply")
+        if with_ksplat:
+            save_ksplat(gaussians, output_path / f"{image_path.stem}.ksplat")
 
         if with_rendering:
             output_video_path = (output_path / image_path.stem).with_suffix(".mp4")
@@ -155,14 +215,37 @@ def predict_cli(
             render_gaussians(gaussians, metadata, output_video_path)
 
 
+def load_predictor(checkpoint_path: Path | None, device: str) -> RGBGaussianPredictor:
+    """Load the predictor from a checkpoint, or download the default model."""
+    if checkpoint_path is None:
+        LOGGER.info("No checkpoint provided. Downloading default model from %s", DEFAULT_MODEL_URL)
+        state_dict = torch.hub.load_state_dict_from_url(
+            DEFAULT_MODEL_URL, progress=True, map_location=device
+        )
+    else:
+        LOGGER.info("Loading checkpoint from %s", checkpoint_path)
+        state_dict = torch.load(checkpoint_path, weights_only=True, map_location=device)
+
+    gaussian_predictor = create_predictor(PredictorParams())
+    gaussian_predictor.load_state_dict(state_dict)
+    gaussian_predictor.eval()
+    gaussian_predictor.to(device)
+    return gaussian_predictor
+
+
 @torch.no_grad()
 def predict_image(
     predictor: RGBGaussianPredictor,
     image: np.ndarray,
     f_px: float,
     device: torch.device,
+    precision: PrecisionMode = "fp32",
 ) -> Gaussians3D:
-    """Predict Gaussians from an image."""
+    """Predict Gaussians from an image.
+
+    With precision "bf16" or "fp16" the predictor runs under autocast; the returned
+    Gaussians are float32 in every mode.
+    """
     internal_shape = (1536, 1536)
 
     LOGGER.info("Running preprocessing.")
@@ -179,7 +262,8 @@ def predict_image(
 
     # Predict Gaussians in the NDC space.
     LOGGER.info("Running inference.")
-    gaussians_ndc = predictor(image_resized_pt, disparity_factor)
+    with autocast(device, precision):
+        gaussians_ndc = predictor(image_resized_pt, disparity_factor)
 
     LOGGER.info("Running postprocessing.")
     intrinsics = (
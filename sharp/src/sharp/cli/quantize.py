@@ -0,0 +1,148 @@
+"""Contains `sharp quantization-report` CLI implementation.
+
+For licensing see accompanying LICENSE file.
+Copyright (C) 2025 Apple Inc. All Rights Reserved.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from pathlib import Path
+
+import click
+import numpy as np
+import torch
+
+from sharp.utils import io
+from sharp.utils import logging as logging_utils
+from sharp.utils.quantization import compare_depth, compare_gaussians, quantize_encoders
+
+from .predict import load_predictor, predict_image
+
+LOGGER = logging.getLogger(__name__)
+
+
+@click.command()
+@click.option(
+    "-i",
+    "--input-path",
+    type=click.Path(path_type=Path, exists=True),
+    help="Path to an image or a folder of images to compare the predictions on.",
+    required=True,
+)
+@click.option(
+    "-o",
+    "--output-path",
+    type=click.Path(path_type=Path, dir_okay=False),
+    default=None,
+    help="Path to save the report as JSON.",
+)
+@click.option(
+    "-c",
+    "--checkpoint-path",
+    type=click.Path(path_type=Path, dir_okay=False),
+    default=None,
+    help="Path to the .pt checkpoint. If not provided, downloads the default model automatically.",
+    required=False,
+)
+@click.option("-v", "--verbose", is_flag=True, help="Activate debug logs.")
+def quantization_report_cli(
+    input_path: Path,
+    output_path: Path | None,
+    checkpoint_path: Path | None,
+    verbose: bool,
+):
+    """Compare int8 quantized encoders against float32 on CPU."""
+    logging_utils.configure(logging.DEBUG if verbose else logging.INFO)
+
+    extensions = io.get_supported_image_extensions()
+    if input_path.is_file():
+        image_paths = [input_path] if input_path.suffix in extensions else []
+    else:
+        image_paths = sorted(
+            path for ext in extensions for path in input_path.glob(f"**/*{ext}")
+        )
+    if len(image_paths) == 0:
+        LOGGER.info("No valid images found. Input was %s.", input_path)
+        return
+
+    device = torch.device("cpu")
+    gaussian_predictor = load_predictor(checkpoint_path, "cpu")
+    images = [io.load_rgb(image_path) for image_path in image_paths]
+
+    # The float32 predictions are kept in memory, then the same model is quantized in
+    # place, so only one copy of the weights is needed.
+    disparities: list[torch.Tensor] = []
+
+    def _store_disparity(module, args, output):
+        disparities.append(output.disparity.float())
+
+    def _run_all():
+        predictions, seconds = [], []
+        hook = gaussian_predictor.monodepth_model.register_forward_hook(_store_disparity)
+        try:
+            for image, _, f_px in images:
+                started = time.perf_counter()
+                predictions.append(predict_image(gaussian_predictor, image, f_px, device))
+                seconds.append(time.perf_counter() - started)
+        finally:
+            hook.remove()
+        return predictions, seconds
+
+    LOGGER.info("Running float32 predictor on %d images.", len(images))
+    reference_gaussians, reference_seconds = _run_all()
+    reference_disparities = disparities[:]
+    disparities.clear()
+
+    quantize_encoders(gaussian_predictor)
+    LOGGER.info("Running int8 predictor on %d images.", len(images))
+    quantized_gaussians, quantized_seconds = _run_all()
+
+    results = []
+    for i, image_path in enumerate(image_paths):
+        results.append(
+            {
+                "image": str(image_path),
+                "depth": compare_depth(reference_disparities[i], disparities[i]),
+                "gaussians": compare_gaussians(reference_gaussians[i], quantized_gaussians[i]),
+                "seconds_fp32": reference_seconds[i],
+                "seconds_int8": quantized_seconds[i],
+            }
+        )
+
+    def _mean(group: str) -> dict[str, float]:
+        return {
+            key: float(np.mean([result[group][key] for result in results]))
+            for key in results[0][group]
+        }
+
+    # The first image includes one-off costs, so timings average over the rest if any.
+    timed = slice(1, None) if len(results) > 1 else slice(None)
+    report = {
+        "num_images": len(results),
+        "depth": _mean("depth"),
+        "gaussians": _mean("gaussians"),
+        "seconds_fp32": float(np.mean(reference_seconds[timed])),
+        "seconds_int8": float(np.mean(quantized_seconds[timed])),
+        "images": results,
+    }
+    report["speedup"] = report["seconds_fp32"] / report["seconds_int8"]
+
+    LOGGER.info(
+        "Depth abs_rel %.4f, delta_1 %.4f; Gaussian position_rel %.4f, color_abs %.4f, "
+        "opacity_abs %.4f; %.1fs -> %.1fs per image (%.2fx).",
+        report["depth"]["abs_rel"],
+        report["depth"]["delta_1"],
+        report["gaussians"]["position_rel"],
+        report["gaussians"]["color_abs"],
+        report["gaussians"]["opacity_abs"],
+        report["seconds_fp32"],
+        report["seconds_int8"],
+        report["speedup"],
+    )
+    if output_path is not None:
+        output_path.parent.mkdir(exist_ok=True, parents=True)
+        output_path.write_text(json.dumps(report, indent=2))
+        LOGGER.info("Saved report to %s", output_path)
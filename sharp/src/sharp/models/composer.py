@@ -107,6 +107,21 @@ class GaussianComposer(nn.Module):
         Returns:
             The computed 3D Gaussians.
         """
+        # The activations below (inverse softplus, division by inverse depth, color
+        # space conversion) lose too much accuracy in bfloat16/float16, so the
+        # composer always runs in float32. Autocast leaves these elementwise ops in
+        # the dtype of their inputs.
+        delta = delta.float()
+        base_values = GaussianBaseValues(
+            mean_x_ndc=base_values.mean_x_ndc.float(),
+            mean_y_ndc=base_values.mean_y_ndc.float(),
+            mean_inverse_z_ndc=base_values.mean_inverse_z_ndc.float(),
+            scales=base_values.scales.float(),
+            quaternions=base_values.quaternions.float(),
+            colors=base_values.colors.float(),
+            opacities=base_values.opacities.float(),
+        )
+
         # Upsample the delta if delta and base_values have different strides.
         scale_factor = self.scale_factor
         # For triplane head, the delta has already been upsampled.
@@ -201,7 +216,7 @@ class GaussianComposer(nn.Module):
         a = base[:, 2:3]
         b = learned_delta[:, 2:3]
 
-        # Original formula:
+        # Original formula (kept in float32, see forward):
         inverse_zz = F.softplus(math_utils.inverse_softplus(a) + b)
         zz = 1.0 / (inverse_zz + 1e-3)
 
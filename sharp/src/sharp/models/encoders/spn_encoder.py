@@ -7,7 +7,7 @@ Copyright (C) 2025 Apple Inc. All Rights Reserved.
 from __future__ import annotations
 
 import math
-from typing import Iterable
+from typing import Any, Iterable
 
 import torch
 import torch.fx
@@ -317,53 +317,71 @@ class SlidingPyramidNetwork(BaseEncoder):
 # operations for symbolic tracing.
 @torch.fx.wrap
 def split(image: torch.Tensor, overlap_ratio: float = 0.25, patch_size: int = 384) -> torch.Tensor:
-    """Split the input into small patches with sliding window."""
+    """Split the input into small patches with sliding window.
+
+    Patches are ordered row by row and batch-minor, i.e. patch (j, i) of image b is
+    at index (j * steps + i) * batch_size + b. Windows are strided views of the input,
+    so the patches are copied only once.
+    """
     patch_stride = int(patch_size * (1 - overlap_ratio))
 
     image_size = image.shape[-1]
     steps = int(math.ceil((image_size - patch_size) / patch_stride)) + 1
+    if (steps - 1) * patch_stride + patch_size != image_size:
+        raise ValueError(
+            f"Patches of size {patch_size} with stride {patch_stride} do not tile {image_size}."
+        )
+
+    batch_size, num_channels = image.shape[:2]
+    # [B, C, steps, steps, patch_size, patch_size] -> [steps, steps, B, C, ...].
+    patches = image.unfold(-2, patch_size, patch_stride).unfold(-2, patch_size, patch_stride)
+    patches = patches.permute(2, 3, 0, 1, 4, 5)
+    return patches.reshape(steps * steps * batch_size, num_channels, patch_size, patch_size)
 
-    x_patch_list = []
-    for j in range(steps):
-        j0 = j * patch_stride
-        j1 = j0 + patch_size
 
-        for i in range(steps):
-            i0 = i * patch_stride
-            i1 = i0 + patch_size
-            x_patch_list.append(image[..., j0:j1, i0:i1])
+def _merge_segments(steps: int, patch_size: int, padding: int) -> list[tuple[slice, Any, slice]]:
+    """Describe the rows (or columns) of the merged image as up to three segments.
 
-    return torch.cat(x_patch_list, dim=0)
+    Each segment is (output range, patch index or slice over all patches, range within
+    the patch): the first `padding` rows come from the first patch, the last ones
+    from the last patch, and in between every patch contributes its cropped core.
+    """
+    core = patch_size - 2 * padding
+    length = steps * core + 2 * padding
+    if padding == 0:
+        return [(slice(0, length), slice(None), slice(0, patch_size))]
+    return [
+        (slice(0, padding), 0, slice(0, padding)),
+        (slice(padding, length - padding), slice(None), slice(padding, patch_size - padding)),
+        (slice(length - padding, length), steps - 1, slice(patch_size - padding, patch_size)),
+    ]
 
 
 # Decorator marking function as an atomic operator for symbolic tracing.
 @torch.fx.wrap
 def merge(image_patches: torch.Tensor, batch_size: int, padding: int = 3) -> torch.Tensor:
-    """Merge the patched input into a image with sliding window."""
-    steps = int(math.sqrt(image_patches.shape[0] // batch_size))
+    """Merge the patched input into a image with sliding window.
 
-    idx = 0
-
-    output_list = []
-    for j in range(steps):
-        output_row_list = []
-        for i in range(steps):
-            output = image_patches[batch_size * idx : batch_size * (idx + 1)]
-
-            if padding != 0:
-                if j != 0:
-                    output = output[..., padding:, :]
-                if i != 0:
-                    output = output[..., :, padding:]
-                if j != steps - 1:
-                    output = output[..., :-padding, :]
-                if i != steps - 1:
-                    output = output[..., :, :-padding]
-
-            output_row_list.append(output)
-            idx += 1
-
-        output_row = torch.cat(output_row_list, dim=-1)
-        output_list.append(output_row)
-    output = torch.cat(output_list, dim=-2)
+    Inverse of split for the patch order: overlapping borders of `padding` pixels are
+    cropped from every patch side that has a neighbor. The cropped patches are copied
+    straight into the output through strided views, without intermediate tensors.
+    """
+    steps = int(math.sqrt(image_patches.shape[0] // batch_size))
+    _, num_channels, height, width = image_patches.shape
+
+    # Trailing patches beyond the steps x steps grid are ignored, e.g. the lower pyramid
+    # levels passed along with the latent encodings.
+    # [steps * steps * B, C, H, W] -> [B, C, steps, H, steps, W] as a view.
+    patches = image_patches[: steps * steps * batch_size].view(steps, steps, batch_size, num_channels, height, width)
+    patches = patches.permute(2, 3, 0, 4, 1, 5)
+
+    row_segments = _merge_segments(steps, height, padding)
+    col_segments = _merge_segments(steps, width, padding)
+    output = image_patches.new_empty(
+        batch_size, num_channels, row_segments[-1][0].stop, col_segments[-1][0].stop
+    )
+    for output_rows, patch_rows, rows in row_segments:
+        for output_cols, patch_cols, cols in col_segments:
+            source = patches[:, :, patch_rows, rows, patch_cols, cols]
+            output[:, :, output_rows, output_cols].view(source.shape).copy_(source)
     return output
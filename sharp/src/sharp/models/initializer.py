@@ -291,6 +291,9 @@ def _rescale_depth(
     Returns:
         The rescaled depth and rescale factor.
     """
+    # The rescale factor becomes the global scale of all Gaussians, so it is computed
+    # in float32 even under autocast.
+    depth = depth.float()
     current_depth_min = depth.flatten(depth.ndim - 3).min(dim=-1).values
     depth_factor = depth_min / (current_depth_min + 1e-6)
     depth = (depth * depth_factor[..., None, None, None]).clamp(max=depth_max)
@@ -125,7 +125,9 @@ class RGBGaussianPredictor(nn.Module):
         """
         # Estimate depth and align to ground truth (if available).
         monodepth_output = self.monodepth_model(image)
-        monodepth_disparity = monodepth_output.disparity
+        # Under autocast the disparity comes out in reduced precision; converting it
+        # to depth is done in float32.
+        monodepth_disparity = monodepth_output.disparity.float()
 
         disparity_factor = disparity_factor[:, None, None, None]
         monodepth = disparity_factor / monodepth_disparity.clamp(min=1e-4, max=1e4)
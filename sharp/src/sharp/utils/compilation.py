@@ -0,0 +1,73 @@
+"""Contains helpers to run the predictor with torch.compile.
+
+For licensing see accompanying LICENSE file.
+Copyright (C) 2025 Apple Inc. All Rights Reserved.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+
+import torch
+from torch import nn
+
+LOGGER = logging.getLogger(__name__)
+
+
+def enable_compile_cache(cache_dir: Path) -> None:
+    """Store compiled kernels and graphs in cache_dir so restarts do not recompile.
+
+    Inductor keeps its FX graph and AOTAutograd caches below TORCHINDUCTOR_CACHE_DIR
+    (Triton kernels too, on CUDA). Dynamo still traces the model again in every new
+    process, which takes seconds instead of minutes of code generation.
+    """
+    import torch._inductor.config
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    os.environ["TORCHINDUCTOR_CACHE_DIR"] = str(cache_dir)
+    torch._inductor.config.fx_graph_cache = True
+
+
+def compile_predictor(
+    predictor: nn.Module,
+    cache_dir: Path | None = None,
+    mode: str | None = None,
+    backend: str = "inductor",
+) -> nn.Module:
+    """Compile the networks of an RGBGaussianPredictor in place.
+
+    Only the monodepth encoder, decoder and head, the feature model and the
+    prediction head are compiled. They hold nearly all of the compute, have fixed
+    shapes for the fixed internal resolution and are free of data-dependent control
+    flow. The initializer, depth alignment and composer stay eager, as do hooks
+    registered on the top-level modules. Compilation happens on the first forward
+    pass and again for every new input shape, e.g. every batch size.
+
+    Args:
+        predictor: The predictor to compile, after loading weights and moving it to
+            its device.
+        cache_dir: Optional directory for the persistent compile cache.
+        mode: The torch.compile mode, e.g. "max-autotune-no-cudagraphs".
+        backend: The torch.compile backend.
+
+    Returns:
+        The same predictor.
+    """
+    if cache_dir is not None:
+        enable_compile_cache(cache_dir)
+
+    monodepth_predictor = predictor.monodepth_model.monodepth_predictor
+    modules = (
+        monodepth_predictor.encoder,
+        monodepth_predictor.decoder,
+        monodepth_predictor.head,
+        predictor.feature_model,
+        predictor.prediction_head,
+    )
+    for module in modules:
+        # In-place compilation keeps module names, state dict keys and hooks intact.
+        module.compile(mode=mode, backend=backend, dynamic=False)
+    LOGGER.info("Compiled %d predictor modules with %s.", len(modules), backend)
+    return predictor
@@ -0,0 +1,104 @@
+"""Contains export of the predictor to torch.export programs and ONNX graphs.
+
+The exported graph maps a batch of images at the internal resolution and their
+disparity factors to the Gaussians in NDC space, like RGBGaussianPredictor.forward
+without ground truth depth. Unprojection to metric space stays outside of the graph,
+as it depends on the intrinsics of every image.
+
+For licensing see accompanying LICENSE file.
+Copyright (C) 2025 Apple Inc. All Rights Reserved.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Literal
+
+import torch
+from torch import nn
+
+from sharp.utils.gaussians import Gaussians3D
+
+LOGGER = logging.getLogger(__name__)
+
+ExportFormat = Literal["onnx", "exported-program"]
+
+INPUT_NAMES = ("image", "disparity_factor")
+OUTPUT_NAMES = Gaussians3D._fields
+
+DEFAULT_OPSET_VERSION = 18
+
+
+class ExportablePredictor(nn.Module):
+    """Wraps a predictor to return plain tensors instead of Gaussians3D."""
+
+    def __init__(self, predictor: nn.Module):
+        """Initialize ExportablePredictor.
+
+        Args:
+            predictor: The RGBGaussianPredictor to export.
+        """
+        super().__init__()
+        self.predictor = predictor
+
+    def forward(
+        self, image: torch.Tensor, disparity_factor: torch.Tensor
+    ) -> tuple[torch.Tensor, ...]:
+        """Predict Gaussians in NDC space, returned in the order of OUTPUT_NAMES."""
+        gaussians = self.predictor(image, disparity_factor)
+        return tuple(gaussians)
+
+
+def create_example_inputs(
+    predictor: nn.Module, batch_size: int = 1, device: torch.device | str = "cpu"
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """Create inputs with the shapes the exported graph is specialized to."""
+    resolution = predictor.internal_resolution()
+    image = torch.zeros(batch_size, 3, resolution, resolution, device=device)
+    disparity_factor = torch.ones(batch_size, device=device)
+    return image, disparity_factor
+
+
+def export_predictor(
+    predictor: nn.Module,
+    path: Path,
+    export_format: ExportFormat = "onnx",
+    batch_size: int = 1,
+    opset_version: int = DEFAULT_OPSET_VERSION,
+) -> None:
+    """Export a predictor for a fixed batch size.
+
+    ONNX graphs keep the weights in a `<path>.data` file next to the graph, since
+    the model is larger than the 2 GB limit of a single protobuf. Exported programs
+    are written with torch.export.save and can be loaded without timm.
+
+    Args:
+        predictor: The predictor, in eval mode and with weights loaded.
+        path: The output path, e.g. `sharp.onnx` or `sharp.pt2`.
+        export_format: Whether to write an ONNX graph or a torch.export program.
+        batch_size: The batch size the graph is specialized to.
+        opset_version: The ONNX opset version.
+    """
+    module = ExportablePredictor(predictor).eval()
+    device = next(predictor.parameters()).device
+    example_inputs = create_example_inputs(predictor, batch_size, device)
+
+    with torch.no_grad():
+        if export_format == "exported-program":
+            program = torch.export.export(module, example_inputs)
+            torch.export.save(program, path)
+        elif export_format == "onnx":
+            torch.onnx.export(
+                module,
+                example_inputs,
+                path,
+                input_names=list(INPUT_NAMES),
+                output_names=list(OUTPUT_NAMES),
+                opset_version=opset_version,
+                dynamo=True,
+                external_data=True,
+            )
+        else:
+            raise ValueError(f"Unsupported export format: {export_format}.")
+    LOGGER.info("Exported predictor with batch size %d to %s.", batch_size, path)
@@ -15,7 +15,9 @@ import torch
 from plyfile import PlyData, PlyElement
 
 from sharp.utils import color_space as cs_utils
+from sharp.utils import ksplat as ksplat_utils
 from sharp.utils import linalg
+from sharp.utils import ply as ply_utils
 
 LOGGER = logging.getLogger(__name__)
 
@@ -98,6 +100,283 @@ def unproject_gaussians(
     return gaussians
 
 
+class PruningStats(NamedTuple):
+    """Number of Gaussians removed by each step of prune_gaussians."""
+
+    num_input: int
+    num_merged: int
+    num_low_opacity: int
+    num_too_small: int
+
+    @property
+    def num_output(self) -> int:
+        """Number of Gaussians left after pruning."""
+        return self.num_input - self.num_merged - self.num_low_opacity - self.num_too_small
+
+
+def prune_gaussians(
+    gaussians: Gaussians3D,
+    f_px: float,
+    min_opacity: float = 0.0,
+    min_projected_size: float = 0.0,
+    merge_depth_tolerance: float = 0.0,
+    num_layers: int = 2,
+) -> tuple[Gaussians3D, PruningStats]:
+    """Remove Gaussians that barely contribute to the rendered scene.
+
+    The steps run in this order, each on the Gaussians left by the previous one:
+
+    1. Merge second-layer Gaussians into the first-layer Gaussian of the same pixel if
+       their depths differ by at most `merge_depth_tolerance` (relative). Opacities are
+       combined with alpha compositing, means and colors are opacity-weighted and the
+       first-layer shape is kept.
+    2. Drop Gaussians with opacity below `min_opacity`.
+    3. Drop Gaussians whose largest standard deviation projects to fewer than
+       `min_projected_size` pixels in the input view.
+
+    A threshold of 0 disables its step. The order of the remaining Gaussians is kept.
+
+    Args:
+        gaussians: Unprojected Gaussians of a single scene, as returned by
+            unproject_gaussians with identity extrinsics.
+        f_px: Focal length of the input image in pixels.
+        min_opacity: Minimum opacity in [0, 1].
+        min_projected_size: Minimum projected standard deviation in pixels.
+        merge_depth_tolerance: Maximum relative depth difference of merged Gaussians.
+        num_layers: Number of layers the predictor stacked along the Gaussian dimension.
+
+    Returns:
+        The pruned Gaussians and statistics on how many were removed by each step.
+    """
+    if gaussians.mean_vectors.shape[0] != 1:
+        raise ValueError("Can only prune Gaussians of a single scene.")
+
+    mean_vectors, singular_values, quaternions, colors, opacities = (
+        tensor[0] for tensor in gaussians
+    )
+    num_input = len(opacities)
+    keep = torch.ones(num_input, dtype=torch.bool, device=opacities.device)
+
+    num_merged = 0
+    if merge_depth_tolerance > 0 and num_layers >= 2 and num_input % num_layers == 0:
+        num_pixels = num_input // num_layers
+        first, second = slice(0, num_pixels), slice(num_pixels, 2 * num_pixels)
+        depth_first = mean_vectors[first, 2]
+        depth_second = mean_vectors[second, 2]
+        is_duplicate = (depth_second - depth_first).abs() <= (
+            merge_depth_tolerance * depth_first.abs()
+        )
+
+        alpha_first = opacities[first]
+        alpha_second = opacities[second]
+        alpha_sum = (alpha_first + alpha_second).clamp_min(1e-8)
+        weight_first = (alpha_first / alpha_sum)[:, None]
+        weight_second = (alpha_second / alpha_sum)[:, None]
+        merged_mask = is_duplicate[:, None]
+
+        mean_vectors = mean_vectors.clone()
+        colors = colors.clone()
+        opacities = opacities.clone()
+        mean_vectors[first] = torch.where(
+            merged_mask,
+            weight_first * mean_vectors[first] + weight_second * mean_vectors[second],
+            mean_vectors[first],
+        )
+        colors[first] = torch.where(
+            merged_mask,
+            weight_first * colors[first] + weight_second * colors[second],
+            colors[first],
+        )
+        opacities[first] = torch.where(
+            is_duplicate,
+            alpha_first + alpha_second - alpha_first * alpha_second,
+            alpha_first,
+        )
+        keep[second] = ~is_duplicate
+        num_merged = int(is_duplicate.sum())
+
+    num_low_opacity = 0
+    if min_opacity > 0:
+        is_transparent = keep & (opacities < min_opacity)
+        num_low_opacity = int(is_transparent.sum())
+        keep &= ~is_transparent
+
+    num_too_small = 0
+    if min_projected_size > 0:
+        projected_size = (
+            f_px * singular_values.amax(dim=-1) / mean_vectors[:, 2].abs().clamp_min(1e-8)
+        )
+        is_small = keep & (projected_size < min_projected_size)
+        num_too_small = int(is_small.sum())
+        keep &= ~is_small
+
+    pruned = Gaussians3D(
+        mean_vectors=mean_vectors[keep][None],
+        singular_values=singular_values[keep][None],
+        quaternions=quaternions[keep][None],
+        colors=colors[keep][None],
+        opacities=opacities[keep][None],
+    )
+    return pruned, PruningStats(num_input, num_merged, num_low_opacity, num_too_small)
+
+
+def _spread_bits(values: torch.Tensor) -> torch.Tensor:
+    """Insert two zero bits after each of the lower 21 bits of int64 `values`."""
+    values = values & 0x1FFFFF
+    values = (values | values << 32) & 0x1F00000000FFFF
+    values = (values | values << 16) & 0x1F0000FF0000FF
+    values = (values | values << 8) & 0x100F00F00F00F00F
+    values = (values | values << 4) & 0x10C30C30C30C30C3
+    values = (values | values << 2) & 0x1249249249249249
+    return values
+
+
+def morton_codes(points: torch.Tensor, num_bits: int = 21) -> torch.Tensor:
+    """Compute 3D Morton (Z-order) codes of (N, 3) points.
+
+    Points are quantized to 2**num_bits cells per axis of their bounding box, so
+    points that are close in space mostly get close codes.
+    """
+    if not 0 < num_bits <= 21:
+        raise ValueError("Morton codes support between 1 and 21 bits per axis.")
+    min_corner = points.amin(dim=0)
+    extent = (points.amax(dim=0) - min_corner).clamp_min(1e-12)
+    max_cell = 2**num_bits - 1
+    cells = ((points - min_corner) / extent * max_cell).round().clamp(0, max_cell).long()
+    return (
+        _spread_bits(cells[:, 0]) << 2 | _spread_bits(cells[:, 1]) << 1 | _spread_bits(cells[:, 2])
+    )
+
+
+def sort_gaussians_spatially(gaussians: Gaussians3D) -> Gaussians3D:
+    """Reorder the Gaussians of a single scene along a 3D Morton curve.
+
+    The predictor emits Gaussians in [layer, height, width] order, so the two layers of
+    a pixel end up half a file apart. After sorting, neighbors in space are neighbors
+    in memory and in exported files, which helps generic compressors, cache locality
+    and culling contiguous chunks. Rendering is unaffected.
+
+    Run this after prune_gaussians, whose layer merging relies on the original order.
+    """
+    if gaussians.mean_vectors.shape[0] != 1:
+        raise ValueError("Can only sort Gaussians of a single scene.")
+
+    order = torch.argsort(morton_codes(gaussians.mean_vectors[0]))
+    return Gaussians3D(*(tensor[:, order] for tensor in gaussians))
+
+
+def _count_cells(coords: torch.Tensor, cell_size: float) -> tuple[int, torch.Tensor]:
+    cells = torch.floor(coords / cell_size).long()
+    num_cells = cells.amax(dim=0) + 1
+    keys = (cells[:, 0] * num_cells[1] + cells[:, 1]) * num_cells[2] + cells[:, 2]
+    _, inverse = torch.unique(keys, return_inverse=True)
+    return int(inverse.max()) + 1, inverse
+
+
+def simplify_gaussians(
+    gaussians: Gaussians3D,
+    fraction: float,
+    tolerance: float = 0.02,
+    max_iterations: int = 24,
+) -> Gaussians3D:
+    """Reduce a scene to about `fraction` of its Gaussians by merging neighbors.
+
+    Gaussians are clustered on a grid in (x / z, y / z, log z) space, so cells cover a
+    similar area of the input view at every depth. The cell size is searched so that
+    the number of clusters is within `tolerance` of the target. Each cluster is merged
+    into one Gaussian by importance-weighted moment matching, where the importance of a
+    Gaussian is its opacity times its area. The merged opacity preserves the total
+    opacity-weighted area, and single-Gaussian clusters are kept unchanged.
+
+    Args:
+        gaussians: Unprojected Gaussians of a single scene.
+        fraction: Target fraction of Gaussians to keep in (0, 1].
+        tolerance: Accepted relative deviation from the target count.
+        max_iterations: Maximum number of steps of the cell size search.
+
+    Returns:
+        The simplified Gaussians.
+    """
+    if gaussians.mean_vectors.shape[0] != 1:
+        raise ValueError("Can only simplify Gaussians of a single scene.")
+
+    mean_vectors, singular_values, quaternions, colors, opacities = (
+        tensor[0] for tensor in gaussians
+    )
+    num_gaussians = len(opacities)
+    target = max(int(round(num_gaussians * fraction)), 1)
+    if target >= num_gaussians:
+        return gaussians
+
+    depth = mean_vectors[:, 2].abs().clamp_min(1e-6)
+    coords = torch.stack(
+        (mean_vectors[:, 0] / depth, mean_vectors[:, 1] / depth, depth.log()), dim=-1
+    )
+    coords = coords - coords.amin(dim=0)
+    extent = max(float(coords.amax()), 1e-6)
+
+    # Geometric bisection on the cell size; the cluster count decreases with the size.
+    low, high = extent * 1e-5, extent
+    best_count, best_inverse = _count_cells(coords, high)
+    for _ in range(max_iterations):
+        cell_size = (low * high) ** 0.5
+        count, inverse = _count_cells(coords, cell_size)
+        if abs(count - target) < abs(best_count - target):
+            best_count, best_inverse = count, inverse
+        if abs(count - target) <= tolerance * target:
+            break
+        if count > target:
+            low = cell_size
+        else:
+            high = cell_size
+    num_clusters, inverse = best_count, best_inverse
+
+    def _cluster_sum(values: torch.Tensor) -> torch.Tensor:
+        return torch.zeros(
+            (num_clusters, *values.shape[1:]), dtype=values.dtype, device=values.device
+        ).index_add_(0, inverse, values)
+
+    sorted_singular_values = singular_values.sort(dim=-1, descending=True).values
+    areas = sorted_singular_values[:, 0] * sorted_singular_values[:, 1]
+    weights = (opacities * areas).clamp_min(1e-12)
+    total_weights = _cluster_sum(weights)
+    normalized_weights = weights / total_weights[inverse]
+
+    merged_means = _cluster_sum(normalized_weights[:, None] * mean_vectors)
+    merged_colors = _cluster_sum(normalized_weights[:, None] * colors)
+
+    offsets = mean_vectors - merged_means[inverse]
+    second_moments = compose_covariance_matrices(quaternions, singular_values) + (
+        offsets[:, :, None] * offsets[:, None, :]
+    )
+    merged_covariances = _cluster_sum(normalized_weights[:, None, None] * second_moments)
+    merged_quaternions, merged_singular_values = decompose_covariance_matrices(
+        merged_covariances
+    )
+
+    merged_sorted = merged_singular_values.sort(dim=-1, descending=True).values
+    merged_areas = (merged_sorted[:, 0] * merged_sorted[:, 1]).clamp_min(1e-12)
+    merged_opacities = (_cluster_sum(opacities * areas) / merged_areas).clamp(max=1.0)
+
+    # Clusters of one Gaussian are copied as they are to avoid decomposition round-off.
+    cluster_sizes = _cluster_sum(torch.ones_like(opacities))
+    single = cluster_sizes[inverse] == 1
+    single_clusters = inverse[single]
+    merged_means[single_clusters] = mean_vectors[single]
+    merged_colors[single_clusters] = colors[single]
+    merged_quaternions[single_clusters] = quaternions[single]
+    merged_singular_values[single_clusters] = singular_values[single]
+    merged_opacities[single_clusters] = opacities[single]
+
+    return Gaussians3D(
+        mean_vectors=merged_means[None],
+        singular_values=merged_singular_values[None],
+        quaternions=merged_quaternions[None],
+        colors=merged_colors[None],
+        opacities=merged_opacities[None],
+    )
+
+
 def apply_transform(gaussians: Gaussians3D, transform: torch.Tensor) -> Gaussians3D:
     """Apply an affine transformation to 3D Gaussians.
 
@@ -113,6 +392,12 @@ def apply_transform(gaussians: Gaussians3D, transform: torch.Tensor) -> Gaussian
     transform_linear = transform[..., :3, :3]
     transform_offset = transform[..., :3, 3]
 
+    # Unprojection with identity extrinsics is a pure axis scaling plus offset.
+    if _is_diagonal(transform_linear):
+        return _apply_diagonal_transform(
+            gaussians, torch.diagonal(transform_linear), transform_offset
+        )
+
     mean_vectors = gaussians.mean_vectors @ transform_linear.T + transform_offset
     covariance_matrices = compose_covariance_matrices(
         gaussians.quaternions, gaussians.singular_values
@@ -131,6 +416,55 @@ def apply_transform(gaussians: Gaussians3D, transform: torch.Tensor) -> Gaussian
     )
 
 
+def _is_diagonal(matrix: torch.Tensor) -> bool:
+    """Whether a 3x3 matrix is diagonal with non-zero diagonal entries."""
+    if matrix.shape != (3, 3):
+        return False
+    off_diagonal = matrix - torch.diag_embed(torch.diagonal(matrix))
+    return bool((off_diagonal == 0).all() and (torch.diagonal(matrix) != 0).all())
+
+
+def _apply_diagonal_transform(
+    gaussians: Gaussians3D, scales: torch.Tensor, offset: torch.Tensor
+) -> Gaussians3D:
+    """Apply the affine transformation diag(scales) * x + offset to 3D Gaussians.
+
+    A scaling by the same magnitude along all axes (possibly with axis flips) keeps the
+    principal axes, so singular values and quaternions are updated in closed form.
+    Otherwise the principal axes change and the covariances are decomposed again, but
+    the transformed covariances are still obtained without matrix products.
+    """
+    mean_vectors = gaussians.mean_vectors * scales + offset
+
+    magnitudes = scales.abs()
+    if torch.allclose(magnitudes, magnitudes[:1].expand(3), rtol=1e-6, atol=0.0):
+        # S R D^2 R^T S = (S' R S') D^2 (S' R S')^T for the sign matrix S' = S / |s|,
+        # and S' R S' is the rotation R with the vector part of its quaternion flipped
+        # along the axes where det(S') * S' is negative.
+        signs = torch.sign(scales)
+        vector_signs = signs * signs.prod()
+        quaternion_signs = torch.cat([torch.ones_like(vector_signs[:1]), vector_signs])
+        quaternions = gaussians.quaternions / torch.linalg.norm(
+            gaussians.quaternions, dim=-1, keepdim=True
+        )
+        quaternions = quaternions * quaternion_signs
+        singular_values = gaussians.singular_values * magnitudes[0]
+    else:
+        covariance_matrices = compose_covariance_matrices(
+            gaussians.quaternions, gaussians.singular_values
+        )
+        covariance_matrices = covariance_matrices * (scales[:, None] * scales[None, :])
+        quaternions, singular_values = decompose_covariance_matrices(covariance_matrices)
+
+    return Gaussians3D(
+        mean_vectors=mean_vectors,
+        singular_values=singular_values,
+        quaternions=quaternions,
+        colors=gaussians.colors,
+        opacities=gaussians.opacities,
+    )
+
+
 def decompose_covariance_matrices(
     covariance_matrices: torch.Tensor,
 ) -> tuple[torch.Tensor, torch.Tensor]:
@@ -145,27 +479,26 @@ def decompose_covariance_matrices(
 
     Note: This operation is not differentiable.
     """
-    device = covariance_matrices.device
     dtype = covariance_matrices.dtype
 
-    # We convert to fp64 to avoid numerical errors.
-    covariance_matrices = covariance_matrices.detach().cpu().to(torch.float64)
-    rotations, singular_values_2, _ = torch.linalg.svd(covariance_matrices)
-
-    # NOTE: in SVD, it is possible that U and VT are both reflections.
-    # We need to correct them.
-    batch_idx, gaussian_idx = torch.where(torch.linalg.det(rotations) < 0)
-    num_reflections = len(gaussian_idx)
-    if num_reflections > 0:
-        LOGGER.warning(
-            "Received %d reflection matrices from SVD. Flipping them to rotations.",
-            num_reflections,
-        )
-        # Flip the last column of reflection and make it a rotation.
-        rotations[batch_idx, gaussian_idx, :, -1] *= -1
+    # We use fp64 to avoid numerical errors, except on MPS which does not support it.
+    compute_dtype = torch.float32 if covariance_matrices.device.type == "mps" else torch.float64
+    covariance_matrices = covariance_matrices.detach().to(compute_dtype)
+    singular_values_2, rotations = linalg.eigh_symmetric_3x3(covariance_matrices)
+
+    # NOTE: sorting the eigenvalues permutes the eigenvectors, which turns the
+    # basis into a reflection for odd permutations. We need to correct them.
+    determinants = (
+        torch.cross(rotations[..., :, 0], rotations[..., :, 1], dim=-1) * rotations[..., :, 2]
+    ).sum(dim=-1)
+    is_reflection = determinants < 0
+    rotations[..., :, -1] = torch.where(
+        is_reflection[..., None], -rotations[..., :, -1], rotations[..., :, -1]
+    )
     quaternions = linalg.quaternions_from_rotation_matrices(rotations)
-    quaternions = quaternions.to(dtype=dtype, device=device)
-    singular_values = singular_values_2.sqrt().to(dtype=dtype, device=device)
+    quaternions = quaternions.to(dtype=dtype)
+    # Covariances are positive semi-definite, negative values are round-off.
+    singular_values = singular_values_2.clamp(min=0.0).sqrt().to(dtype=dtype)
     return quaternions, singular_values
 
 
@@ -207,140 +540,157 @@ def convert_rgb_to_spherical_harmonics(rgb: torch.Tensor) -> torch.Tensor:
     return (rgb - 0.5) / coeff_degree0
 
 
-def load_ply(path: Path) -> tuple[Gaussians3D, SceneMetaData]:
-    """Loads a ply from a file."""
-    plydata = PlyData.read(path)
-
-    vertices = next(filter(lambda x: x.name == "vertex", plydata.elements))
-
-    properties = ["x", "y", "z"]
-    properties.extend([f"f_dc_{i}" for i in range(3)])
-    properties.extend([f"scale_{i}" for i in range(3)])
-    properties.extend([f"rot_{i}" for i in range(3)])
-
-    for prop in properties:
-        if prop not in vertices:
-            raise KeyError(f"Incompatible ply file: property {prop} not found in ply elements.")
-    mean_vectors = np.stack(
-        (
-            np.asarray(vertices["x"]),
-            np.asarray(vertices["y"]),
-            np.asarray(vertices["z"]),
-        ),
-        axis=1,
-    )
-
-    scale_logits = np.stack(
-        (
-            np.asarray(vertices["scale_0"]),
-            np.asarray(vertices["scale_1"]),
-            np.asarray(vertices["scale_2"]),
-        ),
-        axis=1,
-    )
+class GaussianPly:
+    """A Gaussian scene stored in a PLY file, decoded lazily.
 
-    quaternions = np.stack(
-        (
-            np.asarray(vertices["rot_0"]),
-            np.asarray(vertices["rot_1"]),
-            np.asarray(vertices["rot_2"]),
-            np.asarray(vertices["rot_3"]),
-        ),
-        axis=1,
-    )
-
-    spherical_harmonics_deg0 = np.stack(
-        (
-            np.asarray(vertices["f_dc_0"]),
-            np.asarray(vertices["f_dc_1"]),
-            np.asarray(vertices["f_dc_2"]),
-        ),
-        axis=1,
-    )
+    The vertex block is memory-mapped, so opening a scene only parses the header.
+    Raw columns are exposed as zero-copy numpy views and the activated torch tensors
+    are only materialized when requested.
+    """
 
-    colors = convert_spherical_harmonics_to_rgb(spherical_harmonics_deg0)
+    def __init__(self, path: Path):
+        """Open a ply file.
+
+        Args:
+            path: The ply file to open.
+        """
+        self.path = path
+        self.elements = ply_utils.read_ply_elements(path)
+        if "vertex" not in self.elements:
+            raise KeyError("Incompatible ply file: vertex element not found.")
+        self.vertices = self.elements["vertex"]
+
+        for prop in _PLY_VERTEX_PROPERTIES:
+            if prop not in self.vertices.dtype.names:
+                raise KeyError(f"Incompatible ply file: property {prop} not found in ply elements.")
+
+        self._supplement_data: dict[str, Any] = {}
+        for name, element in self.elements.items():
+            if name == "vertex":
+                continue
+            for key in ["extrinsic", "intrinsic", "color_space", "image_size"]:
+                if key not in self._supplement_data and key in element.dtype.names:
+                    self._supplement_data[key] = np.asarray(element[key])
+
+        # Parse color space.
+        color_space_index = self._supplement_data.get("color_space", 1)
+        self.color_space = cs_utils.decode_color_space(color_space_index)
+
+    def __len__(self) -> int:
+        """Number of Gaussians in the file."""
+        return len(self.vertices)
+
+    def column(self, *names: str) -> np.ndarray:
+        """Return vertex properties as an (N, len(names)) array, zero-copy when adjacent."""
+        return ply_utils.field_view(self.vertices, list(names))
+
+    @property
+    def mean_vectors(self) -> torch.Tensor:
+        """Mean vectors with shape 1xNx3."""
+        return _to_tensor(self.column("x", "y", "z")).view(1, -1, 3)
+
+    @property
+    def singular_values(self) -> torch.Tensor:
+        """Singular values with shape 1xNx3."""
+        scale_logits = _to_tensor(self.column("scale_0", "scale_1", "scale_2"))
+        return torch.exp(scale_logits).view(1, -1, 3)
+
+    @property
+    def quaternions(self) -> torch.Tensor:
+        """Quaternions with shape 1xNx4."""
+        return _to_tensor(self.column("rot_0", "rot_1", "rot_2", "rot_3")).view(1, -1, 4)
+
+    @property
+    def colors(self) -> torch.Tensor:
+        """Colors in linearRGB with shape 1xNx3."""
+        spherical_harmonics_deg0 = _to_tensor(self.column("f_dc_0", "f_dc_1", "f_dc_2"))
+        colors = convert_spherical_harmonics_to_rgb(spherical_harmonics_deg0)
+        if self.color_space == "sRGB":
+            # Convert to linearRGB for proper alpha blending.
+            colors = cs_utils.sRGB2linearRGB(colors)
+        return colors.view(1, -1, 3)
+
+    @property
+    def opacities(self) -> torch.Tensor:
+        """Opacities with shape 1xN."""
+        return torch.sigmoid(_to_tensor(self.column("opacity"))).view(1, -1)
+
+    def to_gaussians(self) -> Gaussians3D:
+        """Decode all Gaussians."""
+        return Gaussians3D(
+            mean_vectors=self.mean_vectors,
+            quaternions=self.quaternions,
+            singular_values=self.singular_values,
+            opacities=self.opacities,
+            colors=self.colors,
+        )
 
-    opacity_logits = np.asarray(vertices["opacity"])[..., None]
+    @property
+    def metadata(self) -> SceneMetaData:
+        """Scene meta data. Colors are always decoded to linearRGB."""
+        supplement_data = self._supplement_data
+
+        # Parse intrinsics and image_size.
+        if "intrinsic" in supplement_data:
+            intrinsics_data = supplement_data["intrinsic"]
+
+            # Legacy: image_size is contained in intrinsic element.
+            if "image_size" not in supplement_data:
+                if len(intrinsics_data) != 4:
+                    raise ValueError(
+                        "Expect legacy intrinsics with len=4 containing image size, "
+                        f"but received len={len(intrinsics_data)}"
+                    )
+                focal_length_px = (intrinsics_data[0], intrinsics_data[1])
+                width = int(intrinsics_data[2])
+                height = int(intrinsics_data[3])
+
+            else:
+                if len(intrinsics_data) != 9:
+                    raise ValueError(
+                        "Expect 9 elements in intrinsics, " f"but received {len(intrinsics_data)}."
+                    )
+                intrinsics_matrix = intrinsics_data.reshape((3, 3))
+                focal_length_px = (intrinsics_matrix[0, 0], intrinsics_matrix[1, 1])
+
+                image_size_data = supplement_data["image_size"]
+                width = image_size_data[0]
+                height = image_size_data[1]
+
+        # Default to VGA resolution: focal length = 512, image size = (640, 480).
+        else:
+            focal_length_px = (512, 512)
+            width = 640
+            height = 480
 
-    supplement_elements = [element for element in plydata.elements if element.name != "vertex"]
-    supplement_data: dict[str, Any] = {}
-    supplement_keys = ["extrinsic", "intrinsic", "color_space", "image_size"]
+        # Parse extrinsics.
+        extrinsics_data = supplement_data.get("extrinsic", np.eye(4).flatten())
 
-    for element in supplement_elements:
-        for key in supplement_keys:
-            if key not in supplement_data and key in element:
-                supplement_data[key] = np.asarray(element[key])
+        # Legacy: extrinsics store 12 elements.
+        if len(extrinsics_data) not in (12, 16):
+            raise ValueError(f"Unrecognized extrinsics matrix shape {len(extrinsics_data)}")
 
-    # Parse intrinsics and image_size.
-    if "intrinsic" in supplement_data:
-        intrinsics_data = supplement_data["intrinsic"]
+        return SceneMetaData(focal_length_px[0], (width, height), "linearRGB")
 
-        # Legacy: image_size is contained in intrinsic element.
-        if "image_size" not in supplement_data:
-            if len(intrinsics_data) != 4:
-                raise ValueError(
-                    "Expect legacy intrinsics with len=4 containing image size, "
-                    f"but received len={len(intrinsics_data)}"
-                )
-            focal_length_px = (intrinsics_data[0], intrinsics_data[1])
-            width = int(intrinsics_data[2])
-            height = int(intrinsics_data[3])
 
-        else:
-            if len(intrinsics_data) != 9:
-                raise ValueError(
-                    "Expect 9 elements in intrinsics, " f"but received {len(intrinsics_data)}."
-                )
-            intrinsics_matrix = intrinsics_data.reshape((3, 3))
-            focal_length_px = (intrinsics_matrix[0, 0], intrinsics_matrix[1, 1])
-
-            image_size_data = supplement_data["image_size"]
-            width = image_size_data[0]
-            height = image_size_data[1]
-
-    # Default to VGA resolution: focal length = 512, image size = (640, 480).
-    else:
-        focal_length_px = (512, 512)
-        width = 640
-        height = 480
-
-    # Parse extrinsics.
-    extrinsics_data = supplement_data.get("extrinsic", np.eye(4).flatten())
-    extrinsics_matrix = np.eye(4)
-
-    # Legacy: extrinsics store 12 elements.
-    if len(extrinsics_data) == 12:
-        extrinsics_matrix[:3] = extrinsics_data.reshape((3, 4))
-        extrinsics_matrix[:3, :3] = extrinsics_matrix[:3, :3].copy().T
-    elif len(extrinsics_data) == 16:
-        extrinsics_matrix[:] = extrinsics_data.reshape((4, 4))
-    else:
-        raise ValueError(f"Unrecognized extrinsics matrix shape {len(extrinsics_data)}")
+_PLY_VERTEX_PROPERTIES = (
+    ["x", "y", "z"]
+    + [f"f_dc_{i}" for i in range(3)]
+    + ["opacity"]
+    + [f"scale_{i}" for i in range(3)]
+    + [f"rot_{i}" for i in range(4)]
+)
 
-    # Parse color space.
-    color_space_index = supplement_data.get("color_space", 1)
-    color_space = cs_utils.decode_color_space(color_space_index)
-    colors = torch.from_numpy(colors).view(1, -1, 3).float()
 
-    if color_space == "sRGB":
-        # Convert to linearRGB for proper alpha blending.
-        colors = cs_utils.sRGB2linearRGB(colors.flatten(0, 1)).view(1, -1, 3)
-        color_space = "linearRGB"
+def _to_tensor(array: np.ndarray) -> torch.Tensor:
+    # Copies the (possibly strided, read-only) view into a contiguous float32 tensor.
+    return torch.from_numpy(np.array(array, dtype=np.float32, order="C"))
 
-    mean_vectors = torch.from_numpy(mean_vectors).view(1, -1, 3).float()
-    quaternions = torch.from_numpy(quaternions).view(1, -1, 4).float()
-    singular_values = torch.exp(torch.from_numpy(scale_logits).view(1, -1, 3)).float()
-    opacities = torch.sigmoid(torch.from_numpy(opacity_logits).view(1, -1)).float()
 
-    gaussians = Gaussians3D(
-        mean_vectors=mean_vectors,
-        quaternions=quaternions,
-        singular_values=singular_values,
-        opacities=opacities,
-        colors=colors,
-    )
-    metadata = SceneMetaData(focal_length_px[0], (width, height), color_space)
-    return gaussians, metadata
+def load_ply(path: Path) -> tuple[Gaussians3D, SceneMetaData]:
+    """Loads a ply from a file."""
+    scene = GaussianPly(path)
+    return scene.to_gaussians(), scene.metadata
 
 
 @torch.no_grad()
@@ -397,8 +747,13 @@ def save_ply(
     ]
 
     num_gaussians = len(xyz)
-    elements = np.empty(num_gaussians, dtype=dtype_full)
-    elements[:] = list(map(tuple, attributes.detach().cpu().numpy()))
+    # All attributes are float32, so each row of the contiguous (N, 14) array has exactly
+    # the memory layout of one structured vertex record and can be viewed without copies.
+    elements = (
+        np.ascontiguousarray(attributes.detach().float().cpu().numpy())
+        .view(dtype_full)
+        .reshape(num_gaussians)
+    )
     vertex_elements = PlyElement.describe(elements, "vertex")
 
     # Load image-wise metadata.
@@ -479,5 +834,55 @@ def save_ply(
         ]
     )
 
-    plydata.write(path)
+    ply_utils.write_binary_ply(path, {element.name: element.data for element in plydata.elements})
     return plydata
+
+
+def importance_order(gaussians: Gaussians3D) -> torch.Tensor:
+    """Order the Gaussians of a single scene from most to least visually important.
+
+    Importance is opacity times the area the Gaussian projects to from the input view,
+    so opaque, large and near Gaussians come first.
+    """
+    mean_vectors, singular_values, _, _, opacities = (tensor[0] for tensor in gaussians)
+    sorted_singular_values = singular_values.sort(dim=-1, descending=True).values
+    depth = mean_vectors[:, 2].abs().clamp_min(1e-6)
+    projected_areas = sorted_singular_values[:, 0] * sorted_singular_values[:, 1] / depth.square()
+    return torch.argsort(opacities * projected_areas, descending=True)
+
+
+def save_ksplat(gaussians: Gaussians3D, path: Path, num_sections: int = 4) -> None:
+    """Save a predicted Gaussian3D to a compressed .ksplat file.
+
+    Colors are converted to sRGB like in save_ply, so both exports render the same in
+    public renderers. Gaussians are stored in importance order, split into
+    `num_sections` sections that double in size, so a progressively loading viewer
+    shows a coarse scene after the first few percent of the file.
+    """
+    if gaussians.mean_vectors.shape[0] != 1:
+        raise ValueError("Can only save Gaussians of a single scene.")
+
+    order = importance_order(gaussians)
+    gaussians = Gaussians3D(*(tensor[:, order] for tensor in gaussians))
+
+    colors = cs_utils.linearRGB2sRGB(gaussians.colors.flatten(0, 1))
+    rgba = torch.cat((colors, gaussians.opacities.flatten(0, 1).unsqueeze(-1)), dim=-1)
+    rgba = (rgba * 255.0).round().clamp(0, 255).to(torch.uint8)
+
+    num_gaussians = rgba.shape[0]
+    section_ends = [
+        num_gaussians * (2 ** (i + 1) - 1) // (2**num_sections - 1) for i in range(num_sections)
+    ]
+    section_sizes = np.diff([0] + section_ends).tolist()
+
+    def _to_numpy(tensor: torch.Tensor) -> np.ndarray:
+        return tensor.detach().flatten(0, 1).float().cpu().numpy()
+
+    ksplat_utils.write_ksplat(
+        path,
+        centers=_to_numpy(gaussians.mean_vectors),
+        scales=_to_numpy(gaussians.singular_values),
+        quaternions=_to_numpy(gaussians.quaternions),
+        rgba=rgba.cpu().numpy(),
+        section_sizes=section_sizes,
+    )
@@ -0,0 +1,226 @@
+"""Contains a writer for the compressed .ksplat format of GaussianSplats3D.
+
+The format stores every Gaussian in 24 bytes instead of the 56 bytes of a float32 PLY:
+
+- positions as uint16 offsets from the center of a spatial bucket,
+- scales and rotations as float16,
+- colors and opacity as uint8 RGBA.
+
+For licensing see accompanying LICENSE file.
+Copyright (C) 2025 Apple Inc. All Rights Reserved.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+# Layout constants of SplatBuffer in @mkkellogg/gaussian-splats-3d.
+VERSION_MAJOR = 0
+VERSION_MINOR = 1
+HEADER_SIZE_BYTES = 4096
+SECTION_HEADER_SIZE_BYTES = 1024
+BUCKET_STORAGE_SIZE_BYTES = 12
+# Compression level 1 without spherical harmonics.
+COMPRESSION_LEVEL = 1
+COMPRESSION_SCALE_RANGE = 32767
+BYTES_PER_SPLAT = 24
+# Spherical harmonics range stored in the header, unused for degree 0.
+SH_8BIT_COMPRESSION_HALF_RANGE = 1.5
+
+DEFAULT_BLOCK_SIZE = 5.0
+DEFAULT_BUCKET_SIZE = 256
+
+_SPLAT_DTYPE = np.dtype(
+    [
+        ("center", "<u2", 3),
+        ("scale", "<f2", 3),
+        # w, x, y, z like rot_0..rot_3 in PLY files.
+        ("rotation", "<f2", 4),
+        ("rgba", "u1", 4),
+    ]
+)
+assert _SPLAT_DTYPE.itemsize == BYTES_PER_SPLAT
+
+
+def _to_float16(values: np.ndarray) -> np.ndarray:
+    max_half = float(np.finfo(np.float16).max)
+    return np.clip(values, -max_half, max_half).astype(np.float16)
+
+
+def _compute_buckets(
+    centers: np.ndarray, block_size: float, bucket_size: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, int, np.ndarray]:
+    """Group splats into buckets of at most `bucket_size` splats within one block.
+
+    Returns the splat order, the bucket center of every ordered splat, all bucket
+    centers, the number of full buckets and the lengths of the partial buckets. Full
+    buckets come first, followed by the partially filled ones, as the reader expects.
+    """
+    min_corner = centers.min(axis=0)
+    blocks = np.floor((centers - min_corner) / block_size).astype(np.int64)
+    num_blocks = blocks.max(axis=0) + 1
+    block_ids = (blocks[:, 0] * num_blocks[1] + blocks[:, 1]) * num_blocks[2] + blocks[:, 2]
+
+    order = np.argsort(block_ids, kind="stable")
+    unique_ids, starts, counts = np.unique(
+        block_ids[order], return_index=True, return_counts=True
+    )
+    block_centers = (
+        blocks[order[starts]] * block_size + min_corner + block_size / 2
+    ).astype(np.float32)
+
+    # Rank of every sorted splat within its block; the first full_count splats of a
+    # block fill its full buckets, the remainder forms one partial bucket.
+    block_index = np.repeat(np.arange(len(unique_ids)), counts)
+    rank = np.arange(len(order)) - starts[block_index]
+    full_counts = counts // bucket_size * bucket_size
+    is_full = rank < full_counts[block_index]
+
+    partial_counts = counts - full_counts
+    has_partial = partial_counts > 0
+    bucket_centers = np.concatenate(
+        [
+            np.repeat(block_centers, full_counts // bucket_size, axis=0),
+            block_centers[has_partial],
+        ]
+    )
+    ordered = np.concatenate([order[is_full], order[~is_full]])
+    splat_bucket_centers = np.concatenate(
+        [block_centers[block_index[is_full]], block_centers[block_index[~is_full]]]
+    )
+    partial_lengths = partial_counts[has_partial].astype(np.uint32)
+    num_full_buckets = int(full_counts.sum()) // bucket_size
+    return ordered, splat_bucket_centers, bucket_centers, num_full_buckets, partial_lengths
+
+
+def _build_section(
+    centers: np.ndarray,
+    scales: np.ndarray,
+    quaternions: np.ndarray,
+    rgba: np.ndarray,
+    block_size: float,
+    bucket_size: int,
+) -> tuple[np.ndarray, bytes]:
+    """Encode one section, returning its 1024-byte header and its data."""
+    num_splats = len(centers)
+    splats = np.zeros(num_splats, dtype=_SPLAT_DTYPE)
+    if num_splats > 0:
+        order, splat_bucket_centers, bucket_centers, num_full_buckets, partial_lengths = (
+            _compute_buckets(centers, block_size, bucket_size)
+        )
+        scale_factor = COMPRESSION_SCALE_RANGE / (block_size / 2)
+        offsets = np.rint((centers[order] - splat_bucket_centers) * scale_factor)
+        splats["center"] = np.clip(
+            offsets + COMPRESSION_SCALE_RANGE, 0, 2 * COMPRESSION_SCALE_RANGE + 1
+        )
+        splats["scale"] = _to_float16(scales[order])
+        rotations = quaternions[order]
+        rotations = rotations / np.linalg.norm(rotations, axis=-1, keepdims=True)
+        splats["rotation"] = _to_float16(rotations)
+        splats["rgba"] = rgba[order]
+    else:
+        bucket_centers = np.zeros((0, 3), dtype=np.float32)
+        num_full_buckets = 0
+        partial_lengths = np.zeros(0, dtype=np.uint32)
+
+    num_buckets = len(bucket_centers)
+    data = b"".join(
+        (
+            partial_lengths.astype("<u4").tobytes(),
+            np.ascontiguousarray(bucket_centers, dtype="<f4").tobytes(),
+            splats.tobytes(),
+        )
+    )
+
+    section_header = np.zeros(SECTION_HEADER_SIZE_BYTES, dtype=np.uint8)
+    section_u32 = section_header.view("<u4")
+    section_u32[0] = num_splats
+    section_u32[1] = num_splats
+    section_u32[2] = bucket_size
+    section_u32[3] = num_buckets
+    section_header.view("<f4")[4] = block_size
+    section_header.view("<u2")[10] = BUCKET_STORAGE_SIZE_BYTES
+    section_u32[6] = COMPRESSION_SCALE_RANGE
+    section_u32[7] = len(data)
+    section_u32[8] = num_full_buckets
+    section_u32[9] = len(partial_lengths)
+    section_header.view("<u2")[20] = 0  # spherical harmonics degree
+    return section_header, data
+
+
+def write_ksplat(
+    path: Path,
+    centers: np.ndarray,
+    scales: np.ndarray,
+    quaternions: np.ndarray,
+    rgba: np.ndarray,
+    section_sizes: Sequence[int] | None = None,
+    block_size: float = DEFAULT_BLOCK_SIZE,
+    bucket_size: int = DEFAULT_BUCKET_SIZE,
+) -> None:
+    """Write Gaussians as a .ksplat file.
+
+    Sections are stored in order and the viewer loads them progressively, so passing
+    the Gaussians sorted by importance with `section_sizes` lets a streaming client
+    draw the most important ones first. Within a section, splats are grouped by bucket.
+
+    Args:
+        path: The output path.
+        centers: (N, 3) Gaussian positions.
+        scales: (N, 3) Gaussian scales (not log-scales).
+        quaternions: (N, 4) rotations in (w, x, y, z) order.
+        rgba: (N, 4) uint8 colors and opacity.
+        section_sizes: Number of consecutive Gaussians in each section. Defaults to a
+            single section.
+        block_size: Edge length of the cubic blocks positions are quantized in. Offsets
+            from a block center are stored with a precision of block_size / 65534.
+        bucket_size: Maximum number of splats sharing one bucket center.
+    """
+    num_splats = len(centers)
+    centers = np.asarray(centers, dtype=np.float64)
+    if section_sizes is None:
+        section_sizes = [num_splats]
+    if sum(section_sizes) != num_splats:
+        raise ValueError("Section sizes must add up to the number of Gaussians.")
+
+    section_headers = []
+    section_data = []
+    start = 0
+    for size in section_sizes:
+        section = slice(start, start + size)
+        section_header, data = _build_section(
+            centers[section],
+            scales[section],
+            quaternions[section],
+            rgba[section],
+            block_size,
+            bucket_size,
+        )
+        section_headers.append(section_header)
+        section_data.append(data)
+        start += size
+
+    header = np.zeros(HEADER_SIZE_BYTES, dtype=np.uint8)
+    header[0] = VERSION_MAJOR
+    header[1] = VERSION_MINOR
+    header_u32 = header.view("<u4")
+    header_u32[1] = len(section_sizes)  # max section count
+    header_u32[2] = len(section_sizes)  # section count
+    header_u32[3] = num_splats  # max splat count
+    header_u32[4] = num_splats
+    header.view("<u2")[10] = COMPRESSION_LEVEL
+    header_f32 = header.view("<f4")
+    if num_splats > 0:
+        header_f32[6:9] = (centers.min(axis=0) + centers.max(axis=0)) / 2
+    header_f32[9] = -SH_8BIT_COMPRESSION_HALF_RANGE
+    header_f32[10] = SH_8BIT_COMPRESSION_HALF_RANGE
+
+    with open(path, "wb") as file:
+        file.write(header.data)
+        for section_header in section_headers:
+            file.write(section_header.data)
+        for data in section_data:
+            file.write(data)
@@ -8,7 +8,6 @@ from __future__ import annotations
 
 import torch
 import torch.nn.functional as F
-from scipy.spatial.transform import Rotation
 
 
 def rotation_matrices_from_quaternions(quaternions: torch.Tensor) -> torch.Tensor:
@@ -45,18 +44,115 @@ def quaternions_from_rotation_matrices(matrices: torch.Tensor) -> torch.Tensor:
         matrices: The matrices to convert to quaternions.
 
     Returns:
-        The quaternions corresponding to the rotation matrices.
+        The quaternions corresponding to the rotation matrices, with non-negative
+        real part.
 
-    Note: this operation is not differentiable and will be performed on the CPU.
+    Note: this operation is not differentiable.
     """
     if not matrices.shape[-2:] == (3, 3):
         raise ValueError(f"matrices have invalid shape {matrices.shape}")
-    matrices_np = matrices.detach().cpu().numpy()
-    quaternions_np = Rotation.from_matrix(matrices_np.reshape(-1, 3, 3)).as_quat()
+    m00, m01, m02 = matrices[..., 0, 0], matrices[..., 0, 1], matrices[..., 0, 2]
+    m10, m11, m12 = matrices[..., 1, 0], matrices[..., 1, 1], matrices[..., 1, 2]
+    m20, m21, m22 = matrices[..., 2, 0], matrices[..., 2, 1], matrices[..., 2, 2]
+
+    # 4 * w^2, 4 * x^2, 4 * y^2, 4 * z^2, computed from the diagonal.
+    squares_4 = torch.stack(
+        [
+            1.0 + m00 + m11 + m22,
+            1.0 + m00 - m11 - m22,
+            1.0 - m00 + m11 - m22,
+            1.0 - m00 - m11 + m22,
+        ],
+        dim=-1,
+    ).clamp(min=0.0)
+    # Row i holds (4 * q_i) * q, i.e. the quaternion scaled by its i-th component.
+    candidates = torch.stack(
+        [
+            torch.stack([squares_4[..., 0], m21 - m12, m02 - m20, m10 - m01], dim=-1),
+            torch.stack([m21 - m12, squares_4[..., 1], m10 + m01, m02 + m20], dim=-1),
+            torch.stack([m02 - m20, m10 + m01, squares_4[..., 2], m12 + m21], dim=-1),
+            torch.stack([m10 - m01, m20 + m02, m21 + m12, squares_4[..., 3]], dim=-1),
+        ],
+        dim=-2,
+    )
+    # Dividing by the largest component is numerically the most stable choice.
+    largest = squares_4.argmax(dim=-1, keepdim=True)
+    quaternions = torch.gather(
+        candidates, -2, largest[..., None].expand(*largest.shape[:-1], 1, 4)
+    ).squeeze(-2)
+    quaternions = F.normalize(quaternions, dim=-1)
     # We use a convention where the w component is at the start of the quaternion.
-    quaternions_np = quaternions_np[:, [3, 0, 1, 2]]
-    quaternions_np = quaternions_np.reshape(matrices_np.shape[:-2] + (4,))
-    return torch.as_tensor(quaternions_np, device=matrices.device, dtype=matrices.dtype)
+    return torch.where(quaternions[..., :1] < 0, -quaternions, quaternions)
+
+
+def eigh_symmetric_3x3(
+    matrices: torch.Tensor, num_sweeps: int = 5
+) -> tuple[torch.Tensor, torch.Tensor]:
+    """Eigendecomposition of a batch of symmetric 3x3 matrices.
+
+    Uses a fixed number of cyclic Jacobi sweeps, which is fully vectorized and runs on
+    the device of the input, unlike LAPACK based solvers that loop over the batch.
+
+    Args:
+        matrices: The symmetric matrices to decompose.
+        num_sweeps: Number of Jacobi sweeps. Convergence is quadratic, so a handful of
+            sweeps reach machine precision.
+
+    Returns:
+        The eigenvalues in descending order and the matrices whose columns are the
+        corresponding eigenvectors.
+
+    Note: this operation is not differentiable.
+    """
+    if not matrices.shape[-2:] == (3, 3):
+        raise ValueError(f"matrices have invalid shape {matrices.shape}")
+    matrices = matrices.detach()
+    # Work on the individual entries: the upper triangle a[(i, j)] of the matrices and
+    # the eigenvector basis v[(i, j)], so every update is a cheap elementwise op.
+    a = {(i, j): matrices[..., i, j] for i in range(3) for j in range(i, 3)}
+    one = torch.ones_like(matrices[..., 0, 0])
+    zero = torch.zeros_like(one)
+    v = {(i, j): one if i == j else zero for i in range(3) for j in range(3)}
+
+    def entry(i: int, j: int) -> torch.Tensor:
+        return a[(min(i, j), max(i, j))]
+
+    for _ in range(num_sweeps):
+        for p, q, r in ((0, 1, 2), (0, 2, 1), (1, 2, 0)):
+            a_pp, a_qq, a_pq = a[(p, p)], a[(q, q)], a[(p, q)]
+
+            # Tangent of the Jacobi rotation angle that zeroes a_pq, written in a form
+            # that is finite even when a_pq == 0 (no rotation needed).
+            delta = a_qq - a_pp
+            sign = torch.where(delta < 0, -one, one)
+            denominator = delta.abs() + torch.sqrt(delta.square() + 4.0 * a_pq.square())
+            tangent = torch.where(
+                denominator > 0,
+                sign * 2.0 * a_pq / denominator.clamp(min=torch.finfo(delta.dtype).tiny),
+                zero,
+            )
+            cosine = torch.rsqrt(tangent.square() + 1.0)
+            sine = tangent * cosine
+
+            a_rp, a_rq = entry(r, p), entry(r, q)
+            a[(p, p)] = a_pp - tangent * a_pq
+            a[(q, q)] = a_qq + tangent * a_pq
+            a[(p, q)] = zero
+            a[(min(r, p), max(r, p))] = cosine * a_rp - sine * a_rq
+            a[(min(r, q), max(r, q))] = sine * a_rp + cosine * a_rq
+
+            for k in range(3):
+                v_kp, v_kq = v[(k, p)], v[(k, q)]
+                v[(k, p)] = cosine * v_kp - sine * v_kq
+                v[(k, q)] = sine * v_kp + cosine * v_kq
+
+    eigenvalues = torch.stack([a[(i, i)] for i in range(3)], dim=-1)
+    eigenvectors = torch.stack(
+        [torch.stack([v[(i, j)] for j in range(3)], dim=-1) for i in range(3)], dim=-2
+    )
+    eigenvalues, order = eigenvalues.sort(dim=-1, descending=True)
+    eigenvectors = torch.gather(eigenvectors, -1, order[..., None, :].expand_as(eigenvectors))
+    return eigenvalues, eigenvectors
 
 
 def get_cross_product_matrix(vectors: torch.Tensor) -> torch.Tensor:
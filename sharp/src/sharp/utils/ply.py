@@ -0,0 +1,192 @@
+"""Contains low-level binary PLY reading and writing.
+
+For licensing see accompanying LICENSE file.
+Copyright (C) 2025 Apple Inc. All Rights Reserved.
+"""
+
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+from plyfile import PlyData
+
+LOGGER = logging.getLogger(__name__)
+
+# Maps PLY property type names to numpy dtypes (without byte order).
+_PLY_TO_NUMPY_TYPES = {
+    "char": "i1",
+    "uchar": "u1",
+    "short": "i2",
+    "ushort": "u2",
+    "int": "i4",
+    "uint": "u4",
+    "float": "f4",
+    "double": "f8",
+    "int8": "i1",
+    "uint8": "u1",
+    "int16": "i2",
+    "uint16": "u2",
+    "int32": "i4",
+    "uint32": "u4",
+    "float32": "f4",
+    "float64": "f8",
+}
+
+# Maps numpy dtypes (without byte order) to PLY property type names.
+_NUMPY_TO_PLY_TYPES = {
+    "i1": "char",
+    "u1": "uchar",
+    "i2": "short",
+    "u2": "ushort",
+    "i4": "int",
+    "u4": "uint",
+    "f4": "float",
+    "f8": "double",
+}
+
+_BYTE_ORDERS = {"binary_little_endian": "<", "binary_big_endian": ">"}
+
+
+class PlyElementHeader(NamedTuple):
+    """Describes one element declared in a PLY header."""
+
+    name: str
+    count: int
+    # None if the element has list properties, which have no fixed record size.
+    dtype: np.dtype | None
+
+
+class PlyHeader(NamedTuple):
+    """Parsed PLY header."""
+
+    format: str
+    elements: list[PlyElementHeader]
+    # Number of bytes up to and including the end_header line.
+    size: int
+
+
+def read_ply_header(path: Path) -> PlyHeader:
+    """Parse the header of a PLY file without touching the element data."""
+    with open(path, "rb") as file:
+        if file.readline().strip() != b"ply":
+            raise ValueError(f"{path} is not a PLY file.")
+
+        ply_format = None
+        byte_order = "<"
+        elements: list[tuple[str, int, list[tuple[str, str]], bool]] = []
+        while True:
+            line = file.readline()
+            if not line:
+                raise ValueError(f"{path} has no end_header line.")
+            tokens = line.decode("ascii").split()
+            if not tokens or tokens[0] in ("comment", "obj_info"):
+                continue
+            if tokens[0] == "end_header":
+                break
+            if tokens[0] == "format":
+                ply_format = tokens[1]
+                byte_order = _BYTE_ORDERS.get(ply_format, "<")
+            elif tokens[0] == "element":
+                elements.append((tokens[1], int(tokens[2]), [], False))
+            elif tokens[0] == "property":
+                name, count, properties, has_list = elements[-1]
+                if tokens[1] == "list":
+                    elements[-1] = (name, count, properties, True)
+                else:
+                    properties.append(
+                        (tokens[2], byte_order + _PLY_TO_NUMPY_TYPES[tokens[1]])
+                    )
+            else:
+                raise ValueError(f"Unexpected line in PLY header: {line!r}")
+        header_size = file.tell()
+
+    if ply_format is None:
+        raise ValueError(f"{path} has no format line.")
+
+    return PlyHeader(
+        format=ply_format,
+        elements=[
+            PlyElementHeader(name, count, None if has_list else np.dtype(properties))
+            for name, count, properties, has_list in elements
+        ],
+        size=header_size,
+    )
+
+
+def read_ply_elements(path: Path) -> dict[str, np.ndarray]:
+    """Read all elements of a PLY file as structured arrays.
+
+    Binary files without list properties are memory-mapped, so the returned arrays
+    (and any column taken from them) are zero-copy views of the file that are only
+    paged in when accessed. Other files fall back to reading through plyfile.
+    """
+    header = read_ply_header(path)
+    if header.format not in _BYTE_ORDERS or any(
+        element.dtype is None for element in header.elements
+    ):
+        LOGGER.debug("Cannot memory-map %s, reading it with plyfile.", path)
+        plydata = PlyData.read(path)
+        return {element.name: element.data for element in plydata.elements}
+
+    elements: dict[str, np.ndarray] = {}
+    offset = header.size
+    for element in header.elements:
+        assert element.dtype is not None
+        if element.count == 0:
+            elements[element.name] = np.empty(0, dtype=element.dtype)
+        else:
+            elements[element.name] = np.memmap(
+                path, dtype=element.dtype, mode="r", offset=offset, shape=(element.count,)
+            )
+        offset += element.count * element.dtype.itemsize
+    return elements
+
+
+def write_binary_ply(path: Path, elements: dict[str, np.ndarray]) -> None:
+    """Write structured arrays as binary little-endian PLY elements.
+
+    The output is byte-identical to PlyData.write, but the arrays are streamed to the
+    file as raw buffers instead of being serialized through plyfile.
+    """
+    lines = ["ply", "format binary_little_endian 1.0"]
+    for name, data in elements.items():
+        lines.append(f"element {name} {len(data)}")
+        for field in data.dtype.names:
+            type_name = _NUMPY_TO_PLY_TYPES[data.dtype[field].str[1:]]
+            lines.append(f"property {type_name} {field}")
+    lines.append("end_header")
+
+    with open(path, "wb") as file:
+        file.write(("\n".join(lines) + "\n").encode("ascii"))
+        for data in elements.values():
+            data = np.ascontiguousarray(data)
+            # No-op on little-endian hosts.
+            file.write(data.astype(data.dtype.newbyteorder("<"), copy=False).data)
+
+
+def field_view(data: np.ndarray, fields: list[str]) -> np.ndarray:
+    """Return the given fields of a structured array as an (N, len(fields)) array.
+
+    If the fields are adjacent in memory and share a dtype (e.g. x, y, z), the result
+    is a strided zero-copy view into `data`; otherwise the fields are copied.
+    """
+    dtype = data.dtype
+    first_type, first_offset = dtype.fields[fields[0]][:2]
+    is_adjacent = all(
+        dtype.fields[field][0] == first_type
+        and dtype.fields[field][1] == first_offset + i * first_type.itemsize
+        for i, field in enumerate(fields)
+    )
+    if not is_adjacent or not data.flags.c_contiguous:
+        return np.stack([np.asarray(data[field]) for field in fields], axis=1)
+
+    return np.ndarray(
+        shape=(len(data), len(fields)),
+        dtype=first_type,
+        buffer=data,
+        offset=first_offset,
+        strides=(dtype.itemsize, first_type.itemsize),
+    )
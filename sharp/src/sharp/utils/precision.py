@@ -0,0 +1,72 @@
+"""Contains helpers for mixed-precision inference.
+
+The predictor runs under torch.autocast: convolutions, linear layers and attention
+run in bfloat16 or float16, while the numerically sensitive parts cast their inputs
+back to float32 (depth rescaling, the inverse-softplus mean activation and the color
+space conversion in GaussianComposer). Weights stay in float32, so the same
+checkpoint works in every mode.
+
+For licensing see accompanying LICENSE file.
+Copyright (C) 2025 Apple Inc. All Rights Reserved.
+"""
+
+from __future__ import annotations
+
+import contextlib
+from typing import Literal, get_args
+
+import torch
+
+PrecisionMode = Literal["fp32", "bf16", "fp16"]
+
+_AUTOCAST_DTYPES: dict[PrecisionMode, torch.dtype] = {
+    "bf16": torch.bfloat16,
+    "fp16": torch.float16,
+}
+
+# Reduced precisions supported per device type. float16 on CPU is emulated and
+# slower than float32, bfloat16 on MPS is not supported by every macOS version.
+_SUPPORTED_PRECISIONS: dict[str, tuple[PrecisionMode, ...]] = {
+    "cpu": ("bf16",),
+    "cuda": ("bf16", "fp16"),
+    "mps": ("fp16",),
+}
+
+
+def get_supported_precisions() -> tuple[PrecisionMode, ...]:
+    """Return all precision modes."""
+    return get_args(PrecisionMode)
+
+
+def check_precision(precision: str, device: torch.device | str) -> PrecisionMode:
+    """Check that the precision mode can be used on the device.
+
+    Raises:
+        ValueError: If the mode is unknown or not supported on the device.
+    """
+    if precision not in get_supported_precisions():
+        raise ValueError(
+            f"Unsupported precision: {precision}. "
+            f"Expected one of {', '.join(get_supported_precisions())}."
+        )
+    if precision == "fp32":
+        return precision
+
+    device_type = torch.device(device).type
+    if precision not in _SUPPORTED_PRECISIONS.get(device_type, ()):
+        raise ValueError(f"Precision {precision} is not supported on {device_type}.")
+    if device_type == "cuda" and precision == "bf16" and not torch.cuda.is_bf16_supported():
+        raise ValueError("Precision bf16 is not supported by this GPU, use fp16 instead.")
+    return precision
+
+
+def autocast(
+    device: torch.device | str, precision: PrecisionMode
+) -> contextlib.AbstractContextManager:
+    """Return a context to run the predictor in the given precision mode."""
+    check_precision(precision, device)
+    if precision == "fp32":
+        return contextlib.nullcontext()
+    return torch.autocast(
+        device_type=torch.device(device).type, dtype=_AUTOCAST_DTYPES[precision]
+    )
@@ -0,0 +1,86 @@
+"""Contains dynamic int8 quantization of the ViT encoders and its accuracy report.
+
+Both ViTs of the SlidingPyramidNetwork run their linear layers (attention qkv and
+projection, MLP) over 35 patches per image and dominate CPU inference time. Dynamic
+quantization stores their weights in int8 and quantizes activations on the fly per
+batch, so no calibration data is needed. Patch embeddings, attention itself, the
+decoders and the composer stay in float32. Quantized linear layers only run on CPU.
+
+For licensing see accompanying LICENSE file.
+Copyright (C) 2025 Apple Inc. All Rights Reserved.
+"""
+
+from __future__ import annotations
+
+import logging
+import warnings
+
+import torch
+from torch import nn
+
+from sharp.models.encoders.spn_encoder import SlidingPyramidNetwork
+from sharp.utils.gaussians import Gaussians3D
+
+LOGGER = logging.getLogger(__name__)
+
+
+def quantize_encoders(predictor: nn.Module) -> int:
+    """Quantize the linear layers of all SPN ViT encoders in place.
+
+    Args:
+        predictor: The predictor, in eval mode on CPU and with weights loaded.
+
+    Returns:
+        The number of quantized encoders.
+    """
+    # torch.ao.quantization is deprecated in favor of torchao, which is not a
+    # dependency; its dynamic quantization still works for eager inference.
+    from torch.ao.quantization import quantize_dynamic
+
+    num_encoders = 0
+    for module in predictor.modules():
+        if not isinstance(module, SlidingPyramidNetwork):
+            continue
+        for encoder in (module.patch_encoder, module.image_encoder):
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", UserWarning)
+                warnings.simplefilter("ignore", DeprecationWarning)
+                quantize_dynamic(encoder, {nn.Linear}, dtype=torch.qint8, inplace=True)
+            num_encoders += 1
+    LOGGER.info("Quantized the linear layers of %d ViT encoders to int8.", num_encoders)
+    return num_encoders
+
+
+def compare_depth(reference: torch.Tensor, candidate: torch.Tensor) -> dict[str, float]:
+    """Compare a candidate disparity map to the float32 reference.
+
+    Returns:
+        The mean and 99th percentile absolute relative error and the fraction of
+        pixels with a relative error below 1.25 (delta_1 as in depth benchmarks).
+    """
+    reference = reference.float().clamp_min(1e-4)
+    candidate = candidate.float().clamp_min(1e-4)
+    relative_error = ((candidate - reference).abs() / reference).flatten()
+    ratio = torch.maximum(candidate / reference, reference / candidate)
+    return {
+        "abs_rel": relative_error.mean().item(),
+        "abs_rel_p99": torch.quantile(relative_error, 0.99).item(),
+        "delta_1": (ratio < 1.25).float().mean().item(),
+    }
+
+
+def compare_gaussians(reference: Gaussians3D, candidate: Gaussians3D) -> dict[str, float]:
+    """Compare candidate Gaussians to the float32 reference, Gaussian by Gaussian.
+
+    Positions and scales are compared relative to the depth of the reference
+    Gaussian, colors and opacities in absolute terms.
+    """
+    depth = reference.mean_vectors[..., 2:3].abs().clamp_min(1e-4)
+    position_error = (candidate.mean_vectors - reference.mean_vectors).norm(dim=-1, keepdim=True)
+    scale_error = (candidate.singular_values - reference.singular_values).abs()
+    return {
+        "position_rel": (position_error / depth).mean().item(),
+        "scale_rel": (scale_error / depth).mean().item(),
+        "color_abs": (candidate.colors - reference.colors).abs().mean().item(),
+        "opacity_abs": (candidate.opacities - reference.opacities).abs().mean().item(),
+    }
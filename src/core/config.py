@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file if it exists
@@ -23,10 +24,86 @@ class Settings:
     # Database
     DB_NAME: str = os.getenv("DB_NAME", "animaflow.sqlite")
     DATABASE_URL: str = os.getenv("DATABASE_URL", f"sqlite:///{DB_DIR}/{DB_NAME}")
+    # Same database through an async driver, used by the API handlers.
+    ASYNC_DATABASE_URL: str = os.getenv(
+        "ASYNC_DATABASE_URL", DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    )
+    # SQLite tuning: WAL journaling (with synchronous=NORMAL), memory-mapped I/O and
+    # page cache size per connection.
+    SQLITE_WAL: bool = os.getenv("SQLITE_WAL", "True").lower() == "true"
+    SQLITE_MMAP_SIZE: int = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+    SQLITE_CACHE_SIZE_KB: int = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
     
     # Model
     # Point to the sharp model weights if necessary
     SHARP_WEIGHTS_PATH: Path = Path(os.getenv("SHARP_WEIGHTS_PATH", str(BASE_DIR / "sharp" / "data" / "model" / "sharp_2572gikvuh.pt")))
+    # Inference backend: "torch" builds the predictor from SHARP_WEIGHTS_PATH, "onnx" runs
+    # a graph written by `sharp export` with ONNX Runtime and needs neither timm nor CUDA.
+    SHARP_BACKEND: str = os.getenv("SHARP_BACKEND", "torch").lower()
+    SHARP_ONNX_PATH: Path = Path(os.getenv("SHARP_ONNX_PATH", str(BASE_DIR / "sharp" / "data" / "model" / "sharp.onnx")))
+    # Load the model when a worker starts instead of on the first upload, and run a
+    # dummy forward pass to warm up kernels and allocator caches.
+    PRELOAD_MODEL: bool = os.getenv("PRELOAD_MODEL", "True").lower() == "true"
+    WARMUP_MODEL: bool = os.getenv("WARMUP_MODEL", "True").lower() == "true"
+    # Precision of the forward pass: "fp32", "bf16" (CPU and CUDA) or "fp16" (CUDA and MPS).
+    # Reduced precision runs the encoders and decoders under autocast; depth rescaling
+    # and the Gaussian activations stay in float32.
+    SHARP_PRECISION: str = os.getenv("SHARP_PRECISION", "fp32").lower()
+    # Compile the predictor's networks with torch.compile (needs a C++ compiler on CPU).
+    # The first forward pass of every batch size compiles; kernels are cached on disk in
+    # SHARP_COMPILE_CACHE_DIR so restarts only re-trace. Pair with WARMUP_MODEL.
+    SHARP_COMPILE: bool = os.getenv("SHARP_COMPILE", "False").lower() == "true"
+    SHARP_COMPILE_MODE: Optional[str] = os.getenv("SHARP_COMPILE_MODE") or None
+    SHARP_COMPILE_CACHE_DIR: Path = Path(os.getenv("SHARP_COMPILE_CACHE_DIR", str(DATA_DIR / "compile_cache")))
+    # Quantize the linear layers of the ViT encoders to int8 (torch backend on CPU in fp32
+    # only); check the accuracy impact with `sharp quantization-report` first.
+    SHARP_QUANTIZE: bool = os.getenv("SHARP_QUANTIZE", "False").lower() == "true"
+    # Pruning between unprojection and export, 0 disables a step.
+    # The default opacity matches the viewer's splatAlphaRemovalThreshold (5 / 255),
+    # so those Gaussians were never drawn anyway.
+    PRUNE_MIN_OPACITY: float = float(os.getenv("PRUNE_MIN_OPACITY", str(5 / 255)))
+    # Minimum projected standard deviation in pixels of the input image.
+    PRUNE_MIN_PROJECTED_SIZE: float = float(os.getenv("PRUNE_MIN_PROJECTED_SIZE", "0"))
+    # Merge second-layer Gaussians into the first layer when depths differ by at most this fraction.
+    PRUNE_MERGE_DEPTH_TOLERANCE: float = float(os.getenv("PRUNE_MERGE_DEPTH_TOLERANCE", "0"))
+    # Store Gaussians in 3D Morton order instead of the predictor's [layer, H, W] order,
+    # so neighbors in space are neighbors in the exported PLY files. Optional: the .ksplat
+    # export reorders Gaussians by importance anyway.
+    SPATIAL_SORT: bool = os.getenv("SPATIAL_SORT", "False").lower() == "true"
+    # Fractions of Gaussians kept by the extra level-of-detail scenes (level 1, 2, ...).
+    # Level 0 is always the full scene. Leave empty to only generate the full scene.
+    LOD_FRACTIONS: list = [
+        float(fraction) for fraction in os.getenv("LOD_FRACTIONS", "0.4,0.15").split(",") if fraction.strip()
+    ]
+    # Also write a compressed .ksplat next to every generated PLY; the viewer prefers it.
+    EXPORT_KSPLAT: bool = os.getenv("EXPORT_KSPLAT", "True").lower() == "true"
+    # Write gzip (plus brotli / zstd if installed) copies of generated scenes once, so
+    # /media serves them compressed without compressing on every request.
+    PRECOMPRESS_MEDIA: bool = os.getenv("PRECOMPRESS_MEDIA", "True").lower() == "true"
+
+    # Uploads above this size are rejected (413), before they are read if the client
+    # sends Content-Length, otherwise while they stream to disk.
+    MAX_UPLOAD_SIZE: int = int(float(os.getenv("MAX_UPLOAD_SIZE_MB", "1024")) * 1024 * 1024)
+
+    # Job Queue
+    # Number of inference worker processes spawned by the API on startup.
+    # Set to 0 when running workers separately via `python -m src.worker`.
+    WORKER_PROCESSES: int = int(os.getenv("WORKER_PROCESSES", "1"))
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))  # seconds
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    # Micro-batching: a worker coalesces up to INFERENCE_BATCH_SIZE pending jobs into one
+    # forward pass, waiting at most INFERENCE_BATCH_WAIT seconds for the batch to fill.
+    # Memory grows linearly with the batch size, so raise it only on boxes with headroom.
+    INFERENCE_BATCH_SIZE: int = int(os.getenv("INFERENCE_BATCH_SIZE", "1"))
+    INFERENCE_BATCH_WAIT: float = float(os.getenv("INFERENCE_BATCH_WAIT", "0.5"))  # seconds
+    # Workers record a heartbeat every interval; a worker is considered gone after the timeout.
+    WORKER_HEARTBEAT_INTERVAL: float = float(os.getenv("WORKER_HEARTBEAT_INTERVAL", "15"))  # seconds
+    WORKER_HEARTBEAT_TIMEOUT: float = float(os.getenv("WORKER_HEARTBEAT_TIMEOUT", "60"))  # seconds
+
+    # View configs resolved by GET /api/view/{id} are cached in memory per (wallpaper, user).
+    # Saves invalidate immediately; the TTL bounds staleness across API processes.
+    VIEW_CONFIG_CACHE_SIZE: int = int(os.getenv("VIEW_CONFIG_CACHE_SIZE", "4096"))  # 0 disables
+    VIEW_CONFIG_CACHE_TTL: float = float(os.getenv("VIEW_CONFIG_CACHE_TTL", "300"))  # seconds
 
     def init_dirs(self):
         self.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
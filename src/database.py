@@ -1,4 +1,5 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import create_engine, event, inspect, text, Column, Integer, String, Float, DateTime, ForeignKey, Index, Text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from sqlalchemy.sql import func
 import uuid
@@ -13,6 +14,9 @@ class Wallpaper(Base):
     filename = Column(String, nullable=False)
     upload_path = Column(String, nullable=False) # relative path
     ply_path = Column(String, nullable=True)     # relative path, null if not generated yet
+    splat_path = Column(String, nullable=True)   # relative path of the compressed .ksplat, if any
+    lod_levels = Column(Text, nullable=True)     # JSON list of {"level", "ply_path", "splat_path"}, level 0 first
+    content_hash = Column(String, nullable=True, index=True)  # sha256 of the uploaded file
     
     # Default camera settings (JSON strings)
     camera_pos = Column(String, nullable=True)     # e.g., '{"x":0, "y":0, "z":5}'
@@ -21,6 +25,12 @@ class Wallpaper(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     view_configs = relationship("ViewConfig", back_populates="wallpaper")
+    jobs = relationship("Job", back_populates="wallpaper")
+
+    __table_args__ = (
+        # Keyset pagination of the gallery, newest first.
+        Index("ix_wallpapers_created_at_id", "created_at", "id"),
+    )
 
 class ViewConfig(Base):
     __tablename__ = "view_configs"
@@ -34,13 +44,94 @@ class ViewConfig(Base):
 
     wallpaper = relationship("Wallpaper", back_populates="view_configs")
 
+    __table_args__ = (
+        # One config per wallpaper and user; also serves the lookups in the view router.
+        Index("ux_view_configs_wallpaper_user", "wallpaper_id", "user", unique=True),
+    )
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    wallpaper_id = Column(String, ForeignKey("wallpapers.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="pending", index=True) # pending | running | completed | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    worker = Column(String, nullable=True)  # id of the worker that claimed the job
+    error = Column(Text, nullable=True)
+    stage = Column(String, nullable=True)  # current SharpService stage, e.g. "monodepth"
+    stage_timings = Column(Text, nullable=True)  # JSON list of {"stage": ..., "seconds": ...}
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    wallpaper = relationship("Wallpaper", back_populates="jobs")
+
+class WorkerState(Base):
+    __tablename__ = "workers"
+
+    id = Column(String, primary_key=True)  # worker id, e.g. "worker-<pid>-<n>"
+    pid = Column(Integer, nullable=True)
+    state = Column(String, nullable=False, default="starting") # starting | loading | warming_up | ready | disabled | stopped
+    device = Column(String, nullable=True)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    heartbeat_at = Column(DateTime(timezone=True), server_default=func.now())
+
 engine = create_engine(
     settings.DATABASE_URL, connect_args={"check_same_thread": False}
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async path for API handlers: SQLite I/O runs on aiosqlite's connection threads
+# instead of occupying a threadpool worker per request. Workers keep the sync engine.
+async_engine = create_async_engine(settings.ASYNC_DATABASE_URL)
+# Objects stay usable after commit without a lazy (and in async, forbidden) reload.
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+def _configure_sqlite(dbapi_connection, connection_record):
+    if engine.dialect.name != "sqlite":
+        return
+    cursor = dbapi_connection.cursor()
+    if settings.SQLITE_WAL:
+        # Readers no longer block the worker's commits (and vice versa). NORMAL is
+        # durable across application crashes in WAL mode, only not across power loss.
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    # Negative values are in KiB instead of pages.
+    cursor.execute(f"PRAGMA cache_size={-int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.close()
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    _dedupe_view_configs()
+    _add_missing_columns()
+
+def _dedupe_view_configs():
+    # Databases created before the unique index may hold several configs for the same
+    # wallpaper and user. Lookups used .first(), i.e. the oldest row, so keep that one.
+    with engine.begin() as conn:
+        conn.execute(text(
+            "DELETE FROM view_configs WHERE id NOT IN "
+            "(SELECT MIN(id) FROM view_configs GROUP BY wallpaper_id, user)"
+        ))
+
+def _add_missing_columns():
+    # create_all() never alters existing tables, so add columns (and their indexes)
+    # introduced after a database was created. Only nullable columns without defaults
+    # are supported.
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
 
 def get_db():
     db = SessionLocal()
@@ -48,3 +139,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
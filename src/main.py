@@ -1,22 +1,38 @@
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.datastructures import Headers
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import FileResponse
+from starlette.responses import FileResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import os
 from contextlib import asynccontextmanager
 
-from src.database import init_db
+from src.core.config import settings
+from src.database import async_engine, init_db
+from src.services.media import MediaStaticFiles
 from src.routers.upload import router as upload_router
 from src.routers.view import router as view_router
+from src.routers.health import router as health_router
 
-# Initialize DB on startup
+# Initialize DB and inference workers on startup
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+
+    worker_pool = None
+    if settings.WORKER_PROCESSES > 0:
+        from src.worker import WorkerPool
+        worker_pool = WorkerPool(settings.WORKER_PROCESSES)
+        worker_pool.start()
+
     yield
 
+    if worker_pool is not None:
+        worker_pool.stop()
+    # Closes aiosqlite's connection threads.
+    await async_engine.dispose()
+
 app = FastAPI(title="AnimaFlow Server", lifespan=lifespan)
 
 # CORS Middleware
@@ -27,6 +43,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lets cross-origin clients page through the gallery and fetch scenes chunk by chunk.
+    expose_headers=["X-Next-Cursor", "X-Scene-Format", "X-Scene-Lod", "X-Splat-Chunks"],
 )
 
 # Security Headers Middleware for SharedArrayBuffer support
@@ -41,9 +59,75 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
 
 app.add_middleware(SecurityHeadersMiddleware)
 
+# Uploads are parsed (and spooled to disk) before the handler runs, so oversized ones
+# are turned away here: before their body is read whenever Content-Length is known,
+# and as soon as the received body passes the limit otherwise (e.g. chunked uploads).
+# Headroom for the multipart boundaries and part headers around the file.
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadSizeLimitMiddleware:
+    # Plain ASGI middleware, since the body has to be counted as it is received.
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not (
+            scope["type"] == "http"
+            and scope["method"] == "POST"
+            and scope["path"].rstrip("/") == "/api/upload"
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        limit = settings.MAX_UPLOAD_SIZE + MULTIPART_OVERHEAD
+        detail = f"File exceeds the {settings.MAX_UPLOAD_SIZE // (1024 * 1024)} MB upload limit"
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            await JSONResponse(status_code=413, content={"detail": detail})(scope, receive, send)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Looks like a disconnect to the app, so it stops reading the body.
+                    exceeded = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if exceeded and not response_started:
+                # The app's error response to the "disconnect"; the 413 is sent instead.
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded or response_started:
+                raise
+        if exceeded and not response_started:
+            await JSONResponse(status_code=413, content={"detail": detail})(scope, receive, send)
+
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
-app.mount("/media", StaticFiles(directory="data"), name="media")
+# Generated assets get content-hash ETags, immutable caching and precompressed variants.
+# Only the generated and upload directories are exposed: DATA_DIR also holds the database.
+app.mount("/media/generated", MediaStaticFiles(directory=settings.GENERATED_DIR), name="media")
+app.mount("/media/uploads", StaticFiles(directory=settings.UPLOAD_DIR), name="uploads")
 app.mount("/viewer", StaticFiles(directory="static/viewer", html=True), name="viewer")
 
 templates = Jinja2Templates(directory="src/templates")
@@ -51,6 +135,7 @@ templates = Jinja2Templates(directory="src/templates")
 # Include Routers
 app.include_router(upload_router, prefix="/api/upload", tags=["Upload"])
 app.include_router(view_router, prefix="/api/view", tags=["View"])
+app.include_router(health_router, prefix="/health", tags=["Health"])
 
 @app.get("/")
 async def read_root(request: Request):
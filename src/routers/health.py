@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from src.database import get_db, WorkerState
+from src.services.job_queue import live_worker_ids
+from src.services.view_cache import view_config_cache
+
+router = APIRouter()
+
+def _live_workers(db: Session):
+    """Workers that have not stopped and sent a heartbeat within the timeout."""
+    return (
+        db.query(WorkerState)
+        .filter(WorkerState.id.in_(live_worker_ids()))
+        .order_by(WorkerState.id)
+        .all()
+    )
+
+def _describe(worker: WorkerState) -> dict:
+    return {
+        "id": worker.id,
+        "pid": worker.pid,
+        "state": worker.state,
+        "device": worker.device,
+        "heartbeat_at": worker.heartbeat_at.isoformat() if worker.heartbeat_at else None,
+    }
+
+@router.get("/")
+def liveness(db: Session = Depends(get_db)):
+    """The API process is up; lists the inference workers it can see and cache counters."""
+    return {
+        "status": "ok",
+        "workers": [_describe(w) for w in _live_workers(db)],
+        "caches": {"view_configs": view_config_cache.stats()},
+    }
+
+@router.get("/ready")
+def readiness(db: Session = Depends(get_db)):
+    """
+    Returns 200 once at least one worker has its model loaded and warmed up, so load
+    balancers only route uploads here when they will not wait on a cold start.
+    If inference is disabled (no ML dependencies), workers can never become ready but
+    PLY uploads still work, so that case is reported as ready too.
+    """
+    workers = _live_workers(db)
+    states = {w.state for w in workers}
+    if "ready" in states:
+        status = "ready"
+    elif workers and states == {"disabled"}:
+        status = "inference_disabled"
+    else:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "not_ready", "workers": [_describe(w) for w in workers]},
+        )
+    return {"status": status, "workers": [_describe(w) for w in workers]}
@@ -1,47 +1,125 @@
-from fastapi import APIRouter, UploadFile, File, Depends, BackgroundTasks, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, UploadFile, File, Depends, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import String, select, tuple_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
 from pathlib import Path
-import shutil
+import aiofiles
+import asyncio
+import base64
+import hashlib
+import json
+import logging
 import uuid
 import os
+from typing import List, Optional
 
-from src.database import get_db, Wallpaper, SessionLocal
+from src.database import get_async_db, Job, Wallpaper, AsyncSessionLocal
 from src.core.config import settings
-from src.services.sharp_service import sharp_service
+from src.services.job_queue import enqueue_job, get_latest_job, PENDING, RUNNING
+from src.services.job_events import job_event_broker, TERMINAL_STATUSES
+from src.services.media import media_response, precompress_files
+from src.services.scene_files import ksplat_chunks
+
+LOGGER = logging.getLogger(__name__)
 
 router = APIRouter()
 
-def process_and_update_db(wallpaper_id: str, input_path: Path, ply_path: Path):
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+GALLERY_PAGE_SIZE = 50
+GALLERY_MAX_PAGE_SIZE = 200
+# Status of the latest generation job, None for uploaded PLYs that never had one.
+JOB_STATUS = (
+    select(Job.status)
+    .where(Job.wallpaper_id == Wallpaper.id)
+    .order_by(Job.id.desc())
+    .limit(1)
+    .scalar_subquery()
+)
+LISTABLE_COLUMNS = {column.name: getattr(Wallpaper, column.name) for column in Wallpaper.__table__.columns}
+LISTABLE_COLUMNS["job_status"] = JOB_STATUS
+LISTABLE_FIELDS = tuple(LISTABLE_COLUMNS)
+
+# Leading bytes of the image formats accepted for inference.
+IMAGE_SIGNATURES = (
+    b"\xff\xd8\xff",  # JPEG
+    b"\x89PNG\r\n\x1a\n",
+    b"GIF87a",
+    b"GIF89a",
+    b"BM",
+    b"II*\x00",  # TIFF, little endian
+    b"MM\x00*",  # TIFF, big endian
+    b"\x00\x00\x00\x0cjP  \r\n\x87\n",  # JPEG 2000
+    b"\xff\x4f\xff\x51",  # JPEG 2000 codestream
+)
+# ISO base media brands of HEIF / AVIF images, stored right after "ftyp".
+HEIF_BRANDS = {b"heic", b"heix", b"heim", b"heis", b"hevc", b"hevx", b"mif1", b"msf1", b"avif", b"avis"}
+
+def _sniff_upload(head: bytes) -> Optional[str]:
+    """Classifies an upload by its first bytes as "ply", "image" or None (unsupported)."""
+    if head.startswith((b"ply\n", b"ply\r\n")):
+        return "ply"
+    if head.startswith(IMAGE_SIGNATURES):
+        return "image"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image"
+    if head[4:8] == b"ftyp" and head[8:12] in HEIF_BRANDS:
+        return "image"
+    return None
+
+def _too_large() -> HTTPException:
+    return HTTPException(
+        status_code=413, detail=f"File exceeds the {settings.MAX_UPLOAD_SIZE // (1024 * 1024)} MB upload limit"
+    )
+
+async def _save_and_hash(source: UploadFile, first_chunk: bytes, target_path: Path) -> str:
+    """
+    Streams the upload to `target_path` in chunks without blocking the event loop,
+    hashing it on the way and enforcing MAX_UPLOAD_SIZE. Returns the sha256 hex digest.
+    """
+    digest = hashlib.sha256()
+    size = 0
     try:
-        # Run sharp inference
-        sharp_service.process_image(input_path, ply_path)
-        
-        # Update DB
-        new_db = SessionLocal()
-        try:
-            wp = new_db.query(Wallpaper).filter(Wallpaper.id == wallpaper_id).first()
-            if wp:
-                # Store relative path so it works in docker/static mounts
-                # ply_path is absolute, settings.BASE_DIR is absolute
-                try:
-                    rel_ply = str(ply_path.relative_to(settings.BASE_DIR))
-                except ValueError:
-                    # Fallback if paths don't match (shouldn't happen in configured env)
-                    rel_ply = str(ply_path)
-                    
-                wp.ply_path = rel_ply
-                new_db.commit()
-        finally:
-            new_db.close()
-            
-    except Exception as e:
-        print(f"Error processing wallpaper {wallpaper_id}: {e}")
+        async with aiofiles.open(target_path, "wb") as buffer:
+            chunk = first_chunk
+            while chunk:
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_SIZE:
+                    raise _too_large()
+                digest.update(chunk)
+                await buffer.write(chunk)
+                chunk = await source.read(UPLOAD_CHUNK_SIZE)
+    except BaseException:
+        target_path.unlink(missing_ok=True)
+        raise
+    return digest.hexdigest()
+
+async def _find_duplicate(db: AsyncSession, content_hash: str, is_ply: bool):
+    """
+    Returns an earlier wallpaper with identical content whose PLY exists or is still
+    being generated, or None if the upload has to be processed from scratch.
+    """
+    candidates = await db.scalars(
+        select(Wallpaper)
+        .where(Wallpaper.content_hash == content_hash)
+        .order_by(Wallpaper.created_at)
+    )
+    for wp in candidates.all():
+        if wp.ply_path:
+            if (settings.BASE_DIR / wp.ply_path).exists():
+                return wp
+        elif not is_ply:
+            job = await db.run_sync(get_latest_job, wp.id)
+            if job is not None and job.status in (PENDING, RUNNING):
+                return wp
+    return None
 
 @router.post("/")
 async def upload_image(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...), 
-    background_tasks: BackgroundTasks = BackgroundTasks(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     file_ext = Path(file.filename).suffix
     is_ply = file_ext.lower() == ".ply"
@@ -71,9 +149,29 @@ async def upload_image(
         upload_path = settings.UPLOAD_DIR / filename
         target_save_path = upload_path
 
-    # Save uploaded file
-    with open(target_save_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    if file.size is not None and file.size > settings.MAX_UPLOAD_SIZE:
+        raise _too_large()
+
+    # Reject by content before anything is written: the extension and content type
+    # are chosen by the client and prove nothing.
+    head = await file.read(UPLOAD_CHUNK_SIZE)
+    if _sniff_upload(head) != ("ply" if is_ply else "image"):
+        raise HTTPException(status_code=400, detail="File content is not a supported image or PLY")
+
+    # Save uploaded file, hashing it while it streams to disk
+    content_hash = await _save_and_hash(file, head, target_save_path)
+
+    # Identical content was uploaded before: hand back that wallpaper instead of
+    # storing the file twice and running inference again.
+    duplicate = await _find_duplicate(db, content_hash, is_ply)
+    if duplicate is not None:
+        target_save_path.unlink(missing_ok=True)
+        LOGGER.info(f"Upload {file.filename} is a duplicate of wallpaper {duplicate.id}")
+        return {
+            "id": duplicate.id,
+            "status": "completed" if duplicate.ply_path else "processing",
+            "duplicate": True,
+        }
         
     # Create DB entry with relative paths
     try:
@@ -93,26 +191,197 @@ async def upload_image(
         id=wp_id,
         filename=file.filename,
         upload_path=rel_upload_path,
-        ply_path=db_ply_path 
+        ply_path=db_ply_path,
+        content_hash=content_hash,
     )
     db.add(new_wallpaper)
-    db.commit()
-    db.refresh(new_wallpaper)
 
-    # Trigger background processing only if NOT a PLY
+    # Queue inference only if NOT a PLY. The job is committed together with the
+    # wallpaper, so a restart can never lose it; the worker pool picks it up.
     if not is_ply:
-        background_tasks.add_task(process_and_update_db, wp_id, upload_path, ply_path)
+        enqueue_job(db, wp_id)
+
+    await db.commit()
+
+    # Uploaded PLYs skip the worker, so precompress them once the response is sent.
+    if is_ply and settings.PRECOMPRESS_MEDIA:
+        background_tasks.add_task(precompress_files, [ply_path])
+
+    return {"id": wp_id, "status": "completed" if is_ply else "processing", "duplicate": False}
 
-    return {"id": wp_id, "status": "completed" if is_ply else "processing"}
+def _encode_cursor(created_at: str, wallpaper_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at, wallpaper_id]).encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, wallpaper_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return str(created_at), str(wallpaper_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @router.get("/")
-def get_wallpapers(db: Session = Depends(get_db)):
-    wallpapers = db.query(Wallpaper).order_by(Wallpaper.created_at.desc()).all()
-    return wallpapers
+async def get_wallpapers(
+    response: Response,
+    limit: int = Query(GALLERY_PAGE_SIZE, ge=1, le=GALLERY_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    status: Optional[str] = Query(None, pattern="^(pending|completed)$"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    One page of wallpapers, newest first. Pass the X-Next-Cursor response header as
+    `cursor` to get the next page; it is absent on the last page. Pages are keyed on
+    (created_at, id), so each one costs the same however deep the gallery goes.
+
+    `fields` is a comma-separated list of columns to return (default: all), plus
+    `job_status`, the status of the latest generation job. `status` keeps only
+    wallpapers whose scene is still pending or already completed.
+    """
+    selected = [name.strip() for name in fields.split(",") if name.strip()] if fields else list(LISTABLE_FIELDS)
+    unknown = [name for name in selected if name not in LISTABLE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    # Compared as stored text: binding a datetime would not match SQLite's format.
+    created_at_text = type_coerce(Wallpaper.created_at, String)
+    query = select(
+        *(LISTABLE_COLUMNS[name].label(name) for name in selected),
+        created_at_text.label("cursor_created_at"),
+        Wallpaper.id.label("cursor_id"),
+    )
+    if status == "pending":
+        query = query.where(Wallpaper.ply_path.is_(None))
+    elif status == "completed":
+        query = query.where(Wallpaper.ply_path.isnot(None))
+    if cursor:
+        query = query.where(tuple_(created_at_text, Wallpaper.id) < _decode_cursor(cursor))
+
+    query = query.order_by(Wallpaper.created_at.desc(), Wallpaper.id.desc()).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(rows[-1].cursor_created_at, rows[-1].cursor_id)
+    return [{name: getattr(row, name) for name in selected} for row in rows]
+
+async def _existing_wallpapers(wallpaper_ids: List[str]) -> List[str]:
+    # Not a dependency: the session would stay open for the whole event stream.
+    async with AsyncSessionLocal() as db:
+        existing = set(await db.scalars(select(Wallpaper.id).where(Wallpaper.id.in_(wallpaper_ids))))
+    return [wallpaper_id for wallpaper_id in wallpaper_ids if wallpaper_id in existing]
+
+def _progress_stream(wallpaper_ids: List[str], request: Request) -> StreamingResponse:
+    """
+    Server-Sent Events of the wallpapers' generation progress on one connection. Each
+    `progress` event names its wallpaper; the stream ends once every job completed
+    or failed.
+    """
+    async def event_stream():
+        queue = None
+        for wallpaper_id in wallpaper_ids:
+            queue = job_event_broker.subscribe(wallpaper_id, queue)
+        unfinished = set(wallpaper_ids)
+        try:
+            while unfinished and not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection.
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield f"event: progress\ndata: {json.dumps(event)}\n\n"
+                if event["status"] in TERMINAL_STATUSES:
+                    unfinished.discard(event["wallpaper_id"])
+        finally:
+            for wallpaper_id in wallpaper_ids:
+                job_event_broker.unsubscribe(wallpaper_id, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/events")
+async def wallpapers_events(request: Request, ids: str = Query(...)):
+    """
+    Progress of several wallpapers over a single Server-Sent Events stream, so a
+    gallery watching many cards needs one connection. `ids` is a comma-separated
+    list of wallpaper ids; unknown ids are ignored.
+    """
+    wallpaper_ids = list(dict.fromkeys(wallpaper_id.strip() for wallpaper_id in ids.split(",") if wallpaper_id.strip()))
+    if len(wallpaper_ids) > GALLERY_MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {GALLERY_MAX_PAGE_SIZE} ids per stream")
+    wallpaper_ids = await _existing_wallpapers(wallpaper_ids)
+    if not wallpaper_ids:
+        raise HTTPException(status_code=404, detail="Wallpaper not found")
+    return _progress_stream(wallpaper_ids, request)
+
+def _select_level(wallpaper: Wallpaper, lod: int) -> dict:
+    """The finest level of detail at or below `lod`, falling back to the full scene."""
+    levels = json.loads(wallpaper.lod_levels) if wallpaper.lod_levels else []
+    if lod > 0 and levels:
+        return [entry for entry in levels if entry["level"] <= lod][-1]
+    return {"level": 0, "ply_path": wallpaper.ply_path, "splat_path": wallpaper.splat_path}
 
 @router.get("/{wallpaper_id}")
-def get_wallpaper(wallpaper_id: str, db: Session = Depends(get_db)):
-    wallpaper = db.query(Wallpaper).filter(Wallpaper.id == wallpaper_id).first()
+async def get_wallpaper(wallpaper_id: str, lod: int = Query(0, ge=0), db: AsyncSession = Depends(get_async_db)):
+    """
+    Wallpaper metadata. `lod` selects a level of detail (0 = full scene, higher levels
+    have fewer Gaussians): ply_path and splat_path then point to that level, or to the
+    coarsest one available if the wallpaper has fewer levels.
+    """
+    wallpaper = await db.get(Wallpaper, wallpaper_id)
     if not wallpaper:
         raise HTTPException(status_code=404, detail="Wallpaper not found")
-    return wallpaper
+
+    data = jsonable_encoder(wallpaper)
+    level = _select_level(wallpaper, lod)
+    data.update(lod=level["level"], ply_path=level["ply_path"], splat_path=level["splat_path"])
+    return data
+
+@router.get("/{wallpaper_id}/scene")
+async def get_scene(
+    wallpaper_id: str, request: Request, lod: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Scene data for progressive loading. Serves the .ksplat (or the PLY if there is
+    none) of the selected level of detail and supports Range requests.
+
+    The .ksplat stores Gaussians most important first (opaque, large and near the
+    camera) in sections of doubling size; X-Splat-Chunks lists their byte ranges, so
+    a client can fetch the file chunk by chunk and render a coarse scene after the
+    first one. Streaming the whole response gives the same order. Full downloads use
+    a precompressed variant if there is one; revalidation with the ETag returns 304.
+    """
+    wallpaper = await db.get(Wallpaper, wallpaper_id)
+    if not wallpaper:
+        raise HTTPException(status_code=404, detail="Wallpaper not found")
+
+    level = _select_level(wallpaper, lod)
+    scene_path = level["splat_path"] or level["ply_path"]
+    if not scene_path or not (settings.BASE_DIR / scene_path).exists():
+        raise HTTPException(status_code=404, detail="Scene not generated yet")
+
+    path = settings.BASE_DIR / scene_path
+    scene_format = path.suffix.lstrip(".").lower()
+    headers = {"X-Scene-Format": scene_format, "X-Scene-Lod": str(level["level"])}
+    if scene_format == "ksplat":
+        chunks = await run_in_threadpool(ksplat_chunks, path)
+        headers["X-Splat-Chunks"] = ",".join(f"{first}-{last}" for first, last in chunks)
+    # The level behind this URL can change (e.g. once LODs exist), so revalidate
+    # instead of caching it as immutable like /media.
+    return await run_in_threadpool(
+        media_response, path, request.headers, cache_control="no-cache", headers=headers
+    )
+
+@router.get("/{wallpaper_id}/events")
+async def wallpaper_events(wallpaper_id: str, request: Request):
+    """
+    Server-Sent Events stream of generation progress: one `progress` event per stage
+    transition (with per-stage timings), ending after the job completes or fails.
+    """
+    if not await _existing_wallpapers([wallpaper_id]):
+        raise HTTPException(status_code=404, detail="Wallpaper not found")
+    return _progress_stream([wallpaper_id], request)
@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Body
-from sqlalchemy.orm import Session
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from typing import Optional
 
-from src.database import get_db, ViewConfig, Wallpaper
+from src.database import get_async_db, ViewConfig, Wallpaper
+from src.services.view_cache import view_config_cache
 
 router = APIRouter()
 
@@ -14,33 +18,41 @@ class ViewConfigSchema(BaseModel):
     cam_matrix: Optional[str] = None # JSON string
 
 @router.get("/{wallpaper_id}")
-def get_view_config(wallpaper_id: str, user: str = "default", db: Session = Depends(get_db)):
+async def get_view_config(wallpaper_id: str, user: str = "default", db: AsyncSession = Depends(get_async_db)):
+    cached = view_config_cache.get(wallpaper_id, user)
+    if cached is not None:
+        return cached
+    # Taken before the query, so a save committed while we read is not cached over.
+    generation = view_config_cache.generation()
+
     # Try to find specific user config
-    config = db.query(ViewConfig).filter(
+    config = await db.scalar(select(ViewConfig).where(
         ViewConfig.wallpaper_id == wallpaper_id,
         ViewConfig.user == user
-    ).first()
+    ))
     
     if not config and user != "default":
         # Fallback to default (global config for this wallpaper)
-        config = db.query(ViewConfig).filter(
+        config = await db.scalar(select(ViewConfig).where(
             ViewConfig.wallpaper_id == wallpaper_id,
             ViewConfig.user == "default"
-        ).first()
+        ))
         
     if not config:
         # Return default values if nothing found
-        return {"fov": 60.0, "cam_matrix": None}
-        
-    return config
+        resolved = {"fov": 60.0, "cam_matrix": None}
+    else:
+        resolved = jsonable_encoder(config)
+    view_config_cache.put(wallpaper_id, user, resolved, generation)
+    return resolved
 
 @router.post("/")
-def save_view_config(config_data: ViewConfigSchema, db: Session = Depends(get_db)):
+async def save_view_config(config_data: ViewConfigSchema, db: AsyncSession = Depends(get_async_db)):
     # Check if exists
-    config = db.query(ViewConfig).filter(
+    config = await db.scalar(select(ViewConfig).where(
         ViewConfig.wallpaper_id == config_data.wallpaper_id,
         ViewConfig.user == config_data.user
-    ).first()
+    ))
     
     if config:
         config.fov = config_data.fov
@@ -54,6 +66,18 @@ def save_view_config(config_data: ViewConfigSchema, db: Session = Depends(get_db
         )
         db.add(config)
         
-    db.commit()
-    db.refresh(config)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent save created the row first; the unique index rejected ours.
+        await db.rollback()
+        config = (await db.scalars(select(ViewConfig).where(
+            ViewConfig.wallpaper_id == config_data.wallpaper_id,
+            ViewConfig.user == config_data.user
+        ))).one()
+        config.fov = config_data.fov
+        config.cam_matrix = config_data.cam_matrix
+        await db.commit()
+    view_config_cache.invalidate(config_data.wallpaper_id)
+    await db.refresh(config)
     return config
\ No newline at end of file
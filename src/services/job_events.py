@@ -0,0 +1,106 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+
+from starlette.concurrency import run_in_threadpool
+
+from src.database import SessionLocal, Job, Wallpaper
+from src.services.job_queue import COMPLETED, FAILED
+
+LOGGER = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = (COMPLETED, FAILED)
+
+def build_event(wallpaper: Wallpaper, job: Optional[Job]) -> dict:
+    """Snapshot of a wallpaper's generation progress as sent to clients."""
+    if job is None:
+        # Uploaded PLYs never get a job, they are complete right away.
+        status = COMPLETED if wallpaper.ply_path else "pending"
+        return {"wallpaper_id": wallpaper.id, "status": status, "stage": None,
+                "stages": [], "error": None, "ply_path": wallpaper.ply_path}
+
+    return {
+        "wallpaper_id": wallpaper.id,
+        "job_id": job.id,
+        "status": job.status,
+        "stage": job.stage,
+        "stages": json.loads(job.stage_timings) if job.stage_timings else [],
+        "attempts": job.attempts,
+        "error": job.error,
+        "ply_path": wallpaper.ply_path,
+    }
+
+class JobEventBroker:
+    """
+    Fans job progress out to any number of subscribers.
+
+    Workers run in other processes and record their progress in the jobs table, so a
+    single polling task queries the state of every watched wallpaper at once and
+    pushes changes to subscriber queues. The database cost is one query per interval,
+    no matter how many dashboards are listening.
+    """
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+        self._last_events: Dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self, wallpaper_id: str, queue: Optional[asyncio.Queue] = None) -> asyncio.Queue:
+        """
+        Returns a queue that receives every progress event of the wallpaper. Pass the
+        queue of an earlier subscription to receive several wallpapers' events on it.
+        """
+        if queue is None:
+            queue = asyncio.Queue()
+        self._subscribers[wallpaper_id].add(queue)
+        # Replay the latest known state so new subscribers don't wait for a change.
+        if wallpaper_id in self._last_events:
+            queue.put_nowait(self._last_events[wallpaper_id])
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, wallpaper_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(wallpaper_id)
+        if subscribers is None:
+            return
+        subscribers.discard(queue)
+        if not subscribers:
+            del self._subscribers[wallpaper_id]
+            self._last_events.pop(wallpaper_id, None)
+
+    async def _run(self):
+        while self._subscribers:
+            try:
+                events = await run_in_threadpool(self._poll, list(self._subscribers))
+            except Exception as e:
+                LOGGER.warning(f"Polling job progress failed: {e}")
+                events = {}
+
+            for wallpaper_id, event in events.items():
+                if self._last_events.get(wallpaper_id) == event:
+                    continue
+                self._last_events[wallpaper_id] = event
+                for queue in self._subscribers.get(wallpaper_id, ()):
+                    queue.put_nowait(event)
+
+            await asyncio.sleep(self.interval)
+
+    @staticmethod
+    def _poll(wallpaper_ids: List[str]) -> Dict[str, dict]:
+        db = SessionLocal()
+        try:
+            wallpapers = db.query(Wallpaper).filter(Wallpaper.id.in_(wallpaper_ids)).all()
+            latest_jobs: Dict[str, Job] = {}
+            # Ascending by id, so the latest job of each wallpaper wins.
+            for job in db.query(Job).filter(Job.wallpaper_id.in_(wallpaper_ids)).order_by(Job.id):
+                latest_jobs[job.wallpaper_id] = job
+            return {wp.id: build_event(wp, latest_jobs.get(wp.id)) for wp in wallpapers}
+        finally:
+            db.close()
+
+# Singleton instance
+job_event_broker = JobEventBroker()
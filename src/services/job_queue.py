@@ -0,0 +1,147 @@
+import json
+import logging
+from typing import List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from src.database import Job, WorkerState
+from src.core.config import settings
+
+LOGGER = logging.getLogger(__name__)
+
+# Job states
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+def enqueue_job(db: Session, wallpaper_id: str) -> Job:
+    """
+    Adds a pending inference job for the wallpaper. The caller commits, so the job
+    can be created in the same transaction as the wallpaper row itself.
+    """
+    job = Job(wallpaper_id=wallpaper_id, status=PENDING)
+    db.add(job)
+    return job
+
+def claim_jobs(db: Session, worker_id: str, limit: int = 1) -> List[Job]:
+    """
+    Atomically claims up to `limit` of the oldest pending jobs for `worker_id`.
+
+    The claim is a compare-and-set UPDATE guarded on `status = 'pending'`, so when
+    several workers race for the same rows each row is handed to exactly one of them.
+    """
+    while True:
+        candidate_ids = [
+            row.id for row in
+            db.query(Job.id)
+            .filter(Job.status == PENDING)
+            .order_by(Job.id)
+            .limit(limit)
+            .all()
+        ]
+        if not candidate_ids:
+            return []
+
+        result = db.execute(
+            update(Job)
+            .where(Job.id.in_(candidate_ids), Job.status == PENDING)
+            .values(
+                status=RUNNING,
+                worker=worker_id,
+                attempts=Job.attempts + 1,
+                started_at=func.now(),
+            )
+        )
+        db.commit()
+
+        if result.rowcount > 0:
+            return (
+                db.query(Job)
+                .filter(Job.id.in_(candidate_ids), Job.worker == worker_id, Job.status == RUNNING)
+                .order_by(Job.id)
+                .all()
+            )
+        # Other workers won the race for all candidates, try the next ones.
+
+def claim_next_job(db: Session, worker_id: str) -> Optional[Job]:
+    jobs = claim_jobs(db, worker_id, limit=1)
+    return jobs[0] if jobs else None
+
+def record_stage(db: Session, job: Job, stage: str, seconds: float, details: Optional[dict] = None):
+    """
+    Records that `stage` finished after `seconds`, along with optional stage statistics
+    such as pruning counts. The caller commits.
+    """
+    timings = json.loads(job.stage_timings) if job.stage_timings else []
+    entry = {"stage": stage, "seconds": round(seconds, 3)}
+    if details:
+        entry["details"] = details
+    timings.append(entry)
+    job.stage = stage
+    job.stage_timings = json.dumps(timings)
+
+def complete_job(db: Session, job: Job):
+    job.status = COMPLETED
+    job.error = None
+    job.finished_at = func.now()
+    db.commit()
+
+def fail_job(db: Session, job: Job, error: str):
+    """Marks the job as failed, or puts it back in the queue if it has attempts left."""
+    job.error = error
+    if job.attempts < settings.JOB_MAX_ATTEMPTS:
+        job.status = PENDING
+        job.worker = None
+    else:
+        job.status = FAILED
+        job.finished_at = func.now()
+    db.commit()
+
+def live_worker_ids():
+    """Ids of workers that have not stopped and sent a heartbeat within the timeout, as a subquery."""
+    # SQLite stores func.now() as UTC text, so compare against datetime('now') there too.
+    cutoff = func.datetime("now", f"-{int(settings.WORKER_HEARTBEAT_TIMEOUT)} seconds")
+    return select(WorkerState.id).where(WorkerState.state != "stopped", WorkerState.heartbeat_at >= cutoff)
+
+def requeue_interrupted_jobs(db: Session) -> int:
+    """
+    Puts running jobs whose worker is gone back into the queue. A worker holds its
+    jobs only while it sends heartbeats, so this is safe to call while other workers
+    are processing jobs: their leases are left alone.
+
+    The interrupted run counts as an attempt (claim_jobs counted it), so a job that
+    keeps crashing its worker fails once it has used up JOB_MAX_ATTEMPTS.
+    """
+    orphaned = (
+        Job.status == RUNNING,
+        or_(Job.worker.is_(None), Job.worker.not_in(live_worker_ids())),
+    )
+    failed = db.execute(
+        update(Job)
+        .where(*orphaned, Job.attempts >= settings.JOB_MAX_ATTEMPTS)
+        .values(status=FAILED, error="Worker stopped while processing the job", finished_at=func.now())
+        .execution_options(synchronize_session=False)
+    )
+    requeued = db.execute(
+        update(Job)
+        .where(*orphaned)
+        .values(status=PENDING, worker=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if failed.rowcount:
+        LOGGER.warning(f"Failed {failed.rowcount} interrupted job(s) that ran out of attempts.")
+    if requeued.rowcount:
+        LOGGER.warning(f"Re-queued {requeued.rowcount} interrupted job(s).")
+    return requeued.rowcount
+
+def get_latest_job(db: Session, wallpaper_id: str) -> Optional[Job]:
+    return (
+        db.query(Job)
+        .filter(Job.wallpaper_id == wallpaper_id)
+        .order_by(Job.id.desc())
+        .first()
+    )
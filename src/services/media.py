@@ -0,0 +1,208 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import shutil
+import stat
+from email.utils import parsedate
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+# Optional: brotli / zstandard variants are only written if the packages are installed.
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+LOGGER = logging.getLogger(__name__)
+
+# Generated assets are named after their wallpaper id and never change once written.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+COMPRESS_CHUNK_SIZE = 1024 * 1024
+# Variants that save less than this fraction of the original are not kept.
+MIN_COMPRESSION_SAVING = 0.05
+
+def _compress_gzip(source, target):
+    # mtime=0 keeps the output (and thus caches) stable across re-runs.
+    with gzip.GzipFile(fileobj=target, mode="wb", compresslevel=6, mtime=0) as writer:
+        shutil.copyfileobj(source, writer, COMPRESS_CHUNK_SIZE)
+
+def _compress_brotli(source, target):
+    # Quality 11 is far too slow for multi-hundred-MB scenes.
+    compressor = brotli.Compressor(quality=5)
+    while chunk := source.read(COMPRESS_CHUNK_SIZE):
+        target.write(compressor.process(chunk))
+    target.write(compressor.finish())
+
+def _compress_zstd(source, target):
+    zstandard.ZstdCompressor(level=10).copy_stream(source, target, read_size=COMPRESS_CHUNK_SIZE)
+
+# Content-Encoding -> (file suffix, compressor), in order of preference.
+ENCODINGS = {
+    encoding: (suffix, compress)
+    for encoding, suffix, compress, available in (
+        ("br", ".br", _compress_brotli, brotli is not None),
+        ("zstd", ".zst", _compress_zstd, zstandard is not None),
+        ("gzip", ".gz", _compress_gzip, True),
+    )
+    if available
+}
+
+def _variant_path(path: Path, encoding: str) -> Path:
+    return path.with_name(path.name + ENCODINGS[encoding][0])
+
+def precompress(path: Path):
+    """
+    Writes a compressed copy of `path` next to it for every available encoding, e.g.
+    `<id>.ply.gz`. Returns the encodings that were kept.
+    """
+    original_size = path.stat().st_size
+    kept = []
+    for encoding, (_, compress) in ENCODINGS.items():
+        variant_path = _variant_path(path, encoding)
+        # Written under a temporary name so requests never see a partial variant.
+        tmp_path = variant_path.with_name(variant_path.name + ".tmp")
+        try:
+            with open(path, "rb") as source, open(tmp_path, "wb") as target:
+                compress(source, target)
+
+            if tmp_path.stat().st_size > original_size * (1 - MIN_COMPRESSION_SAVING):
+                variant_path.unlink(missing_ok=True)
+                continue
+            os.replace(tmp_path, variant_path)
+            kept.append(encoding)
+        finally:
+            # Gone after a successful replace; otherwise left over from a skipped or failed run.
+            tmp_path.unlink(missing_ok=True)
+    return kept
+
+def precompress_files(paths):
+    """Precompresses every existing file in `paths`; failures are logged, not raised."""
+    for path in paths:
+        if path is None or not path.exists():
+            continue
+        try:
+            kept = precompress(path)
+            LOGGER.info(f"Precompressed {path.name}: {kept or 'not compressible'}")
+        except Exception as e:
+            LOGGER.warning(f"Precompressing {path} failed: {e}")
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    # Keyed by mtime and size too, so a rewritten file is hashed again.
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(COMPRESS_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+def _accepted_encodings(accept_encoding: str):
+    accepted = set()
+    for entry in accept_encoding.split(","):
+        encoding, *params = (part.strip() for part in entry.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if encoding and quality > 0:
+            accepted.add(encoding.lower())
+    return accepted
+
+def _select_variant(path: Path, stat_result: os.stat_result, request_headers: Headers):
+    """Picks the preferred precompressed variant the client accepts, if any is up to date."""
+    # Range offsets refer to the uncompressed file, so ranges are always served as is.
+    if "range" in request_headers:
+        return None, None
+    accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+    for encoding in ENCODINGS:
+        if encoding not in accepted:
+            continue
+        variant_path = _variant_path(path, encoding)
+        try:
+            variant_stat = variant_path.stat()
+        except FileNotFoundError:
+            continue
+        if variant_stat.st_mtime_ns >= stat_result.st_mtime_ns:
+            return encoding, (variant_path, variant_stat)
+    return None, None
+
+def _is_not_modified(response_headers, request_headers: Headers) -> bool:
+    if if_none_match := request_headers.get("if-none-match"):
+        if if_none_match.strip() == "*":
+            return True
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return response_headers["etag"] in tags
+
+    if_modified_since = parsedate(request_headers.get("if-modified-since", ""))
+    last_modified = parsedate(response_headers.get("last-modified", ""))
+    return if_modified_since is not None and last_modified is not None and if_modified_since >= last_modified
+
+def media_response(
+    path: Path,
+    request_headers: Headers,
+    cache_control: str = IMMUTABLE_CACHE_CONTROL,
+    stat_result: Optional[os.stat_result] = None,
+    headers: Optional[dict] = None,
+) -> Response:
+    """
+    Serves a file with a content-hash ETag, answering conditional requests with 304 and
+    Range requests with 206. Clients that accept it get a precompressed variant.
+    Blocks while hashing a file the first time, so call it from a thread.
+    """
+    stat_result = stat_result or path.stat()
+    digest = _file_digest(str(path), stat_result.st_mtime_ns, stat_result.st_size)
+    response_headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding", **(headers or {})}
+
+    encoding, variant = _select_variant(path, stat_result, request_headers)
+    if encoding is None:
+        response_headers["ETag"] = f'"{digest}"'
+        response = FileResponse(path, headers=response_headers, stat_result=stat_result)
+    else:
+        variant_path, variant_stat = variant
+        # Each representation needs its own ETag.
+        response_headers["ETag"] = f'"{digest}-{encoding}"'
+        response_headers["Content-Encoding"] = encoding
+        response = FileResponse(
+            variant_path,
+            headers=response_headers,
+            # Media type of the original, not of the .gz/.br/.zst file.
+            media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+            stat_result=variant_stat,
+        )
+
+    if _is_not_modified(response.headers, request_headers):
+        return NotModifiedResponse(response.headers)
+    return response
+
+class MediaStaticFiles(StaticFiles):
+    """StaticFiles that serves regular files through media_response."""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] in ("GET", "HEAD"):
+            try:
+                full_path, stat_result = await run_in_threadpool(self.lookup_path, path)
+            except (OSError, ValueError):
+                # Let StaticFiles turn these into the proper error responses.
+                full_path, stat_result = None, None
+            if stat_result and stat.S_ISREG(stat_result.st_mode):
+                return await run_in_threadpool(
+                    media_response, Path(full_path), Headers(scope=scope), stat_result=stat_result
+                )
+        return await super().get_response(path, scope)
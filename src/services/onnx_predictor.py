@@ -0,0 +1,63 @@
+import logging
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+# Optional: only needed for SHARP_BACKEND=onnx.
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+LOGGER = logging.getLogger(__name__)
+
+class OnnxPredictor:
+    """
+    Runs a predictor graph written by `sharp export --format onnx` with ONNX Runtime.
+
+    Takes and returns numpy arrays; the graph maps (image, disparity_factor) to the
+    Gaussians in NDC space in the order of Gaussians3D. Graphs are exported for a fixed
+    batch size, so larger batches run in several calls and smaller ones are padded.
+    """
+
+    def __init__(self, path: Path, device: str = "cpu"):
+        if onnxruntime is None:
+            raise RuntimeError("onnxruntime is not installed.")
+        if not path.exists():
+            raise FileNotFoundError(f"ONNX model not found at {path}. Create it with `sharp export -o {path}`.")
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        providers = ["CPUExecutionProvider"]
+        if device == "cuda" and "CUDAExecutionProvider" in onnxruntime.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+        self.session = onnxruntime.InferenceSession(str(path), options, providers=providers)
+        self.input_names = [graph_input.name for graph_input in self.session.get_inputs()]
+        self.output_names = [output.name for output in self.session.get_outputs()]
+
+        batch_size = self.session.get_inputs()[0].shape[0]
+        # Symbolic dimensions are strings; such graphs take any batch size.
+        self.batch_size = batch_size if isinstance(batch_size, int) else None
+        LOGGER.info(f"Loaded ONNX model {path.name} with {self.session.get_providers()[0]}")
+
+    def __call__(self, images: np.ndarray, disparity_factors: np.ndarray) -> Tuple[np.ndarray, ...]:
+        num_images = len(images)
+        chunk_size = self.batch_size or num_images
+        chunks = []
+        for start in range(0, num_images, chunk_size):
+            image_chunk = images[start : start + chunk_size]
+            factor_chunk = disparity_factors[start : start + chunk_size]
+            padding = chunk_size - len(image_chunk)
+            if padding:
+                image_chunk = np.concatenate([image_chunk, np.repeat(image_chunk[-1:], padding, axis=0)])
+                factor_chunk = np.concatenate([factor_chunk, np.repeat(factor_chunk[-1:], padding, axis=0)])
+            outputs = self.session.run(
+                self.output_names,
+                {
+                    self.input_names[0]: np.ascontiguousarray(image_chunk, dtype=np.float32),
+                    self.input_names[1]: np.ascontiguousarray(factor_chunk, dtype=np.float32),
+                },
+            )
+            chunks.append([output[: chunk_size - padding] for output in outputs])
+        return tuple(np.concatenate(parts) for parts in zip(*chunks))
@@ -0,0 +1,41 @@
+import struct
+from pathlib import Path
+
+# Layout of the .ksplat header written by sharp.utils.ksplat.
+KSPLAT_HEADER_SIZE = 4096
+KSPLAT_SECTION_HEADER_SIZE = 1024
+
+def lod_path(path: Path, level: int) -> Path:
+    """
+    Path of a level-of-detail scene next to the full one, e.g. `<id>.ply` ->
+    `<id>_lod1.ply`. Level 0 is the full scene itself.
+    """
+    if level == 0:
+        return path
+    return path.with_name(f"{path.stem}_lod{level}{path.suffix}")
+
+def ksplat_chunks(path: Path):
+    """
+    Byte ranges (first, last; inclusive like HTTP Range) of the sections of a .ksplat
+    file. The first range also covers the file headers, so fetching the ranges in
+    order yields a loadable prefix after every chunk. Returns [] if the file is not a
+    .ksplat with a complete header.
+    """
+    with open(path, "rb") as file:
+        header = file.read(KSPLAT_HEADER_SIZE)
+        if len(header) < KSPLAT_HEADER_SIZE:
+            return []
+        section_count = struct.unpack_from("<I", header, 8)[0]
+        section_headers = file.read(section_count * KSPLAT_SECTION_HEADER_SIZE)
+        if len(section_headers) < section_count * KSPLAT_SECTION_HEADER_SIZE:
+            return []
+
+    chunks = []
+    start = 0
+    end = KSPLAT_HEADER_SIZE + section_count * KSPLAT_SECTION_HEADER_SIZE
+    for i in range(section_count):
+        # Bytes of bucket and splat data of the section.
+        end += struct.unpack_from("<I", section_headers, i * KSPLAT_SECTION_HEADER_SIZE + 28)[0]
+        chunks.append((start, end - 1))
+        start = end
+    return chunks
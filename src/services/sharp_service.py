@@ -2,9 +2,14 @@ import sys
 import os
 import requests
 from pathlib import Path
+from typing import Callable, List, Optional, Tuple
 import logging
+import threading
+import time
 
 from src.core.config import settings
+from src.services.onnx_predictor import OnnxPredictor, onnxruntime
+from src.services.scene_files import lod_path
 
 LOGGER = logging.getLogger(__name__)
 
@@ -19,9 +24,10 @@ try:
     if str(sharp_src) not in sys.path:
         sys.path.append(str(sharp_src))
 
-    from sharp.models import PredictorParams, create_predictor
     from sharp.utils import io
-    from sharp.utils.gaussians import unproject_gaussians, save_ply
+    from sharp.utils.gaussians import Gaussians3D, prune_gaussians, simplify_gaussians, sort_gaussians_spatially, unproject_gaussians, save_ksplat, save_ply
+    from sharp.utils.compilation import compile_predictor
+    from sharp.utils.precision import autocast, check_precision
     
     ML_AVAILABLE = True
 except ImportError:
@@ -30,18 +36,52 @@ except ImportError:
     # Define dummy placeholders if needed, though we will guard usage
     torch = None
 
+# The torch backend builds the predictor with timm; the ONNX backend only needs
+# onnxruntime and the torch post-processing above, e.g. in lite containers.
+try:
+    from sharp.models import PredictorParams, create_predictor
+    from sharp.utils.quantization import quantize_encoders
+except ImportError:
+    create_predictor = None
+
+BACKENDS = ("torch", "onnx")
+
+# Stages reported to progress callbacks, in order. The ONNX backend reports its single
+# forward pass as "inference" instead of "monodepth" and "gaussian_decoder".
+STAGES = ("load", "preprocess", "inference", "monodepth", "gaussian_decoder", "unproject", "prune", "sort", "save_ply", "save_ksplat", "lod")
+
+# progress(stage, seconds, index[, details]) - index is None for stages shared by the
+# whole batch, details is an optional dict of stage statistics
+ProgressCallback = Callable[..., None]
+
 class SharpService:
     MODEL_URL = "https://ml-site.cdn-apple.com/models/sharp/sharp_2572gikvuh.pt"
 
     def __init__(self):
-        self.available = ML_AVAILABLE
+        self.backend = settings.SHARP_BACKEND
+        self.available = ML_AVAILABLE and self._backend_available()
+        self._load_lock = threading.Lock()
         if self.available:
             self.device = self._get_device()
             self.model = None
             self.internal_shape = (1536, 1536)
+            self.precision = self._get_precision()
         else:
             self.device = None
             self.model = None
+            self.precision = None
+
+    def _backend_available(self):
+        if self.backend not in BACKENDS:
+            LOGGER.warning(f"Unknown SHARP_BACKEND {self.backend!r}, expected one of {', '.join(BACKENDS)}.")
+            return False
+        if self.backend == "onnx" and onnxruntime is None:
+            LOGGER.warning("SHARP_BACKEND=onnx but onnxruntime is not installed. ML features will be disabled.")
+            return False
+        if self.backend == "torch" and create_predictor is None:
+            LOGGER.warning("Sharp model dependencies (timm) not found. ML features will be disabled.")
+            return False
+        return True
 
     def _get_device(self):
         if not self.available:
@@ -52,6 +92,21 @@ class SharpService:
              return "mps"
         return "cpu"
 
+    def _get_precision(self):
+        # A precision the device cannot run must not keep the API from starting.
+        try:
+            return check_precision(settings.SHARP_PRECISION, self.device)
+        except ValueError as e:
+            LOGGER.warning(f"{e} Falling back to fp32.")
+            return "fp32"
+
+    def _quantize(self, model):
+        # Quantized linear layers only have CPU kernels and do not run under autocast.
+        if self.device != "cpu" or self.precision != "fp32":
+            LOGGER.warning(f"SHARP_QUANTIZE needs the cpu device in fp32, not {self.device} in {self.precision}. Skipping.")
+            return
+        quantize_encoders(model)
+
     def _download_model(self, target_path: Path):
         LOGGER.info(f"Downloading Sharp model weights from {self.MODEL_URL}...")
         target_path.parent.mkdir(parents=True, exist_ok=True)
@@ -78,54 +133,106 @@ class SharpService:
         if self.model is not None:
             return
 
-        checkpoint_path = settings.SHARP_WEIGHTS_PATH
-        
-        # Auto-download if missing
-        if not checkpoint_path.exists():
-            LOGGER.warning(f"Sharp model weights not found at {checkpoint_path}. Attempting download...")
-            self._download_model(checkpoint_path)
+        # Concurrent first callers must not load the checkpoint twice.
+        with self._load_lock:
+            if self.model is not None:
+                return
 
-        LOGGER.info(f"Loading Sharp model from {checkpoint_path} on {self.device}")
-        
-        # Load state dict
-        if self.device == "cuda":
-            state_dict = torch.load(checkpoint_path)
-        else:
-            state_dict = torch.load(checkpoint_path, map_location=self.device)
+            if self.backend == "onnx":
+                LOGGER.info(f"Loading Sharp ONNX model from {settings.SHARP_ONNX_PATH}")
+                self.model = OnnxPredictor(settings.SHARP_ONNX_PATH, self.device)
+                return
+
+            checkpoint_path = settings.SHARP_WEIGHTS_PATH
+            
+            # Auto-download if missing
+            if not checkpoint_path.exists():
+                LOGGER.warning(f"Sharp model weights not found at {checkpoint_path}. Attempting download...")
+                self._download_model(checkpoint_path)
+
+            LOGGER.info(f"Loading Sharp model from {checkpoint_path} on {self.device} ({self.precision})")
             
-        self.model = create_predictor(PredictorParams())
-        self.model.load_state_dict(state_dict)
-        self.model.eval()
-        self.model.to(self.device)
+            # Load state dict
+            if self.device == "cuda":
+                state_dict = torch.load(checkpoint_path)
+            else:
+                state_dict = torch.load(checkpoint_path, map_location=self.device)
+                
+            model = create_predictor(PredictorParams())
+            model.load_state_dict(state_dict)
+            model.eval()
+            model.to(self.device)
+            if settings.SHARP_QUANTIZE:
+                self._quantize(model)
+            if settings.SHARP_COMPILE:
+                compile_predictor(model, cache_dir=settings.SHARP_COMPILE_CACHE_DIR, mode=settings.SHARP_COMPILE_MODE)
+            # Only publish the model once it is fully loaded.
+            self.model = model
+
+    def warmup(self, batch_size: int = 1):
+        """
+        Runs a dummy forward pass and unprojection so the first real image does not pay
+        for kernel selection, lazy initialization and allocator growth.
+        """
+        if not self.available:
+            return
+        if self.model is None:
+            self.load_model()
+
+        LOGGER.info(f"Warming up Sharp model with a batch of {batch_size}...")
+        started = time.perf_counter()
+        with torch.no_grad():
+            images = torch.zeros(batch_size, 3, self.internal_shape[1], self.internal_shape[0], device=self.device)
+            disparity_factors = torch.ones(batch_size, device=self.device)
+            gaussians_ndc = self._predict(images, disparity_factors)
+            f_px = float(self.internal_shape[0])
+            self._unproject(Gaussians3D(*(tensor[:1] for tensor in gaussians_ndc)), f_px, self.internal_shape)
+        self._synchronize()
+        LOGGER.info(f"Warm-up done in {time.perf_counter() - started:.1f}s.")
 
-    def process_image(self, input_path: Path, output_ply_path: Path):
+    def process_image(self, input_path: Path, output_ply_path: Path, progress: Optional[ProgressCallback] = None):
         """
         Runs the Sharp model inference on the input image and saves the PLY.
         """
+        self.process_images([(input_path, output_ply_path)], progress)
+
+    def process_images(self, items: List[Tuple[Path, Path]], progress: Optional[ProgressCallback] = None):
+        """
+        Runs the Sharp model inference on several images in a single batched forward
+        pass and saves one PLY per image. `items` is a list of (input_path, output_ply_path).
+
+        If given, `progress(stage, seconds, index[, details])` is called after each of the
+        STAGES finishes; `index` is the position in `items`, or None for stages shared by
+        the batch, and `details` is a dict of statistics for the prune and lod stages.
+        """
         if not self.available:
             LOGGER.error("Process image requested but ML is not available.")
             raise RuntimeError("ML features are not installed in this environment.")
 
         with torch.no_grad():
-            self._process_image_internal(input_path, output_ply_path)
+            self._process_images_internal(items, progress or (lambda *args: None))
 
-    def _process_image_internal(self, input_path: Path, output_ply_path: Path):
-        if self.model is None:
-            self.load_model()
-            
+    def _synchronize(self):
+        # CUDA kernels run asynchronously; wait for them so stage timings are accurate.
+        if self.device == "cuda":
+            torch.cuda.synchronize()
+
+    def _load(self, input_path: Path):
         LOGGER.info(f"Processing image: {input_path}")
-        
+
         # 1. Load Image
         # sharp.utils.io.load_rgb returns (image, original_image, f_px)
         # image is numpy array (H, W, 3) uint8
         image, _, f_px = io.load_rgb(input_path)
+        return image, f_px
+
+    def _preprocess(self, image, f_px: float):
         height, width = image.shape[:2]
-        
+
         # 2. Preprocess
         # Convert to tensor, normalize to [0, 1], permute to (C, H, W)
         image_pt = torch.from_numpy(image.copy()).float().to(self.device).permute(2, 0, 1) / 255.0
-        _, h, w = image_pt.shape # should match height, width
-        
+
         disparity_factor = torch.tensor([f_px / width]).float().to(self.device)
 
         image_resized_pt = F.interpolate(
@@ -134,13 +241,10 @@ class SharpService:
             mode="bilinear",
             align_corners=True,
         )
+        return image_resized_pt, disparity_factor, f_px, (height, width)
 
-        # 3. Inference
-        LOGGER.info("Running inference...")
-        gaussians_ndc = self.model(image_resized_pt, disparity_factor)
-
-        # 4. Post-processing
-        LOGGER.info("Running postprocessing...")
+    def _unproject(self, gaussians_ndc, f_px: float, image_shape: Tuple[int, int]):
+        height, width = image_shape
         intrinsics = (
             torch.tensor(
                 [
@@ -159,14 +263,142 @@ class SharpService:
         intrinsics_resized[1] *= self.internal_shape[1] / height
 
         # Convert Gaussians to metrics space
-        gaussians = unproject_gaussians(
+        return unproject_gaussians(
             gaussians_ndc, torch.eye(4).to(self.device), intrinsics_resized, self.internal_shape
         )
-        
+
+    def _prune(self, gaussians, f_px: float):
+        gaussians, stats = prune_gaussians(
+            gaussians,
+            f_px,
+            min_opacity=settings.PRUNE_MIN_OPACITY,
+            min_projected_size=settings.PRUNE_MIN_PROJECTED_SIZE,
+            merge_depth_tolerance=settings.PRUNE_MERGE_DEPTH_TOLERANCE,
+        )
+        dropped = stats.num_input - stats.num_output
+        LOGGER.info(
+            f"Pruned {dropped} of {stats.num_input} Gaussians "
+            f"({stats.num_merged} merged, {stats.num_low_opacity} transparent, {stats.num_too_small} too small)"
+        )
+        return gaussians, {
+            "input": stats.num_input,
+            "output": stats.num_output,
+            "merged": stats.num_merged,
+            "low_opacity": stats.num_low_opacity,
+            "too_small": stats.num_too_small,
+        }
+
+    def _save(self, gaussians, f_px: float, image_shape: Tuple[int, int], output_ply_path: Path):
         # 5. Save PLY
         output_ply_path.parent.mkdir(parents=True, exist_ok=True)
         LOGGER.info(f"Saving PLY to {output_ply_path}")
-        save_ply(gaussians, f_px, (height, width), output_ply_path)
+        save_ply(gaussians, f_px, image_shape, output_ply_path)
+
+    def _save_ksplat(self, gaussians, output_ply_path: Path):
+        # Compressed copy for the viewer, about 2.3x smaller than the PLY
+        output_ksplat_path = output_ply_path.with_suffix(".ksplat")
+        LOGGER.info(f"Saving KSPLAT to {output_ksplat_path}")
+        save_ksplat(gaussians, output_ksplat_path)
+
+    def _save_lods(self, gaussians, f_px: float, image_shape: Tuple[int, int], output_ply_path: Path):
+        """Saves a simplified copy of the scene for every level in LOD_FRACTIONS."""
+        counts = []
+        for level, fraction in enumerate(settings.LOD_FRACTIONS, start=1):
+            simplified = simplify_gaussians(gaussians, fraction)
+            level_ply_path = lod_path(output_ply_path, level)
+            LOGGER.info(f"Saving LOD {level} ({simplified.opacities.shape[1]} Gaussians) to {level_ply_path}")
+            save_ply(simplified, f_px, image_shape, level_ply_path)
+            if settings.EXPORT_KSPLAT:
+                save_ksplat(simplified, level_ply_path.with_suffix(".ksplat"))
+            counts.append(simplified.opacities.shape[1])
+        return {"levels": [gaussians.opacities.shape[1]] + counts}
+
+    def _predict(self, images, disparity_factors):
+        """Runs the predictor on a batch and returns the Gaussians in NDC space."""
+        if self.backend == "onnx":
+            outputs = self.model(images.cpu().numpy(), disparity_factors.cpu().numpy())
+            return Gaussians3D(*(torch.from_numpy(output).to(self.device) for output in outputs))
+        with autocast(self.device, self.precision):
+            return self.model(images, disparity_factors)
+
+    def _process_images_internal(self, items: List[Tuple[Path, Path]], progress: ProgressCallback):
+        if self.model is None:
+            self.load_model()
+
+        inputs = []
+        for i, (input_path, _) in enumerate(items):
+            started = time.perf_counter()
+            image, f_px = self._load(input_path)
+            progress("load", time.perf_counter() - started, i)
+
+            started = time.perf_counter()
+            inputs.append(self._preprocess(image, f_px))
+            self._synchronize()
+            progress("preprocess", time.perf_counter() - started, i)
+
+        # 3. Inference
+        # All images are resized to internal_shape, so they stack into one batch and
+        # the predictor runs the ViT pyramid for every image in a single forward pass.
+        LOGGER.info(f"Running inference on a batch of {len(inputs)}...")
+        images = torch.cat([image for image, _, _, _ in inputs], dim=0)
+        disparity_factors = torch.cat([factor for _, factor, _, _ in inputs], dim=0)
+
+        if self.backend == "onnx":
+            started = time.perf_counter()
+            gaussians_ndc = self._predict(images, disparity_factors)
+            progress("inference", time.perf_counter() - started, None)
+        else:
+            # The forward pass is split into the monodepth stage and the gaussian decoder
+            # stage (feature model, head and composer) with a hook on the monodepth model.
+            stage_started = [time.perf_counter()]
+
+            def _on_monodepth_done(module, args, output):
+                self._synchronize()
+                progress("monodepth", time.perf_counter() - stage_started[0], None)
+                stage_started[0] = time.perf_counter()
+
+            hook = self.model.monodepth_model.register_forward_hook(_on_monodepth_done)
+            try:
+                gaussians_ndc = self._predict(images, disparity_factors)
+            finally:
+                hook.remove()
+            self._synchronize()
+            progress("gaussian_decoder", time.perf_counter() - stage_started[0], None)
+
+        # 4. Post-processing
+        # Intrinsics differ per image, so each scene is unprojected and saved on its own.
+        LOGGER.info("Running postprocessing...")
+        for i, ((_, _, f_px, image_shape), (_, output_ply_path)) in enumerate(zip(inputs, items)):
+            started = time.perf_counter()
+            gaussians_ndc_i = Gaussians3D(*(tensor[i : i + 1] for tensor in gaussians_ndc))
+            gaussians = self._unproject(gaussians_ndc_i, f_px, image_shape)
+            self._synchronize()
+            progress("unproject", time.perf_counter() - started, i)
+
+            started = time.perf_counter()
+            gaussians, prune_stats = self._prune(gaussians, f_px)
+            self._synchronize()
+            progress("prune", time.perf_counter() - started, i, prune_stats)
+
+            if settings.SPATIAL_SORT:
+                started = time.perf_counter()
+                gaussians = sort_gaussians_spatially(gaussians)
+                self._synchronize()
+                progress("sort", time.perf_counter() - started, i)
+
+            started = time.perf_counter()
+            self._save(gaussians, f_px, image_shape, output_ply_path)
+            progress("save_ply", time.perf_counter() - started, i)
+
+            if settings.EXPORT_KSPLAT:
+                started = time.perf_counter()
+                self._save_ksplat(gaussians, output_ply_path)
+                progress("save_ksplat", time.perf_counter() - started, i)
+
+            if settings.LOD_FRACTIONS:
+                started = time.perf_counter()
+                lod_stats = self._save_lods(gaussians, f_px, image_shape, output_ply_path)
+                progress("lod", time.perf_counter() - started, i, lod_stats)
         LOGGER.info("Done.")
 
 # Singleton instance
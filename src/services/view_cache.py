@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from src.core.config import settings
+
+class ViewConfigCache:
+    """
+    Bounded LRU cache of resolved view configs keyed by (wallpaper_id, user).
+
+    Values are what GET /api/view/{wallpaper_id} returns, including the fallback to
+    the "default" user's config, so a hit costs no query at all. Entries expire after
+    `ttl` seconds, which bounds staleness if the database is changed by another API
+    process; saves in this process invalidate right away. A size of 0 disables caching.
+
+    Every invalidation bumps a generation counter and records it for the wallpaper.
+    Readers take the generation before querying and pass it to `put`, which drops
+    configs of wallpapers invalidated since, as they may have been read before a save.
+    Those records are kept in an LRU of the same size as the entries; once a record is
+    evicted, its wallpaper is treated as invalidated at the newest evicted generation.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, dict]]" = OrderedDict()
+        self._generation = 0
+        # Generation at which each recently invalidated wallpaper was last invalidated.
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        # Newest generation evicted from _invalidated, a bound for the wallpapers not in it.
+        self._evicted_generation = 0
+        # The view handlers run on the event loop, but the sync health endpoint reads the
+        # stats from the threadpool.
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, wallpaper_id: str, user: str) -> Optional[dict]:
+        key = (wallpaper_id, user)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def put(self, wallpaper_id: str, user: str, config: dict, generation: Optional[int] = None):
+        """
+        Caches a resolved config. With `generation`, the config is dropped if the
+        wallpaper was invalidated since, as it may have been read before the save.
+        """
+        if self.maxsize <= 0:
+            return
+        key = (wallpaper_id, user)
+        with self._lock:
+            invalidated = self._invalidated.get(wallpaper_id, self._evicted_generation)
+            if generation is not None and invalidated > generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, config)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, wallpaper_id: str):
+        """
+        Drops every user's entry of a wallpaper: saving the "default" config changes
+        what all users without their own config resolve to.
+        """
+        with self._lock:
+            self._generation += 1
+            self._invalidated[wallpaper_id] = self._generation
+            self._invalidated.move_to_end(wallpaper_id)
+            while len(self._invalidated) > max(self.maxsize, 1):
+                _, self._evicted_generation = self._invalidated.popitem(last=False)
+            for key in [key for key in self._entries if key[0] == wallpaper_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+# Singleton instance
+view_config_cache = ViewConfigCache(settings.VIEW_CONFIG_CACHE_SIZE, settings.VIEW_CONFIG_CACHE_TTL)
@@ -0,0 +1,347 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy.sql import func
+
+from src.core.config import settings
+from src.database import SessionLocal, Wallpaper, WorkerState, init_db
+from src.services.job_queue import (
+    claim_jobs, complete_job, fail_job, live_worker_ids, record_stage, requeue_interrupted_jobs,
+)
+from src.services.media import precompress_files
+from src.services.scene_files import lod_path
+
+LOGGER = logging.getLogger(__name__)
+
+def _to_absolute(path_str: str) -> Path:
+    path = Path(path_str)
+    return path if path.is_absolute() else settings.BASE_DIR / path
+
+def _to_relative(path: Path) -> str:
+    # Store relative path so it works in docker/static mounts
+    try:
+        return str(path.relative_to(settings.BASE_DIR))
+    except ValueError:
+        return str(path)
+
+def _output_path(wp: Wallpaper) -> Path:
+    return settings.GENERATED_DIR / f"{wp.id}.ply"
+
+def process_jobs(db, jobs, service):
+    """Runs inference for the claimed jobs in one batched forward pass."""
+    wallpapers = []
+    for job in jobs:
+        wp = db.query(Wallpaper).filter(Wallpaper.id == job.wallpaper_id).first()
+        if wp is None:
+            raise RuntimeError(f"Wallpaper {job.wallpaper_id} no longer exists")
+        wallpapers.append(wp)
+        job.stage = None
+        job.stage_timings = None
+    db.commit()
+
+    def _progress(stage, seconds, index, details=None):
+        # Stages shared by the batch (index None) are recorded on every job.
+        for job in (jobs if index is None else [jobs[index]]):
+            record_stage(db, job, stage, seconds, details)
+        db.commit()
+
+    # Run sharp inference
+    service.process_images(
+        [(_to_absolute(wp.upload_path), _output_path(wp)) for wp in wallpapers],
+        progress=_progress,
+    )
+
+    for wp, job in zip(wallpapers, jobs):
+        levels = _scene_levels(_output_path(wp))
+        if not levels:
+            raise RuntimeError(f"Sharp did not write {_output_path(wp)}")
+        wp.ply_path = levels[0]["ply_path"]
+        wp.splat_path = levels[0]["splat_path"]
+        wp.lod_levels = json.dumps(levels)
+
+        if settings.PRECOMPRESS_MEDIA:
+            started = time.perf_counter()
+            precompress_files(
+                _to_absolute(level[key])
+                for level in levels for key in ("ply_path", "splat_path") if level[key]
+            )
+            record_stage(db, job, "compress", time.perf_counter() - started)
+        complete_job(db, job)
+
+def _scene_levels(ply_path: Path):
+    """Describes the full scene and every level of detail the service wrote next to it."""
+    levels = []
+    for level in range(len(settings.LOD_FRACTIONS) + 1):
+        level_ply_path = lod_path(ply_path, level)
+        if not level_ply_path.exists():
+            continue
+        splat_path = level_ply_path.with_suffix(".ksplat")
+        levels.append({
+            "level": level,
+            "ply_path": _to_relative(level_ply_path),
+            "splat_path": _to_relative(splat_path) if splat_path.exists() else None,
+        })
+    return levels
+
+def _claim_batch(db, worker_id: str, stop_event):
+    """
+    Claims a batch of jobs. Once the first job is in hand, keeps collecting pending jobs
+    for up to INFERENCE_BATCH_WAIT seconds so a burst of uploads shares one forward pass.
+    """
+    batch_size = max(settings.INFERENCE_BATCH_SIZE, 1)
+    jobs = claim_jobs(db, worker_id, limit=batch_size)
+    if not jobs:
+        return jobs
+
+    deadline = time.monotonic() + settings.INFERENCE_BATCH_WAIT
+    while len(jobs) < batch_size and not stop_event.is_set():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        stop_event.wait(min(remaining, 0.05))
+        jobs += claim_jobs(db, worker_id, limit=batch_size - len(jobs))
+    return jobs
+
+def _report_state(worker_id: str, state: str, device: str = None):
+    db = SessionLocal()
+    try:
+        worker = db.query(WorkerState).filter(WorkerState.id == worker_id).first()
+        if worker is None:
+            worker = WorkerState(id=worker_id, pid=os.getpid())
+            db.add(worker)
+        worker.state = state
+        if device is not None:
+            worker.device = device
+        worker.heartbeat_at = func.now()
+        db.commit()
+    finally:
+        db.close()
+
+def _heartbeat(worker_id: str, stop_event):
+    # Runs in a thread so heartbeats continue during long inference runs.
+    while not stop_event.wait(settings.WORKER_HEARTBEAT_INTERVAL):
+        db = SessionLocal()
+        try:
+            db.query(WorkerState).filter(WorkerState.id == worker_id).update(
+                {WorkerState.heartbeat_at: func.now()}
+            )
+            db.commit()
+        except Exception as e:
+            LOGGER.warning(f"Worker {worker_id} heartbeat failed: {e}")
+        finally:
+            db.close()
+
+def _prepare_model(worker_id: str, service):
+    """Preloads and warms up the model so the first upload does not pay for it."""
+    if not service.available:
+        _report_state(worker_id, "disabled")
+        return
+
+    device = str(service.device)
+    if settings.PRELOAD_MODEL:
+        try:
+            _report_state(worker_id, "loading", device)
+            service.load_model()
+            if settings.WARMUP_MODEL:
+                _report_state(worker_id, "warming_up", device)
+                service.warmup(batch_size=max(settings.INFERENCE_BATCH_SIZE, 1))
+        except Exception as e:
+            # Not fatal: the model is loaded lazily again on the first job.
+            LOGGER.exception(f"Worker {worker_id} failed to preload the model: {e}")
+    _report_state(worker_id, "ready", device)
+
+def run_worker(worker_id: str, stop_event=None):
+    """
+    Worker loop: claims pending jobs in micro-batches and runs Sharp inference on them.
+    Runs in its own process, so the model lives here and never in the API process.
+    """
+    logging.basicConfig(level=logging.INFO)
+    # Imported here so that only worker processes pay for torch / sharp.
+    from src.services.sharp_service import sharp_service
+
+    if stop_event is None:
+        stop_event = threading.Event()
+
+    LOGGER.info(f"Worker {worker_id} started (pid {os.getpid()})")
+    _report_state(worker_id, "starting")
+    heartbeat_stop = threading.Event()
+    threading.Thread(target=_heartbeat, args=(worker_id, heartbeat_stop), daemon=True).start()
+    try:
+        _prepare_model(worker_id, sharp_service)
+        _work(worker_id, stop_event, sharp_service)
+    finally:
+        heartbeat_stop.set()
+        _report_state(worker_id, "stopped")
+    LOGGER.info(f"Worker {worker_id} stopped")
+
+def _work(worker_id: str, stop_event, sharp_service):
+    while not stop_event.is_set():
+        db = SessionLocal()
+        try:
+            jobs = _claim_batch(db, worker_id, stop_event)
+            if not jobs:
+                stop_event.wait(settings.JOB_POLL_INTERVAL)
+                continue
+
+            LOGGER.info(f"Worker {worker_id} processing jobs {[job.id for job in jobs]}")
+            try:
+                process_jobs(db, jobs, sharp_service)
+            except Exception as e:
+                db.rollback()
+                if len(jobs) == 1:
+                    LOGGER.exception(f"Error processing wallpaper {jobs[0].wallpaper_id}: {e}")
+                    fail_job(db, jobs[0], str(e))
+                    continue
+
+                # Retry one by one so a single bad image does not fail the whole batch.
+                LOGGER.warning(f"Batch of {len(jobs)} failed ({e}), retrying jobs individually.")
+                for job in jobs:
+                    try:
+                        process_jobs(db, [job], sharp_service)
+                    except Exception as e:
+                        LOGGER.exception(f"Error processing wallpaper {job.wallpaper_id}: {e}")
+                        db.rollback()
+                        fail_job(db, job, str(e))
+        finally:
+            db.close()
+
+def _mark_stopped(worker_id: str):
+    # Releases the worker's jobs right away instead of after its heartbeat times out.
+    db = SessionLocal()
+    try:
+        db.query(WorkerState).filter(WorkerState.id == worker_id).update({WorkerState.state: "stopped"})
+        db.commit()
+    finally:
+        db.close()
+
+def _reclaim_jobs():
+    """Requeues jobs of workers that are gone and forgets those workers."""
+    db = SessionLocal()
+    try:
+        requeue_interrupted_jobs(db)
+        # Ids are never reused, so rows of stopped or dead workers would pile up.
+        db.query(WorkerState).filter(WorkerState.id.not_in(live_worker_ids())).delete(
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+class WorkerPool:
+    """
+    Spawns and supervises a set of inference worker processes.
+
+    Several pools can share the database (one per API process and per
+    `python -m src.worker`), so a pool only ever takes over jobs whose worker stopped
+    sending heartbeats. Workers that die (e.g. killed for running out of memory) are
+    respawned and their jobs go back into the queue.
+    """
+
+    # Seconds between checks for dead worker processes.
+    SUPERVISE_INTERVAL = 1.0
+    # A slot whose worker keeps dying is respawned at most this often.
+    RESPAWN_DELAY = 5.0
+
+    def __init__(self, num_processes: int):
+        self.num_processes = num_processes
+        # "spawn" keeps CUDA and the SQLite connection pool out of forked children.
+        self._ctx = multiprocessing.get_context("spawn")
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        # One (worker_id, process, stop_event, started_at) entry per slot. Each worker
+        # gets its own event: setting an event a killed process was waiting on blocks.
+        self._workers = []
+        self._supervisor = None
+
+    def _spawn(self):
+        # Unique per incarnation: a restarted container reuses PIDs, and taking over the
+        # id of a killed worker would keep its lease (and its RUNNING job) alive forever.
+        worker_id = f"worker-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        stop_event = self._ctx.Event()
+        process = self._ctx.Process(
+            target=run_worker,
+            args=(worker_id, stop_event),
+            name=f"animaflow-{worker_id}",
+            daemon=True,
+        )
+        process.start()
+        return worker_id, process, stop_event, time.monotonic()
+
+    def start(self):
+        _reclaim_jobs()
+        with self._lock:
+            self._workers = [self._spawn() for _ in range(self.num_processes)]
+        self._supervisor = threading.Thread(target=self._supervise, name="animaflow-supervisor", daemon=True)
+        self._supervisor.start()
+
+    def _supervise(self):
+        last_reclaim = time.monotonic()
+        while not self._stopping.wait(self.SUPERVISE_INTERVAL):
+            try:
+                self.check_workers()
+                # Workers of other pools can die too; their leases expire with their heartbeats.
+                if time.monotonic() - last_reclaim >= settings.WORKER_HEARTBEAT_INTERVAL:
+                    _reclaim_jobs()
+                    last_reclaim = time.monotonic()
+            except Exception as e:
+                LOGGER.warning(f"Supervising workers failed: {e}")
+
+    def check_workers(self):
+        """Respawns dead workers after putting their jobs back into the queue."""
+        with self._lock:
+            for slot, (worker_id, process, _, started_at) in enumerate(self._workers):
+                if self._stopping.is_set() or process.is_alive():
+                    continue
+                if time.monotonic() - started_at < self.RESPAWN_DELAY:
+                    continue
+                LOGGER.warning(f"Worker {worker_id} died (exit code {process.exitcode}), respawning.")
+                _mark_stopped(worker_id)
+                _reclaim_jobs()
+                self._workers[slot] = self._spawn()
+
+    def stop(self, timeout: float = 10.0):
+        self._stopping.set()
+        if self._supervisor is not None:
+            self._supervisor.join()
+        with self._lock:
+            for _, process, stop_event, _ in self._workers:
+                if process.is_alive():
+                    stop_event.set()
+            for worker_id, process, _, _ in self._workers:
+                process.join(timeout)
+                if process.is_alive():
+                    LOGGER.warning(f"Worker {worker_id} did not stop in time, terminating.")
+                    process.terminate()
+                    process.join()
+                    # Its jobs are requeued by the next pool that reclaims jobs.
+                    _mark_stopped(worker_id)
+            self._workers = []
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run AnimaFlow inference workers.")
+    parser.add_argument(
+        "-n", "--processes", type=int, default=max(settings.WORKER_PROCESSES, 1),
+        help="Number of worker processes to spawn.",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+
+    pool = WorkerPool(args.processes)
+    pool.start()
+
+    shutdown = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: shutdown.set())
+    signal.signal(signal.SIGINT, lambda *_: shutdown.set())
+    while not shutdown.wait(1.0):
+        pass
+    pool.stop()
@@ -1,5 +1,5 @@
 import * as THREE from 'three';
-import { Viewer } from '@mkkellogg/gaussian-splats-3d';
+import { Viewer, SceneFormat } from '@mkkellogg/gaussian-splats-3d';
 
 // =========================================================================
 // 💎 最终壁纸配置 (全功能版)
@@ -8,6 +8,8 @@ import { Viewer } from '@mkkellogg/gaussian-splats-3d';
 // Parse Query Params
 const urlParams = new URLSearchParams(window.location.search);
 const wpId = urlParams.get('id');
+// Level of detail: 0 is the full scene, higher levels load fewer splats on low-end machines.
+const lodLevel = parseInt(urlParams.get('lod') || '0', 10) || 0;
 const directorMode = urlParams.get('mode') === 'director';
 
 const SETUP_MODE = directorMode; // Enable controls if director mode
@@ -31,28 +33,27 @@ const state = {
     camX: 0, camY: 0
 };
 
-async function getPlyPath() {
-    if (!wpId) return './scene.ply'; // Fallback
+async function getScene() {
+    const fallback = { path: './scene.ply', format: SceneFormat.Ply };
+    if (!wpId) return fallback;
 
     try {
-        const response = await fetch(`/api/upload/${wpId}`);
+        const response = await fetch(`/api/upload/${wpId}?lod=${lodLevel}`);
         if (!response.ok) throw new Error("Metadata fetch failed");
         const data = await response.json();
-        if (data.ply_path) {
-            // Adjust path if needed. Assuming /media mount
-            // DB stores relative path like "data/generated/xxx.ply"
-            // We need "/media/generated/xxx.ply"
-            let path = data.ply_path.replace(/\\/g, '/');
-            if (path.startsWith('data/')) {
-                path = path.replace(/^data\//, '/media/');
-            }
-            console.log("[AnimaFlow] Resolved PLY Path:", path);
-            return path;
+        if (data.splat_path || data.ply_path) {
+            // The scene endpoint serves the compressed .ksplat (about 2.3x smaller) with the
+            // most important splats first, or the PLY for uploaded PLYs and older scenes.
+            // Its URL has no file extension, so the format is passed explicitly.
+            const path = `/api/upload/${wpId}/scene?lod=${data.lod}`;
+            const format = data.splat_path ? SceneFormat.KSplat : SceneFormat.Ply;
+            console.log("[AnimaFlow] Resolved Scene Path:", path);
+            return { path, format };
         }
     } catch (e) {
         console.error("Failed to load wallpaper info, using default.", e);
     }
-    return './scene.ply';
+    return fallback;
 }
 
 async function loadConfig() {
@@ -137,11 +138,16 @@ async function init() {
     // 🛑 性能优化：强制 1.0 像素比，避免在 4K/2K 屏幕下渲染分辨率过高导致掉帧
     viewer.renderer.setPixelRatio(1);
 
-    const plyPath = await getPlyPath();
-    console.log("Loading PLY:", plyPath);
+    const scene = await getScene();
+    console.log("Loading scene:", scene.path);
 
     try {
-        await viewer.addSplatScene(plyPath, {
+        // Progressive loading renders each .ksplat section as it arrives, so the promise
+        // resolves (and the loading screen fades) once the coarse first section is shown.
+        // PLYs are not importance-ordered, so they are still loaded in one go.
+        await viewer.addSplatScene(scene.path, {
+            'format': scene.format,
+            'progressiveLoad': scene.format === SceneFormat.KSplat,
             'showLoadingUI': false,
             'position': [0, 0, 0],
             'rotation': [0, 0, 0, 1],
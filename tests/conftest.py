@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+# Settings are read once at import time, so point the app at a scratch data directory
+# and keep the API from spawning inference workers before anything imports src.*
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="animaflow-test-"))
+os.environ.setdefault("WORKER_PROCESSES", "0")
@@ -0,0 +1,59 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.services import sharp_service as sharp_service_module
+
+if not sharp_service_module.ML_AVAILABLE:
+    pytest.skip("Sharp dependencies are not installed", allow_module_level=True)
+
+from torch import nn
+
+from sharp.utils.compilation import compile_predictor
+
+class _FakePredictor(nn.Module):
+    """Has the submodules compile_predictor compiles, without the DINOv2 weights."""
+
+    def __init__(self):
+        super().__init__()
+        self.monodepth_model = nn.Module()
+        self.monodepth_model.monodepth_predictor = nn.Module()
+        self.monodepth_model.monodepth_predictor.encoder = nn.Conv2d(3, 4, 3, padding=1)
+        self.monodepth_model.monodepth_predictor.decoder = nn.Conv2d(4, 4, 1)
+        self.monodepth_model.monodepth_predictor.head = nn.Conv2d(4, 1, 1)
+        self.feature_model = nn.Conv2d(4, 4, 1)
+        self.prediction_head = nn.Conv2d(4, 14, 1)
+
+    def forward(self, image):
+        monodepth = self.monodepth_model.monodepth_predictor
+        features = monodepth.decoder(monodepth.encoder(image))
+        return monodepth.head(features), self.prediction_head(self.feature_model(features))
+
+def test_compile_predictor_compiles_networks_in_place(tmp_path, monkeypatch):
+    monkeypatch.delenv("TORCHINDUCTOR_CACHE_DIR", raising=False)
+    predictor = _FakePredictor().eval()
+    state_dict_keys = list(predictor.state_dict())
+    image = torch.rand(1, 3, 16, 16)
+    with torch.no_grad():
+        expected = predictor(image)
+
+    # The eager backend checks the wiring without paying for code generation.
+    assert compile_predictor(predictor, cache_dir=tmp_path / "cache", backend="eager") is predictor
+    assert os.environ["TORCHINDUCTOR_CACHE_DIR"] == str(tmp_path / "cache")
+    assert (tmp_path / "cache").is_dir()
+    assert predictor.feature_model._compiled_call_impl is not None
+    assert predictor.monodepth_model.monodepth_predictor.encoder._compiled_call_impl is not None
+    # Checkpoints still load into a compiled predictor.
+    assert list(predictor.state_dict()) == state_dict_keys
+
+    with torch.no_grad():
+        actual = predictor(image)
+    for expected_tensor, actual_tensor in zip(expected, actual):
+        torch.testing.assert_close(actual_tensor, expected_tensor)
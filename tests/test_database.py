@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import IntegrityError
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.main import app
+from src.database import SessionLocal, ViewConfig, Wallpaper, engine, init_db
+
+@pytest.fixture(scope="module", autouse=True)
+def client():
+    # Entering the client runs the lifespan hook, which creates the tables; leaving it
+    # shuts the app (and anything its lifespan started) down again.
+    with TestClient(app) as client:
+        yield client
+
+def test_sqlite_pragmas_are_applied():
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        # synchronous=NORMAL is 1.
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+        assert conn.execute(text("PRAGMA cache_size")).scalar() < 0
+
+def test_view_configs_are_unique_per_wallpaper_and_user(client):
+    indexes = {index["name"]: index for index in inspect(engine).get_indexes("view_configs")}
+    assert indexes["ux_view_configs_wallpaper_user"]["unique"]
+
+    db = SessionLocal()
+    try:
+        db.add(Wallpaper(id="unique-test", filename="u.jpg", upload_path="data/uploads/u.jpg"))
+        db.add(ViewConfig(wallpaper_id="unique-test", user="alice", fov=50.0))
+        db.commit()
+        db.add(ViewConfig(wallpaper_id="unique-test", user="alice", fov=70.0))
+        with pytest.raises(IntegrityError):
+            db.commit()
+        db.rollback()
+    finally:
+        db.close()
+
+    # Saving again updates the existing row.
+    payload = {"wallpaper_id": "unique-test", "user": "alice", "fov": 80.0}
+    assert client.post("/api/view/", json=payload).status_code == 200
+    assert client.get("/api/view/unique-test", params={"user": "alice"}).json()["fov"] == 80.0
+
+def test_init_db_keeps_the_oldest_duplicate_config():
+    # Simulate a database from before the unique index.
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ux_view_configs_wallpaper_user"))
+        conn.execute(text(
+            "INSERT INTO view_configs (wallpaper_id, user, fov) VALUES "
+            "('dedupe-test', 'bob', 40.0), ('dedupe-test', 'bob', 90.0)"
+        ))
+
+    init_db()
+
+    db = SessionLocal()
+    try:
+        configs = db.query(ViewConfig).filter(ViewConfig.wallpaper_id == "dedupe-test").all()
+        assert [config.fov for config in configs] == [40.0]
+    finally:
+        db.close()
+    assert "ux_view_configs_wallpaper_user" in {
+        index["name"] for index in inspect(engine).get_indexes("view_configs")
+    }
@@ -0,0 +1,286 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.services import sharp_service as sharp_service_module
+
+if not sharp_service_module.ML_AVAILABLE:
+    pytest.skip("Sharp dependencies are not installed", allow_module_level=True)
+
+from sharp.utils import gaussians as gaussians_module
+from sharp.utils.gaussians import (
+    Gaussians3D,
+    compose_covariance_matrices,
+    morton_codes,
+    prune_gaussians,
+    simplify_gaussians,
+    sort_gaussians_spatially,
+)
+
+def _gaussians(mean_vectors, singular_values, opacities):
+    num_gaussians = len(mean_vectors)
+    return Gaussians3D(
+        mean_vectors=torch.tensor(mean_vectors)[None],
+        singular_values=torch.tensor(singular_values)[None],
+        quaternions=torch.tensor([1.0, 0.0, 0.0, 0.0]).repeat(1, num_gaussians, 1),
+        colors=torch.linspace(0, 1, 3 * num_gaussians).view(1, num_gaussians, 3),
+        opacities=torch.tensor(opacities)[None],
+    )
+
+def _two_layer_scene():
+    """Four pixels with two layers each, the second layer stacked after the first."""
+    first_depths = [2.0, 2.0, 4.0, 4.0]
+    # Pixels 0 and 2 have a second layer within 1% of the first, 1 and 3 do not.
+    second_depths = [2.01, 3.0, 3.98, 8.0]
+    mean_vectors = [[0.1 * i, 0.0, depth] for i, depth in enumerate(first_depths + second_depths)]
+    # Projected size f_px * scale / depth with f_px = 100: 5, 5, 0.25, 5 px for the
+    # first layer and 0.5, 0.33, 5, 2.5 px for the second one.
+    scales = [0.1, 0.1, 0.01, 0.2, 0.01, 0.01, 0.2, 0.2]
+    singular_values = [[scale, scale / 2, scale / 4] for scale in scales]
+    opacities = [0.9, 0.01, 0.5, 0.8, 0.6, 0.9, 0.02, 0.5]
+    return _gaussians(mean_vectors, singular_values, opacities)
+
+def test_prune_without_thresholds_keeps_everything():
+    gaussians = _two_layer_scene()
+    pruned, stats = prune_gaussians(gaussians, f_px=100.0)
+    assert stats == (8, 0, 0, 0)
+    assert stats.num_output == 8
+    for expected, actual in zip(gaussians, pruned):
+        assert torch.equal(expected, actual)
+
+@pytest.mark.parametrize(
+    "thresholds, expected_stats, expected_kept",
+    [
+        ({"min_opacity": 0.05}, (8, 0, 2, 0), [0, 2, 3, 4, 5, 7]),
+        ({"min_projected_size": 1.0}, (8, 0, 0, 3), [0, 1, 3, 6, 7]),
+        ({"merge_depth_tolerance": 0.01}, (8, 2, 0, 0), [0, 1, 2, 3, 5, 7]),
+        # Steps run in order and each counts only what is left: Gaussian 6 is
+        # transparent but merged into 2 first, which then passes the opacity step
+        # and is dropped as too small.
+        (
+            {"merge_depth_tolerance": 0.01, "min_opacity": 0.05, "min_projected_size": 1.0},
+            (8, 2, 1, 2),
+            [0, 3, 7],
+        ),
+    ],
+)
+def test_prune_counts_each_step(thresholds, expected_stats, expected_kept):
+    gaussians = _two_layer_scene()
+    pruned, stats = prune_gaussians(gaussians, f_px=100.0, **thresholds)
+
+    assert stats == expected_stats
+    assert stats.num_output == len(expected_kept)
+    # The surviving Gaussians keep their order.
+    expected_means = gaussians.mean_vectors[0, expected_kept]
+    if "merge_depth_tolerance" not in thresholds:
+        torch.testing.assert_close(pruned.mean_vectors[0], expected_means)
+    assert torch.equal(pruned.quaternions[0], gaussians.quaternions[0, expected_kept])
+    assert all(tensor.shape[1] == len(expected_kept) for tensor in pruned)
+
+def test_prune_merges_layers_by_opacity():
+    gaussians = _two_layer_scene()
+    pruned, _ = prune_gaussians(gaussians, f_px=100.0, merge_depth_tolerance=0.01)
+
+    alpha_first, alpha_second = 0.9, 0.6
+    weight_first = alpha_first / (alpha_first + alpha_second)
+    weight_second = alpha_second / (alpha_first + alpha_second)
+    expected_mean = weight_first * gaussians.mean_vectors[0, 0] + weight_second * gaussians.mean_vectors[0, 4]
+    expected_color = weight_first * gaussians.colors[0, 0] + weight_second * gaussians.colors[0, 4]
+    torch.testing.assert_close(pruned.mean_vectors[0, 0], expected_mean)
+    torch.testing.assert_close(pruned.colors[0, 0], expected_color)
+    torch.testing.assert_close(pruned.opacities[0, 0], torch.tensor(alpha_first + alpha_second - alpha_first * alpha_second))
+    # The first layer keeps its shape, unmerged Gaussians are unchanged.
+    assert torch.equal(pruned.singular_values[0, 0], gaussians.singular_values[0, 0])
+    assert torch.equal(pruned.mean_vectors[0, 1], gaussians.mean_vectors[0, 1])
+    assert torch.equal(pruned.opacities[0, 1], gaussians.opacities[0, 1])
+
+def test_prune_does_not_modify_its_input():
+    gaussians = _two_layer_scene()
+    copies = [tensor.clone() for tensor in gaussians]
+    prune_gaussians(gaussians, f_px=100.0, min_opacity=0.05, merge_depth_tolerance=0.01)
+    for copy, tensor in zip(copies, gaussians):
+        assert torch.equal(copy, tensor)
+
+def test_prune_rejects_batches():
+    gaussians = Gaussians3D(*(torch.cat([tensor, tensor]) for tensor in _two_layer_scene()))
+    with pytest.raises(ValueError):
+        prune_gaussians(gaussians, f_px=100.0)
+
+def _predicted_scene(height=48, width=64, seed=0):
+    """A scene shaped like predictor output: two layers of Gaussians per pixel."""
+    generator = torch.Generator().manual_seed(seed)
+    ys, xs = torch.meshgrid(torch.linspace(-1, 1, height), torch.linspace(-1, 1, width), indexing="ij")
+    depth = 2.0 + 3.0 * (xs + 1) + 0.05 * torch.rand(height, width, generator=generator)
+    depth = torch.stack([depth, depth + 1.0 + torch.rand(height, width, generator=generator)]).flatten()
+    xy = torch.stack([xs, ys], dim=-1).flatten(0, 1).repeat(2, 1)
+    num_gaussians = len(depth)
+    quaternions = torch.randn(num_gaussians, 4, generator=generator)
+    return Gaussians3D(
+        mean_vectors=torch.cat([xy * depth[:, None], depth[:, None]], dim=-1)[None],
+        singular_values=(0.01 * depth[:, None] * (0.5 + torch.rand(num_gaussians, 3, generator=generator)))[None],
+        quaternions=(quaternions / quaternions.norm(dim=-1, keepdim=True))[None],
+        colors=torch.rand(1, num_gaussians, 3, generator=generator),
+        opacities=torch.rand(1, num_gaussians, generator=generator),
+    )
+
+@pytest.mark.parametrize("fraction", [0.4, 0.15, 0.05])
+def test_simplify_hits_the_target_fraction(fraction):
+    gaussians = _predicted_scene()
+    num_gaussians = gaussians.opacities.shape[1]
+    simplified = simplify_gaussians(gaussians, fraction)
+
+    num_simplified = simplified.opacities.shape[1]
+    target = round(num_gaussians * fraction)
+    assert abs(num_simplified - target) <= 0.02 * target
+    assert all(tensor.shape[:2] == (1, num_simplified) for tensor in simplified)
+    assert all(torch.isfinite(tensor).all() for tensor in simplified)
+    assert ((simplified.opacities >= 0) & (simplified.opacities <= 1)).all()
+    assert (simplified.singular_values >= 0).all()
+    torch.testing.assert_close(simplified.quaternions.norm(dim=-1), torch.ones(1, num_simplified))
+
+    # Merged Gaussians stay inside the scene and average its colors.
+    low, high = gaussians.mean_vectors[0].amin(dim=0), gaussians.mean_vectors[0].amax(dim=0)
+    assert ((simplified.mean_vectors[0] >= low - 1e-4) & (simplified.mean_vectors[0] <= high + 1e-4)).all()
+    assert ((simplified.colors >= 0) & (simplified.colors <= 1)).all()
+
+def test_simplify_levels_are_nested_in_size():
+    gaussians = _predicted_scene()
+    counts = [simplify_gaussians(gaussians, fraction).opacities.shape[1] for fraction in (0.4, 0.15)]
+    assert gaussians.opacities.shape[1] > counts[0] > counts[1]
+
+def test_simplify_keeps_everything_at_full_fraction():
+    gaussians = _predicted_scene(height=8, width=8)
+    assert simplify_gaussians(gaussians, 1.0) is gaussians
+
+def test_simplify_preserves_a_lone_gaussian():
+    # Two tight clusters far apart and one Gaussian on its own.
+    gaussians = _gaussians(
+        [[0.0, 0.0, 2.0], [0.001, 0.0, 2.0], [0.0, 0.001, 2.0], [1.0, 1.0, 9.0]],
+        [[0.01, 0.01, 0.01]] * 4,
+        [0.2, 0.2, 0.2, 0.7],
+    )
+    simplified = simplify_gaussians(gaussians, 0.5)
+
+    assert simplified.opacities.shape[1] == 2
+    lone = simplified.mean_vectors[0, :, 2].argmax()
+    for expected, actual in zip(gaussians, simplified):
+        assert torch.equal(actual[0, lone], expected[0, 3])
+    # The merged cluster keeps the opacity-weighted area of its members (the merged
+    # opacity is not clipped at 1 here).
+    merged = 1 - lone
+    merged_area = simplified.singular_values[0, merged].sort(descending=True).values[:2].prod()
+    torch.testing.assert_close(simplified.opacities[0, merged] * merged_area, torch.tensor(3 * 0.2 * 0.01**2))
+
+def _interleave_reference(cells):
+    code = 0
+    for bit in range(21):
+        for axis in range(3):
+            code |= ((int(cells[axis]) >> bit) & 1) << (3 * bit + 2 - axis)
+    return code
+
+def test_morton_codes_interleave_cell_bits():
+    # Corners of the bounding box map to the first and last cell of every axis.
+    points = torch.tensor([[0.0, 0.0, 0.0], [1.0, 1.0, 1.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0], [0.5, 0.25, 0.75]])
+    codes = morton_codes(points)
+    max_cell = 2**21 - 1
+    assert codes[0] == 0
+    assert codes[1] == 2**63 - 1
+    assert codes[2] == _interleave_reference((max_cell, 0, 0))
+    assert codes[3] == _interleave_reference((0, 0, max_cell))
+    cells = [round(value * max_cell) for value in (0.5, 0.25, 0.75)]
+    assert codes[4] == _interleave_reference(cells)
+
+    with pytest.raises(ValueError):
+        morton_codes(points, num_bits=22)
+
+def test_spatial_sort_is_a_permutation_that_keeps_attributes_aligned():
+    gaussians = _predicted_scene()
+    num_gaussians = gaussians.opacities.shape[1]
+    sorted_gaussians = sort_gaussians_spatially(gaussians)
+
+    # Recover the permutation from the positions, which are all distinct.
+    keys = gaussians.mean_vectors[0].double() @ torch.tensor([1.0, 1e3, 1e6], dtype=torch.float64)
+    sorted_keys = sorted_gaussians.mean_vectors[0].double() @ torch.tensor([1.0, 1e3, 1e6], dtype=torch.float64)
+    assert len(keys.unique()) == num_gaussians
+    order = torch.argsort(keys)[torch.searchsorted(keys.sort().values, sorted_keys)]
+    assert torch.equal(order.sort().values, torch.arange(num_gaussians))
+    for original, permuted in zip(gaussians, sorted_gaussians):
+        assert torch.equal(permuted[0], original[0, order])
+
+    codes = morton_codes(sorted_gaussians.mean_vectors[0])
+    assert (codes[1:] >= codes[:-1]).all()
+
+def test_spatial_sort_puts_neighbors_close_together():
+    gaussians = _predicted_scene()
+    sorted_gaussians = sort_gaussians_spatially(gaussians)
+
+    def _median_chunk_extent(mean_vectors, chunk_size=64):
+        chunks = mean_vectors[0].split(chunk_size)
+        return torch.stack([(chunk.amax(dim=0) - chunk.amin(dim=0)).norm() for chunk in chunks]).median()
+
+    # Contiguous chunks cover a much smaller region than in [layer, height, width]
+    # order, where a chunk holds a whole row of pixels.
+    assert _median_chunk_extent(sorted_gaussians.mean_vectors) < 0.5 * _median_chunk_extent(gaussians.mean_vectors)
+
+def test_spatial_sort_rejects_batches():
+    gaussians = Gaussians3D(*(torch.cat([tensor, tensor]) for tensor in _predicted_scene(8, 8)))
+    with pytest.raises(ValueError):
+        sort_gaussians_spatially(gaussians)
+
+def _random_gaussians(num_gaussians, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    return Gaussians3D(
+        mean_vectors=torch.randn(1, num_gaussians, 3, generator=generator),
+        singular_values=torch.rand(1, num_gaussians, 3, generator=generator) * 0.1 + 1e-3,
+        # Not normalized, like the raw network output.
+        quaternions=torch.randn(1, num_gaussians, 4, generator=generator) * 2,
+        colors=torch.rand(1, num_gaussians, 3, generator=generator),
+        opacities=torch.rand(1, num_gaussians, generator=generator),
+    )
+
+@pytest.mark.parametrize(
+    "scales",
+    [
+        [1.5, 0.75, 2.0],
+        [0.5, -0.5, 3.0],
+        [2.0, 2.0, 2.0],
+        [-2.0, 2.0, 2.0],
+        [2.0, -2.0, -2.0],
+        [-1.0, -1.0, -1.0],
+    ],
+)
+def test_diagonal_transform_matches_the_general_path(monkeypatch, scales):
+    gaussians = _random_gaussians(256)
+    transform = torch.cat([torch.diag(torch.tensor(scales)), torch.tensor([[0.5], [-1.0], [2.0]])], dim=1)
+    assert gaussians_module._is_diagonal(transform[:, :3])
+
+    fast = gaussians_module.apply_transform(gaussians, transform)
+    monkeypatch.setattr(gaussians_module, "_is_diagonal", lambda matrix: False)
+    general = gaussians_module.apply_transform(gaussians, transform)
+
+    torch.testing.assert_close(fast.mean_vectors, general.mean_vectors)
+    # Quaternions and the order of the principal axes are not unique, the covariances are.
+    torch.testing.assert_close(
+        compose_covariance_matrices(fast.quaternions, fast.singular_values),
+        compose_covariance_matrices(general.quaternions, general.singular_values),
+        rtol=1e-4,
+        atol=1e-8,
+    )
+    torch.testing.assert_close(
+        fast.singular_values.sort(dim=-1).values, general.singular_values.sort(dim=-1).values
+    )
+    torch.testing.assert_close(fast.quaternions.norm(dim=-1), torch.ones(1, 256))
+    assert fast.colors is gaussians.colors
+    assert fast.opacities is gaussians.opacities
+
+def test_diagonal_fast_path_only_takes_invertible_diagonal_matrices():
+    assert gaussians_module._is_diagonal(torch.diag(torch.tensor([1.0, -2.0, 3.0])))
+    assert not gaussians_module._is_diagonal(torch.diag(torch.tensor([1.0, 0.0, 3.0])))
+    assert not gaussians_module._is_diagonal(torch.tensor([[1.0, 1e-6, 0.0], [0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]))
+    assert not gaussians_module._is_diagonal(torch.eye(3).expand(2, 3, 3))
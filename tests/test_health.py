@@ -0,0 +1,50 @@
+import sys
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.main import app
+from src.database import SessionLocal, WorkerState
+
+@pytest.fixture(scope="module", autouse=True)
+def client():
+    # Entering the client runs the lifespan hook, which creates the tables; leaving it
+    # shuts the app (and anything its lifespan started) down again.
+    with TestClient(app) as client:
+        yield client
+
+def _set_workers(*workers):
+    db = SessionLocal()
+    try:
+        db.query(WorkerState).delete()
+        db.add_all(workers)
+        db.commit()
+    finally:
+        db.close()
+
+def test_not_ready_without_workers(client):
+    _set_workers()
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "not_ready"
+
+def test_not_ready_while_warming_up(client):
+    _set_workers(WorkerState(id="worker-1", pid=1, state="warming_up", device="cpu"))
+    assert client.get("/health/ready").status_code == 503
+
+def test_ready_once_a_worker_is_warm(client):
+    _set_workers(
+        WorkerState(id="worker-1", pid=1, state="ready", device="cpu"),
+        WorkerState(id="worker-2", pid=2, state="loading", device="cpu"),
+    )
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+    response = client.get("/health/")
+    assert response.status_code == 200
+    assert [w["id"] for w in response.json()["workers"]] == ["worker-1", "worker-2"]
+    _set_workers()
@@ -0,0 +1,348 @@
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.sql import func
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.main import app
+from src.core.config import settings
+from src.database import SessionLocal, Job, Wallpaper, WorkerState
+from src.services import job_queue
+from src.worker import WorkerPool, _reclaim_jobs, process_jobs
+
+@pytest.fixture(scope="module", autouse=True)
+def client():
+    # Entering the client runs the lifespan hook, which creates the tables; leaving it
+    # shuts the app (and anything its lifespan started) down again.
+    with TestClient(app) as client:
+        yield client
+
+def _add_wallpaper(db, wp_id):
+    db.add(Wallpaper(id=wp_id, filename="test.jpg", upload_path=f"data/uploads/{wp_id}.jpg"))
+    db.commit()
+
+def test_image_upload_enqueues_job(client):
+    files = {
+        "file": ("test.jpg", b"\xff\xd8\xff\xe0fake-jpeg", "image/jpeg")
+    }
+    response = client.post("/api/upload/", files=files)
+    assert response.status_code == 200
+    assert response.json()["status"] == "processing"
+
+    db = SessionLocal()
+    try:
+        job = job_queue.get_latest_job(db, response.json()["id"])
+        assert job is not None
+        assert job.status == job_queue.PENDING
+    finally:
+        db.close()
+
+def test_claim_is_exclusive_and_failed_jobs_retry():
+    db = SessionLocal()
+    try:
+        # Drain anything left over by other tests.
+        db.query(Job).delete()
+        db.commit()
+
+        _add_wallpaper(db, "queue-test")
+        job_queue.enqueue_job(db, "queue-test")
+        db.commit()
+
+        job = job_queue.claim_next_job(db, "worker-a")
+        assert job.status == job_queue.RUNNING
+        assert job.worker == "worker-a"
+        assert job.attempts == 1
+        assert job_queue.claim_next_job(db, "worker-b") is None
+
+        # A failure with attempts left puts the job back into the queue.
+        job_queue.fail_job(db, job, "boom")
+        assert job.status == job_queue.PENDING
+
+        # Jobs of a worker that never registered (or is gone) are re-queued as well.
+        job = job_queue.claim_next_job(db, "worker-b")
+        assert job_queue.requeue_interrupted_jobs(db) == 1
+        db.refresh(job)
+        assert job.status == job_queue.PENDING
+    finally:
+        db.close()
+
+def _add_worker(db, worker_id, state="ready", seconds_ago=0):
+    db.query(WorkerState).filter(WorkerState.id == worker_id).delete()
+    db.add(WorkerState(
+        id=worker_id, state=state, heartbeat_at=func.datetime("now", f"-{seconds_ago} seconds"),
+    ))
+    db.commit()
+
+def test_requeue_only_takes_jobs_of_workers_that_are_gone():
+    db = SessionLocal()
+    try:
+        db.query(Job).delete()
+        db.commit()
+        for wp_id in ("lease-live", "lease-expired", "lease-stopped"):
+            _add_wallpaper(db, wp_id)
+            job_queue.enqueue_job(db, wp_id)
+        db.commit()
+
+        timeout = int(settings.WORKER_HEARTBEAT_TIMEOUT)
+        _add_worker(db, "worker-live")
+        _add_worker(db, "worker-expired", seconds_ago=timeout + 5)
+        _add_worker(db, "worker-stopped", state="stopped")
+        live, expired, stopped = (
+            job_queue.claim_next_job(db, worker_id)
+            for worker_id in ("worker-live", "worker-expired", "worker-stopped")
+        )
+
+        # Starting another pool must not steal jobs that live workers are running.
+        assert job_queue.requeue_interrupted_jobs(db) == 2
+        for job in (live, expired, stopped):
+            db.refresh(job)
+        assert live.status == job_queue.RUNNING
+        assert live.worker == "worker-live"
+        assert expired.status == job_queue.PENDING
+        assert stopped.status == job_queue.PENDING
+    finally:
+        db.close()
+
+def test_job_that_keeps_killing_its_worker_fails():
+    db = SessionLocal()
+    try:
+        db.query(Job).delete()
+        db.commit()
+        _add_wallpaper(db, "crash-test")
+        job_queue.enqueue_job(db, "crash-test")
+        db.commit()
+
+        for attempt in range(1, settings.JOB_MAX_ATTEMPTS + 1):
+            job = job_queue.claim_next_job(db, f"worker-crash-{attempt}")
+            assert job.attempts == attempt
+            # The worker died without recording anything.
+            job_queue.requeue_interrupted_jobs(db)
+            db.refresh(job)
+
+        assert job.status == job_queue.FAILED
+        assert job_queue.claim_next_job(db, "worker-after") is None
+    finally:
+        db.close()
+
+class _DeadProcess:
+    exitcode = -9
+
+    def start(self):
+        pass
+
+    def join(self, timeout=None):
+        pass
+
+    def is_alive(self):
+        return False
+
+def test_pool_respawns_dead_workers_and_requeues_their_jobs(monkeypatch):
+    db = SessionLocal()
+    try:
+        db.query(Job).delete()
+        db.commit()
+        _add_wallpaper(db, "respawn-test")
+        job_queue.enqueue_job(db, "respawn-test")
+        db.commit()
+        _add_worker(db, "worker-oom")
+        job = job_queue.claim_next_job(db, "worker-oom")
+
+        pool = WorkerPool(1)
+        spawned = []
+        monkeypatch.setattr(pool, "_spawn", lambda: spawned.append(1) or ("worker-new", _DeadProcess(), None, time.monotonic()))
+        # Killed by the OOM killer, long enough ago not to be throttled.
+        pool._workers = [("worker-oom", _DeadProcess(), None, time.monotonic() - pool.RESPAWN_DELAY)]
+        pool.check_workers()
+
+        assert len(spawned) == 1
+        assert pool._workers[0][0] == "worker-new"
+        db.refresh(job)
+        assert job.status == job_queue.PENDING
+        assert db.query(WorkerState).filter(WorkerState.id == "worker-oom").first() is None
+
+        # A worker that dies right after starting is not respawned in a tight loop.
+        pool.check_workers()
+        assert len(spawned) == 1
+    finally:
+        db.close()
+
+class _FakeContext:
+    """Stands in for the spawn context, so pools can be started without processes."""
+
+    def Event(self):
+        return threading.Event()
+
+    def Process(self, target, args, name, daemon):
+        return _DeadProcess()
+
+def test_restarted_pool_reclaims_jobs_of_the_pool_it_replaced(monkeypatch):
+    db = SessionLocal()
+    try:
+        db.query(Job).delete()
+        db.commit()
+        _add_wallpaper(db, "restart-test")
+        job_queue.enqueue_job(db, "restart-test")
+        db.commit()
+        # The previous pool ran in a container with the same PID and was SIGKILLed
+        # right after its last heartbeat.
+        old_worker_id = f"worker-{os.getpid()}-0"
+        _add_worker(db, old_worker_id)
+        job = job_queue.claim_next_job(db, old_worker_id)
+
+        pool = WorkerPool(2)
+        pool._ctx = _FakeContext()
+        pool.start()
+        try:
+            new_worker_ids = [worker[0] for worker in pool._workers]
+            assert len(set(new_worker_ids)) == 2
+            assert old_worker_id not in new_worker_ids
+            # The old lease is still valid, so the job is left alone for now...
+            db.refresh(job)
+            assert job.status == job_queue.RUNNING
+
+            # ...and reclaimed once it expires, since nobody heartbeats for the old id.
+            timeout = int(settings.WORKER_HEARTBEAT_TIMEOUT)
+            _add_worker(db, old_worker_id, seconds_ago=timeout + 5)
+            _reclaim_jobs()
+            db.refresh(job)
+            assert job.status == job_queue.PENDING
+            assert db.query(WorkerState).filter(WorkerState.id == old_worker_id).first() is None
+        finally:
+            pool.stop()
+    finally:
+        db.close()
+
+def test_claim_jobs_batches_pending_jobs():
+    db = SessionLocal()
+    try:
+        db.query(Job).delete()
+        db.commit()
+
+        for i in range(3):
+            _add_wallpaper(db, f"batch-test-{i}")
+            job_queue.enqueue_job(db, f"batch-test-{i}")
+        db.commit()
+
+        jobs = job_queue.claim_jobs(db, "worker-a", limit=2)
+        assert [job.wallpaper_id for job in jobs] == ["batch-test-0", "batch-test-1"]
+        assert all(job.status == job_queue.RUNNING for job in jobs)
+
+        rest = job_queue.claim_jobs(db, "worker-b", limit=2)
+        assert [job.wallpaper_id for job in rest] == ["batch-test-2"]
+    finally:
+        db.close()
+
+def _read_events(client, wallpaper_id):
+    events = []
+    with client.stream("GET", f"/api/upload/{wallpaper_id}/events") as response:
+        assert response.status_code == 200
+        for line in response.iter_lines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):]))
+    return events
+
+def test_events_stream_reports_stages_until_completed(client):
+    db = SessionLocal()
+    try:
+        _add_wallpaper(db, "events-test")
+        job = job_queue.enqueue_job(db, "events-test")
+        db.commit()
+
+        job = job_queue.claim_next_job(db, "worker-a")
+        job_queue.record_stage(db, job, "load", 0.25)
+        job_queue.record_stage(db, job, "preprocess", 0.5)
+        job_queue.record_stage(db, job, "prune", 0.1, {"input": 10, "output": 7})
+        job_queue.complete_job(db, job)
+    finally:
+        db.close()
+
+    events = _read_events(client, "events-test")
+    assert events[-1]["status"] == job_queue.COMPLETED
+    assert [stage["stage"] for stage in events[-1]["stages"]] == ["load", "preprocess", "prune"]
+    assert events[-1]["stages"][-1]["details"] == {"input": 10, "output": 7}
+
+def test_events_for_unknown_wallpaper_is_404(client):
+    assert client.get("/api/upload/does-not-exist/events").status_code == 404
+    assert client.get("/api/upload/events", params={"ids": "does-not-exist"}).status_code == 404
+
+def test_one_stream_reports_several_wallpapers_until_all_are_done(client):
+    db = SessionLocal()
+    try:
+        db.query(Job).delete()
+        db.commit()
+        for wp_id in ("multi-done", "multi-failed"):
+            _add_wallpaper(db, wp_id)
+            job_queue.enqueue_job(db, wp_id)
+        db.commit()
+
+        for job in job_queue.claim_jobs(db, "worker-a", limit=2):
+            if job.wallpaper_id == "multi-done":
+                job_queue.complete_job(db, job)
+            else:
+                job.attempts = settings.JOB_MAX_ATTEMPTS
+                job_queue.fail_job(db, job, "boom")
+    finally:
+        db.close()
+
+    # The listing tells the dashboard which wallpapers are worth watching.
+    listing = client.get("/api/upload/", params={"limit": 200, "fields": "id,job_status"}).json()
+    statuses = {row["id"]: row["job_status"] for row in listing}
+    assert statuses["multi-done"] == job_queue.COMPLETED
+    assert statuses["multi-failed"] == job_queue.FAILED
+
+    events = []
+    with client.stream("GET", "/api/upload/events", params={"ids": "multi-done,unknown,multi-failed"}) as response:
+        assert response.status_code == 200
+        for line in response.iter_lines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):]))
+    assert {event["wallpaper_id"]: event["status"] for event in events} == {
+        "multi-done": job_queue.COMPLETED,
+        "multi-failed": job_queue.FAILED,
+    }
+
+class _FakeService:
+    """Writes placeholder outputs instead of running the model."""
+
+    def process_images(self, items, progress):
+        for _, output_ply_path in items:
+            output_ply_path.parent.mkdir(parents=True, exist_ok=True)
+            output_ply_path.write_bytes(b"ply")
+            output_ply_path.with_suffix(".ksplat").write_bytes(b"ksplat")
+            lod_ply_path = output_ply_path.with_name(f"{output_ply_path.stem}_lod1.ply")
+            lod_ply_path.write_bytes(b"ply")
+            progress("save_ply", 0.1, 0)
+
+def test_process_jobs_records_compressed_scene_and_lods(client):
+    db = SessionLocal()
+    try:
+        db.query(Job).delete()
+        db.commit()
+        _add_wallpaper(db, "ksplat-test")
+        job_queue.enqueue_job(db, "ksplat-test")
+        db.commit()
+
+        jobs = job_queue.claim_jobs(db, "worker-a")
+        process_jobs(db, jobs, _FakeService())
+
+        wp = db.query(Wallpaper).filter(Wallpaper.id == "ksplat-test").first()
+        assert wp.ply_path.endswith("ksplat-test.ply")
+        assert wp.splat_path.endswith("ksplat-test.ksplat")
+        assert jobs[0].status == job_queue.COMPLETED
+    finally:
+        db.close()
+
+    # The viewer picks a level of detail; levels beyond the coarsest fall back to it.
+    full = client.get("/api/upload/ksplat-test").json()
+    assert full["lod"] == 0 and full["ply_path"].endswith("ksplat-test.ply")
+    coarse = client.get("/api/upload/ksplat-test?lod=5").json()
+    assert coarse["lod"] == 1
+    assert coarse["ply_path"].endswith("ksplat-test_lod1.ply")
+    assert coarse["splat_path"] is None
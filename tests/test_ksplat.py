@@ -0,0 +1,163 @@
+import struct
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.services import sharp_service as sharp_service_module
+
+if not sharp_service_module.ML_AVAILABLE:
+    pytest.skip("Sharp dependencies are not installed", allow_module_level=True)
+
+from sharp.utils import ksplat
+from sharp.utils.gaussians import Gaussians3D, save_ksplat
+
+def _decode(path):
+    """Reads a .ksplat the way SplatBuffer of GaussianSplats3D does (compression level 1)."""
+    data = path.read_bytes()
+    header = {
+        "version": (data[0], data[1]),
+        "max_section_count": struct.unpack_from("<I", data, 4)[0],
+        "section_count": struct.unpack_from("<I", data, 8)[0],
+        "max_splat_count": struct.unpack_from("<I", data, 12)[0],
+        "splat_count": struct.unpack_from("<I", data, 16)[0],
+        "compression_level": struct.unpack_from("<H", data, 20)[0],
+        "scene_center": struct.unpack_from("<3f", data, 24),
+        "sh_range": struct.unpack_from("<2f", data, 36),
+    }
+
+    sections = []
+    offset = ksplat.HEADER_SIZE_BYTES + header["section_count"] * ksplat.SECTION_HEADER_SIZE_BYTES
+    for i in range(header["section_count"]):
+        base = ksplat.HEADER_SIZE_BYTES + i * ksplat.SECTION_HEADER_SIZE_BYTES
+        section = {
+            "splat_count": struct.unpack_from("<I", data, base)[0],
+            "max_splat_count": struct.unpack_from("<I", data, base + 4)[0],
+            "bucket_size": struct.unpack_from("<I", data, base + 8)[0],
+            "bucket_count": struct.unpack_from("<I", data, base + 12)[0],
+            "block_size": struct.unpack_from("<f", data, base + 16)[0],
+            "bucket_storage_size": struct.unpack_from("<H", data, base + 20)[0],
+            "scale_range": struct.unpack_from("<I", data, base + 24)[0],
+            "storage_size": struct.unpack_from("<I", data, base + 28)[0],
+            "full_bucket_count": struct.unpack_from("<I", data, base + 32)[0],
+            "partial_bucket_count": struct.unpack_from("<I", data, base + 36)[0],
+            "sh_degree": struct.unpack_from("<H", data, base + 40)[0],
+        }
+        partial_lengths = np.frombuffer(data, "<u4", section["partial_bucket_count"], offset)
+        offset += partial_lengths.nbytes
+        bucket_centers = np.frombuffer(data, "<f4", 3 * section["bucket_count"], offset).reshape(-1, 3)
+        offset += bucket_centers.nbytes
+        splats = np.frombuffer(data, ksplat._SPLAT_DTYPE, section["splat_count"], offset)
+        offset += splats.nbytes
+
+        # Full buckets hold bucket_size consecutive splats, then the partial ones follow.
+        bucket_lengths = np.concatenate(
+            [np.full(section["full_bucket_count"], section["bucket_size"]), partial_lengths]
+        ).astype(np.int64)
+        splat_buckets = np.repeat(np.arange(len(bucket_lengths)), bucket_lengths)
+        scale = section["block_size"] / 2 / section["scale_range"]
+        section.update(
+            partial_lengths=partial_lengths,
+            bucket_centers=bucket_centers,
+            splat_buckets=splat_buckets,
+            centers=(splats["center"].astype(np.float64) - section["scale_range"]) * scale
+            + bucket_centers[splat_buckets],
+            scales=splats["scale"].astype(np.float32),
+            rotations=splats["rotation"].astype(np.float32),
+            rgba=splats["rgba"],
+        )
+        sections.append(section)
+    assert offset == len(data)
+    return header, sections
+
+def _inputs(num_splats, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform([-12.0, -7.0, 1.0], [12.0, 7.0, 30.0], size=(num_splats, 3))
+    scales = rng.uniform(1e-3, 0.5, size=(num_splats, 3)).astype(np.float32)
+    quaternions = rng.normal(size=(num_splats, 4)).astype(np.float32)
+    # The color bytes carry the input index, so splats can be matched after reordering.
+    rgba = np.arange(num_splats, dtype="<u4").view(np.uint8).reshape(num_splats, 4)
+    return centers, scales, quaternions, rgba
+
+def test_write_ksplat_decodes_to_its_input(tmp_path):
+    num_splats, bucket_size, block_size = 5000, 16, 5.0
+    centers, scales, quaternions, rgba = _inputs(num_splats)
+    section_sizes = [100, 900, 0, 4000]
+    path = tmp_path / "scene.ksplat"
+    ksplat.write_ksplat(
+        path, centers, scales, quaternions, rgba,
+        section_sizes=section_sizes, block_size=block_size, bucket_size=bucket_size,
+    )
+
+    header, sections = _decode(path)
+    assert header["version"] == (ksplat.VERSION_MAJOR, ksplat.VERSION_MINOR)
+    assert header["section_count"] == header["max_section_count"] == len(section_sizes)
+    assert header["splat_count"] == header["max_splat_count"] == num_splats
+    assert header["compression_level"] == 1
+    np.testing.assert_allclose(header["scene_center"], (centers.min(0) + centers.max(0)) / 2, rtol=1e-6)
+    assert header["sh_range"] == (-1.5, 1.5)
+
+    start = 0
+    for section, size in zip(sections, section_sizes):
+        assert section["splat_count"] == section["max_splat_count"] == size
+        assert section["bucket_size"] == bucket_size
+        assert section["block_size"] == block_size
+        assert section["bucket_storage_size"] == 12
+        assert section["scale_range"] == ksplat.COMPRESSION_SCALE_RANGE
+        assert section["sh_degree"] == 0
+        assert section["bucket_count"] == section["full_bucket_count"] + section["partial_bucket_count"]
+        assert section["storage_size"] == (
+            4 * section["partial_bucket_count"] + 12 * section["bucket_count"] + ksplat.BYTES_PER_SPLAT * size
+        )
+        assert (section["partial_lengths"] > 0).all()
+        assert (section["partial_lengths"] < bucket_size).all()
+
+        indices = section["rgba"].copy().view("<u4")[:, 0].astype(np.int64)
+        # Every Gaussian of the section is stored exactly once.
+        np.testing.assert_array_equal(np.sort(indices), np.arange(start, start + size))
+
+        # Buckets are centered on the blocks of a block_size grid, and every splat
+        # lies in the block of its bucket.
+        if size:
+            min_corner = centers[start : start + size].min(0)
+            cells = (section["bucket_centers"] - min_corner) / block_size - 0.5
+            np.testing.assert_allclose(cells, np.round(cells), atol=1e-4)
+            offsets = centers[indices] - section["bucket_centers"][section["splat_buckets"]]
+            assert (np.abs(offsets) <= block_size / 2 + 1e-4).all()
+
+        # Positions are quantized to block_size / 65534.
+        np.testing.assert_allclose(section["centers"], centers[indices], rtol=0, atol=block_size / 65534 + 1e-5)
+        np.testing.assert_array_equal(section["scales"], scales[indices].astype(np.float16).astype(np.float32))
+        normalized = quaternions[indices] / np.linalg.norm(quaternions[indices], axis=-1, keepdims=True)
+        np.testing.assert_allclose(section["rotations"], normalized, rtol=0, atol=1e-3)
+        start += size
+
+def test_save_ksplat_stores_gaussians_most_important_first(tmp_path):
+    num_gaussians = 1000
+    generator = torch.Generator().manual_seed(0)
+    gaussians = Gaussians3D(
+        mean_vectors=torch.rand(1, num_gaussians, 3, generator=generator) * torch.tensor([4.0, 4.0, 10.0]) + torch.tensor([-2.0, -2.0, 1.0]),
+        singular_values=torch.full((1, num_gaussians, 3), 0.05),
+        quaternions=torch.tensor([1.0, 0.0, 0.0, 0.0]).repeat(1, num_gaussians, 1),
+        colors=torch.rand(1, num_gaussians, 3, generator=generator),
+        opacities=torch.rand(1, num_gaussians, generator=generator),
+    )
+    path = tmp_path / "scene.ksplat"
+    save_ksplat(gaussians, path)
+
+    header, sections = _decode(path)
+    assert header["splat_count"] == num_gaussians
+    # Sections double in size.
+    assert [section["splat_count"] for section in sections] == [66, 134, 266, 534]
+    # Equal sizes and shapes, so importance is opacity over squared depth.
+    importance = [
+        section["rgba"][:, 3].astype(np.float64) / np.square(section["centers"][:, 2]) for section in sections
+    ]
+    for earlier, later in zip(importance, importance[1:]):
+        assert earlier.min() >= later.max() * 0.9
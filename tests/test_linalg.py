@@ -0,0 +1,127 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("scipy")
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.services import sharp_service as sharp_service_module
+
+if not sharp_service_module.ML_AVAILABLE:
+    pytest.skip("Sharp dependencies are not installed", allow_module_level=True)
+
+from scipy.spatial.transform import Rotation
+
+from sharp.utils import linalg
+from sharp.utils.gaussians import compose_covariance_matrices, decompose_covariance_matrices
+
+def _random_rotations(num, seed=0):
+    return torch.from_numpy(Rotation.random(num, random_state=seed).as_matrix())
+
+def _with_eigenvalues(eigenvalues, seed=0):
+    """Symmetric matrices with the given eigenvalues in a random basis."""
+    rotations = _random_rotations(len(eigenvalues), seed)
+    return rotations @ torch.diag_embed(eigenvalues) @ rotations.transpose(-1, -2)
+
+def _check_eigh(matrices):
+    eigenvalues, eigenvectors = linalg.eigh_symmetric_3x3(matrices)
+    expected_eigenvalues = torch.linalg.eigh(matrices).eigenvalues.flip(-1)
+    scale = matrices.abs().amax(dim=(-2, -1), keepdim=True).clamp_min(1e-30)
+
+    torch.testing.assert_close(eigenvalues, expected_eigenvalues, rtol=0, atol=1e-12 * scale[..., 0].abs().max())
+    assert (eigenvalues[..., :-1] >= eigenvalues[..., 1:]).all()
+    # Eigenvectors are not unique for repeated eigenvalues, so check the basis instead.
+    identity = torch.eye(3, dtype=matrices.dtype).expand_as(matrices)
+    torch.testing.assert_close(eigenvectors.transpose(-1, -2) @ eigenvectors, identity, rtol=0, atol=1e-12)
+    reconstructed = eigenvectors @ torch.diag_embed(eigenvalues) @ eigenvectors.transpose(-1, -2)
+    torch.testing.assert_close(reconstructed / scale, matrices / scale, rtol=0, atol=1e-12)
+
+def test_eigh_matches_torch_on_random_matrices():
+    generator = torch.Generator().manual_seed(0)
+    matrices = torch.randn(512, 3, 3, dtype=torch.float64, generator=generator)
+    _check_eigh(matrices + matrices.transpose(-1, -2))
+    # Covariances of Gaussians, whose scales span several orders of magnitude.
+    scales = 10 ** (-4 * torch.rand(512, 3, dtype=torch.float64, generator=generator))
+    _check_eigh(_with_eigenvalues(scales.square()))
+
+def test_eigh_handles_repeated_and_degenerate_eigenvalues():
+    eigenvalues = torch.tensor(
+        [
+            [2.0, 2.0, 1.0],
+            [3.0, 1.0, 1.0],
+            [5.0, 5.0, 5.0],
+            [1.0, 0.0, 0.0],
+            [1.0, 1.0, 0.0],
+            [0.0, 0.0, 0.0],
+            [1.0, 1.0 + 1e-12, 1.0 - 1e-12],
+        ],
+        dtype=torch.float64,
+    )
+    _check_eigh(_with_eigenvalues(eigenvalues))
+    _check_eigh(torch.diag_embed(eigenvalues))
+
+def test_eigh_handles_near_diagonal_matrices():
+    diagonals = torch.tensor([[3.0, 2.0, 1.0], [1.0, 3.0, 2.0], [1e-6, 1.0, 1e-3]], dtype=torch.float64)
+    for offset in (0.0, 1e-300, 1e-15, 1e-9):
+        matrices = torch.diag_embed(diagonals) + offset * (1 - torch.eye(3, dtype=torch.float64))
+        _check_eigh(matrices)
+
+def test_eigh_in_float32():
+    matrices = _with_eigenvalues(torch.tensor([[4.0, 1.0, 0.25], [1.0, 1.0, 1e-4]], dtype=torch.float64))
+    eigenvalues, eigenvectors = linalg.eigh_symmetric_3x3(matrices.float())
+    assert eigenvalues.dtype == torch.float32
+    torch.testing.assert_close(eigenvalues.double(), torch.linalg.eigh(matrices).eigenvalues.flip(-1), rtol=0, atol=1e-5)
+
+def _check_quaternions(rotations):
+    quaternions = linalg.quaternions_from_rotation_matrices(rotations)
+    # scipy stores w last; canonical quaternions have w >= 0 like ours.
+    expected = torch.from_numpy(Rotation.from_matrix(rotations.numpy()).as_quat(canonical=True))[..., [3, 0, 1, 2]]
+    assert (quaternions[..., 0] >= 0).all()
+    # With w == 0, q and -q both have a non-negative real part.
+    sign = torch.where((quaternions * expected).sum(dim=-1, keepdim=True) < 0, -1.0, 1.0).double()
+    torch.testing.assert_close(quaternions * sign, expected, rtol=0, atol=1e-12)
+    # rotation_matrices_from_quaternions works in float32.
+    torch.testing.assert_close(linalg.rotation_matrices_from_quaternions(quaternions.float()), rotations.float(), rtol=0, atol=1e-6)
+
+def test_quaternions_match_scipy():
+    _check_quaternions(_random_rotations(1024))
+
+def test_quaternions_match_scipy_for_every_branch():
+    # Identity and half turns about each axis select each of the four branches, and
+    # rotations close to half turns have a tiny real part.
+    axes = torch.from_numpy(Rotation.random(64, random_state=1).as_rotvec())
+    axes = axes / axes.norm(dim=-1, keepdim=True)
+    angles = torch.tensor([0.0, torch.pi / 2, torch.pi - 1e-7, torch.pi], dtype=torch.float64)
+    rotvecs = torch.cat([torch.eye(3, dtype=torch.float64) * angle for angle in angles] + [axes * angle for angle in angles])
+    _check_quaternions(torch.from_numpy(Rotation.from_rotvec(rotvecs.numpy()).as_matrix()))
+
+def test_decomposition_turns_reflections_into_rotations():
+    # The same covariance can be written with a reflection as basis (det = -1); the
+    # decomposition has to return a proper rotation for it.
+    rotations = _random_rotations(256, seed=2)
+    reflections = rotations.clone()
+    reflections[..., :, 2] *= -1
+    assert (torch.linalg.det(reflections) < 0).all()
+    singular_values = 10 ** (-3 * torch.rand(256, 3, dtype=torch.float64, generator=torch.Generator().manual_seed(3)))
+    covariances = reflections @ torch.diag_embed(singular_values.square()) @ reflections.transpose(-1, -2)
+    # The solver itself returns reflections for part of them.
+    _, eigenvectors = linalg.eigh_symmetric_3x3(covariances)
+    assert (torch.linalg.det(eigenvectors) < 0).any()
+
+    quaternions, decomposed = decompose_covariance_matrices(covariances.float())
+    decomposed_rotations = linalg.rotation_matrices_from_quaternions(quaternions)
+    torch.testing.assert_close(torch.linalg.det(decomposed_rotations), torch.ones(256))
+    torch.testing.assert_close(decomposed, singular_values.sort(dim=-1, descending=True).values.float())
+    torch.testing.assert_close(compose_covariance_matrices(quaternions, decomposed), covariances.float(), rtol=0, atol=1e-6)
+
+def test_decomposition_of_isotropic_and_flat_covariances():
+    covariances = torch.diag_embed(torch.tensor([[1.0, 1.0, 1.0], [1.0, 1.0, 0.0], [4.0, 0.0, 0.0]]))
+    quaternions, singular_values = decompose_covariance_matrices(covariances)
+    assert quaternions.dtype == torch.float32
+    torch.testing.assert_close(quaternions.norm(dim=-1), torch.ones(3))
+    torch.testing.assert_close(singular_values, torch.tensor([[1.0, 1.0, 1.0], [1.0, 1.0, 0.0], [2.0, 0.0, 0.0]]))
+    torch.testing.assert_close(compose_covariance_matrices(quaternions, singular_values), covariances)
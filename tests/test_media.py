@@ -0,0 +1,104 @@
+import os
+import sys
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.main import app
+from src.core.config import settings
+from src.services import media
+from src.services.media import precompress
+
+@pytest.fixture(scope="module", autouse=True)
+def client():
+    # Entering the client runs the lifespan hook, which creates the tables; leaving it
+    # shuts the app (and anything its lifespan started) down again.
+    with TestClient(app) as client:
+        yield client
+
+def _write_scene(name, content):
+    path = settings.GENERATED_DIR / name
+    path.write_bytes(content)
+    return path
+
+def test_precompressed_variant_is_served_with_immutable_etag(client):
+    content = b"ply\nformat binary_little_endian 1.0\nend_header\n" + bytes(range(256)) * 4096
+    path = _write_scene("media-test.ply", content)
+    assert "gzip" in precompress(path)
+    assert path.with_name("media-test.ply.gz").exists()
+
+    response = client.get("/media/generated/media-test.ply", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(content)
+    assert "immutable" in response.headers["cache-control"]
+    # The client decodes the body transparently.
+    assert response.content == content
+
+    etag = response.headers["etag"]
+    revalidated = client.get(
+        "/media/generated/media-test.ply",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": etag},
+    )
+    assert revalidated.status_code == 304
+
+    # Identity and gzip are separate representations with their own ETags.
+    identity = client.get("/media/generated/media-test.ply", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["etag"] != etag
+    assert identity.content == content
+
+def test_range_requests_are_served_uncompressed(client):
+    content = bytes(range(256)) * 4096
+    path = _write_scene("media-range.ply", content)
+    precompress(path)
+
+    response = client.get(
+        "/media/generated/media-range.ply",
+        headers={"Accept-Encoding": "gzip", "Range": "bytes=100-199"},
+    )
+    assert response.status_code == 206
+    assert "content-encoding" not in response.headers
+    assert response.content == content[100:200]
+
+def test_incompressible_files_get_no_variant(client):
+    path = _write_scene("media-random.ksplat", os.urandom(64 * 1024))
+    assert precompress(path) == []
+    assert not path.with_name("media-random.ksplat.gz").exists()
+    assert list(settings.GENERATED_DIR.glob("media-random.ksplat.*")) == []
+
+    response = client.get("/media/generated/media-random.ksplat", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+
+def test_failed_compression_leaves_no_temporary_file(monkeypatch):
+    path = _write_scene("media-fail.ply", b"ply\n" + b"0 0 0\n" * 10000)
+
+    def _fail(source, target):
+        target.write(b"partial")
+        raise OSError("No space left on device")
+
+    for encoding, (suffix, _) in list(media.ENCODINGS.items()):
+        monkeypatch.setitem(media.ENCODINGS, encoding, (suffix, _fail))
+    with pytest.raises(OSError):
+        precompress(path)
+    assert list(settings.GENERATED_DIR.glob("media-fail.ply.*")) == []
+
+def test_only_generated_scenes_and_uploads_are_served(client):
+    upload_path = settings.UPLOAD_DIR / "media-upload.jpg"
+    upload_path.write_bytes(b"jpeg")
+    response = client.get("/media/uploads/media-upload.jpg")
+    assert response.status_code == 200
+    assert "immutable" not in response.headers.get("cache-control", "")
+
+    # The database and anything else in DATA_DIR stay private.
+    assert any(settings.DB_DIR.iterdir())
+    for db_file in settings.DB_DIR.iterdir():
+        assert client.get(f"/media/db/{db_file.name}").status_code == 404
+    assert client.get("/media/generated/../db/" + settings.DB_NAME).status_code == 404
+
+def test_missing_media_is_404(client):
+    assert client.get("/media/generated/does-not-exist.ply").status_code == 404
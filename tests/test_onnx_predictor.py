@@ -0,0 +1,68 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnxscript")
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.services import sharp_service as sharp_service_module
+
+if not sharp_service_module.ML_AVAILABLE:
+    pytest.skip("Sharp dependencies are not installed", allow_module_level=True)
+
+from torch import nn
+
+from sharp.utils.export import export_predictor
+from sharp.utils.gaussians import Gaussians3D
+from src.services.onnx_predictor import OnnxPredictor
+
+class _FakePredictor(nn.Module):
+    """Has the interface of RGBGaussianPredictor at a tiny internal resolution."""
+
+    def __init__(self):
+        super().__init__()
+        self.conv = nn.Conv2d(3, 14, 2, stride=2)
+
+    def internal_resolution(self):
+        return 8
+
+    def forward(self, image, disparity_factor):
+        values = self.conv(image).flatten(2).transpose(1, 2) * disparity_factor[:, None, None]
+        return Gaussians3D(
+            mean_vectors=values[..., 0:3],
+            singular_values=values[..., 3:6].exp(),
+            quaternions=values[..., 6:10],
+            colors=values[..., 10:13].sigmoid(),
+            opacities=values[..., 13].sigmoid(),
+        )
+
+def test_exported_graph_matches_torch_for_any_batch_size(tmp_path):
+    predictor = _FakePredictor().eval()
+    path = tmp_path / "fake.onnx"
+    export_predictor(predictor, path, batch_size=2)
+
+    onnx_predictor = OnnxPredictor(path)
+    assert onnx_predictor.batch_size == 2
+
+    generator = torch.Generator().manual_seed(0)
+    # Three images run as one full batch of two and one padded batch.
+    images = torch.rand(3, 3, 8, 8, generator=generator)
+    disparity_factors = torch.rand(3, generator=generator) + 0.5
+    with torch.no_grad():
+        expected = predictor(images, disparity_factors)
+    actual = onnx_predictor(images.numpy(), disparity_factors.numpy())
+
+    assert len(actual) == len(Gaussians3D._fields)
+    for expected_tensor, actual_array in zip(expected, actual):
+        assert actual_array.shape == tuple(expected_tensor.shape)
+        np.testing.assert_allclose(actual_array, expected_tensor.numpy(), rtol=1e-5, atol=1e-5)
+
+def test_missing_onnx_model_names_the_export_command(tmp_path):
+    with pytest.raises(FileNotFoundError, match="sharp export"):
+        OnnxPredictor(tmp_path / "missing.onnx")
@@ -0,0 +1,159 @@
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.services import sharp_service as sharp_service_module
+
+if not sharp_service_module.ML_AVAILABLE:
+    pytest.skip("Sharp dependencies are not installed", allow_module_level=True)
+
+from numpy.lib.recfunctions import repack_fields
+from plyfile import PlyData, PlyElement
+
+from sharp.utils import ply as ply_utils
+from sharp.utils.gaussians import GaussianPly, Gaussians3D, load_ply, save_ply
+
+def _scene(num_gaussians=500, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    quaternions = torch.randn(1, num_gaussians, 4, generator=generator)
+    return Gaussians3D(
+        mean_vectors=torch.randn(1, num_gaussians, 3, generator=generator) + torch.tensor([0.0, 0.0, 5.0]),
+        singular_values=torch.rand(1, num_gaussians, 3, generator=generator) * 0.1 + 1e-3,
+        quaternions=quaternions / quaternions.norm(dim=-1, keepdim=True),
+        colors=torch.rand(1, num_gaussians, 3, generator=generator),
+        opacities=torch.rand(1, num_gaussians, generator=generator) * 0.98 + 0.01,
+    )
+
+def test_save_ply_matches_plyfile_output(tmp_path):
+    gaussians = _scene()
+    path = tmp_path / "scene.ply"
+    plydata = save_ply(gaussians, f_px=800.0, image_shape=(480, 640), path=path)
+
+    # Each vertex record holds the attributes of one Gaussian in the expected fields.
+    vertices = plydata["vertex"].data
+    np.testing.assert_array_equal(
+        np.stack([vertices["x"], vertices["y"], vertices["z"]], axis=1), gaussians.mean_vectors[0].numpy()
+    )
+    np.testing.assert_allclose(
+        np.stack([vertices[f"scale_{i}"] for i in range(3)], axis=1),
+        torch.log(gaussians.singular_values[0]).numpy(),
+    )
+    np.testing.assert_array_equal(
+        np.stack([vertices[f"rot_{i}"] for i in range(4)], axis=1), gaussians.quaternions[0].numpy()
+    )
+    np.testing.assert_allclose(
+        vertices["opacity"], torch.logit(gaussians.opacities[0]).numpy(), rtol=1e-5, atol=1e-5
+    )
+
+    baseline_path = tmp_path / "baseline.ply"
+    plydata.write(baseline_path)
+    assert path.read_bytes() == baseline_path.read_bytes()
+
+def test_write_binary_ply_matches_plyfile_for_every_type(tmp_path):
+    rng = np.random.default_rng(0)
+    types = ["i1", "u1", "i2", "u2", "i4", "u4", "f4", "f8"]
+    mixed = np.zeros(7, dtype=[(f"p_{t}", t) for t in types])
+    for t in types:
+        mixed[f"p_{t}"] = rng.integers(0, 100, size=7)
+    # Big-endian input has to be written little-endian, like plyfile does.
+    big_endian = np.arange(5, dtype=">f4").view([("value", ">f4")])
+    elements = {
+        "mixed": mixed,
+        "big_endian": big_endian,
+        "empty": np.empty(0, dtype=[("x", "f4")]),
+    }
+
+    path = tmp_path / "elements.ply"
+    ply_utils.write_binary_ply(path, elements)
+
+    baseline_path = tmp_path / "baseline.ply"
+    PlyData([PlyElement.describe(data, name) for name, data in elements.items()]).write(baseline_path)
+    assert path.read_bytes() == baseline_path.read_bytes()
+
+def _assert_same_scene(actual, expected):
+    torch.testing.assert_close(actual.mean_vectors, expected.mean_vectors, rtol=0, atol=0)
+    torch.testing.assert_close(actual.quaternions, expected.quaternions, rtol=0, atol=0)
+    torch.testing.assert_close(actual.singular_values, expected.singular_values, rtol=1e-6, atol=0)
+    torch.testing.assert_close(actual.opacities, expected.opacities, rtol=0, atol=1e-6)
+    # Colors go through sRGB and back.
+    torch.testing.assert_close(actual.colors, expected.colors, rtol=0, atol=1e-5)
+
+def test_load_ply_round_trips_save_ply(tmp_path):
+    gaussians = _scene()
+    path = tmp_path / "scene.ply"
+    save_ply(gaussians, f_px=800.0, image_shape=(480, 640), path=path)
+
+    loaded, metadata = load_ply(path)
+    _assert_same_scene(loaded, gaussians)
+    assert metadata.focal_length_px == 800.0
+    assert tuple(metadata.resolution_px) == (640, 480)
+    assert metadata.color_space == "linearRGB"
+
+    # Saving the loaded scene again gives the same file.
+    resaved_path = tmp_path / "resaved.ply"
+    save_ply(loaded, f_px=metadata.focal_length_px, image_shape=(480, 640), path=resaved_path)
+    resaved = PlyData.read(resaved_path)["vertex"].data
+    original = PlyData.read(path)["vertex"].data
+    for name in original.dtype.names:
+        np.testing.assert_allclose(resaved[name], original[name], rtol=0, atol=1e-5)
+
+def test_gaussian_ply_memory_maps_the_vertices(tmp_path):
+    path = tmp_path / "scene.ply"
+    save_ply(_scene(), f_px=800.0, image_shape=(480, 640), path=path)
+
+    scene = GaussianPly(path)
+    assert isinstance(scene.vertices, np.memmap)
+    assert len(scene) == 500
+    # Adjacent columns are views of the file, the others are copies with the same values.
+    xyz = scene.column("x", "y", "z")
+    assert np.shares_memory(xyz, scene.vertices)
+    vertices = PlyData.read(path)["vertex"].data
+    np.testing.assert_array_equal(xyz, np.stack([vertices["x"], vertices["y"], vertices["z"]], axis=1))
+    shuffled = scene.column("opacity", "x")
+    assert not np.shares_memory(shuffled, scene.vertices)
+    np.testing.assert_array_equal(shuffled, np.stack([vertices["opacity"], vertices["x"]], axis=1))
+
+@pytest.mark.parametrize("layout", ["ascii", "list_property"])
+def test_gaussian_ply_falls_back_to_plyfile(tmp_path, caplog, layout):
+    gaussians = _scene()
+    path = tmp_path / "scene.ply"
+    plydata = save_ply(gaussians, f_px=800.0, image_shape=(480, 640), path=path)
+
+    fallback_path = tmp_path / f"{layout}.ply"
+    if layout == "ascii":
+        PlyData(plydata.elements, text=True).write(fallback_path)
+    else:
+        # Elements with list properties have no fixed record size.
+        faces = np.empty(1, dtype=[("vertex_indices", "O")])
+        faces[0] = (np.array([0, 1, 2], dtype=np.int32),)
+        PlyData([*plydata.elements, PlyElement.describe(faces, "face")]).write(fallback_path)
+
+    with caplog.at_level(logging.DEBUG, logger=ply_utils.__name__):
+        scene = GaussianPly(fallback_path)
+    assert "reading it with plyfile" in caplog.text
+    _assert_same_scene(scene.to_gaussians(), load_ply(path)[0])
+    assert scene.metadata == load_ply(path)[1]
+
+def test_load_ply_defaults_metadata_and_checks_properties(tmp_path):
+    plydata = save_ply(_scene(), f_px=800.0, image_shape=(480, 640), path=tmp_path / "scene.ply")
+
+    vertices_only_path = tmp_path / "vertices.ply"
+    PlyData([plydata["vertex"]]).write(vertices_only_path)
+    _, metadata = load_ply(vertices_only_path)
+    assert metadata.focal_length_px == 512
+    assert tuple(metadata.resolution_px) == (640, 480)
+
+    vertices = plydata["vertex"].data
+    names = [name for name in vertices.dtype.names if name != "rot_3"]
+    incomplete_path = tmp_path / "incomplete.ply"
+    PlyData([PlyElement.describe(repack_fields(vertices[names]), "vertex")]).write(incomplete_path)
+    with pytest.raises(KeyError, match="rot_3"):
+        GaussianPly(incomplete_path)
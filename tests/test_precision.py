@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.services import sharp_service as sharp_service_module
+
+if not sharp_service_module.ML_AVAILABLE:
+    pytest.skip("Sharp dependencies are not installed", allow_module_level=True)
+
+from sharp.models import PredictorParams
+from sharp.models.composer import GaussianComposer
+from sharp.models.initializer import create_initializer
+from sharp.utils.precision import autocast, check_precision
+
+def _create_modules():
+    params = PredictorParams()
+    initializer = create_initializer(params.initializer)
+    composer = GaussianComposer(
+        delta_factor=params.delta_factor,
+        min_scale=params.min_scale,
+        max_scale=params.max_scale,
+        color_activation_type=params.color_activation_type,
+        opacity_activation_type=params.opacity_activation_type,
+        color_space=params.color_space,
+        base_scale_on_predicted_mean=params.base_scale_on_predicted_mean,
+    )
+    return initializer, composer
+
+def _compose(initializer, composer, image, depth, delta):
+    init_output = initializer(image, depth)
+    return composer(delta, init_output.gaussian_base_values, init_output.global_scale)
+
+def _inputs():
+    generator = torch.Generator().manual_seed(0)
+    image = torch.rand(1, 3, 64, 64, generator=generator)
+    depth = 1.0 + 20.0 * torch.rand(1, 2, 64, 64, generator=generator)
+    delta = torch.randn(1, 14, 2, 32, 32, generator=generator)
+    return image, depth, delta
+
+def test_sensitive_stages_run_in_fp32_under_autocast():
+    initializer, composer = _create_modules()
+    image, depth, delta = _inputs()
+    # What the decoders hand over under bf16 autocast.
+    depth_bf16, delta_bf16 = depth.bfloat16(), delta.bfloat16()
+
+    with torch.no_grad():
+        reference = _compose(initializer, composer, image, depth_bf16.float(), delta_bf16.float())
+        with autocast("cpu", "bf16"):
+            mixed = _compose(initializer, composer, image, depth_bf16, delta_bf16)
+
+    # Depth rescaling and the activations add no error on top of the rounded inputs.
+    for expected, actual in zip(reference, mixed):
+        assert actual.dtype == torch.float32
+        assert torch.equal(expected, actual)
+
+def test_bf16_matches_fp32_output():
+    initializer, composer = _create_modules()
+    image, depth, delta = _inputs()
+    head = torch.nn.Conv2d(32, 28, 1)
+    features = torch.randn(1, 32, 32, 32, generator=torch.Generator().manual_seed(1))
+
+    def _predict():
+        # A stand-in for the prediction head feeding the composer.
+        head_delta = delta + 0.1 * head(features).view(1, 14, 2, 32, 32)
+        return _compose(initializer, composer, image, depth, head_delta)
+
+    with torch.no_grad():
+        reference = _predict()
+        with autocast("cpu", "bf16"):
+            mixed = _predict()
+
+    for expected, actual in zip(reference, mixed):
+        assert actual.dtype == torch.float32
+        torch.testing.assert_close(actual, expected, rtol=2e-2, atol=2e-2)
+
+def test_unsupported_precision_is_rejected():
+    assert check_precision("bf16", "cpu") == "bf16"
+    with pytest.raises(ValueError):
+        check_precision("fp16", "cpu")
+    with pytest.raises(ValueError):
+        check_precision("int4", "cpu")
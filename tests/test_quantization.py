@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.services import sharp_service as sharp_service_module
+
+if not sharp_service_module.ML_AVAILABLE or sharp_service_module.create_predictor is None:
+    pytest.skip("Sharp model dependencies are not installed", allow_module_level=True)
+
+from torch import nn
+
+from sharp.models.encoders.spn_encoder import SlidingPyramidNetwork
+from sharp.models.encoders.vit_encoder import TimmViT
+from sharp.models.presets.vit import ViTConfig
+from sharp.utils.gaussians import Gaussians3D
+from sharp.utils.quantization import compare_depth, compare_gaussians, quantize_encoders
+
+def _create_vit(intermediate_features_ids):
+    # A small ViT with the 24x24 token grid of DINOv2-L at 384px.
+    config = ViTConfig(
+        in_chans=3,
+        embed_dim=64,
+        depth=4,
+        num_heads=4,
+        init_values=1.0,
+        img_size=96,
+        patch_size=4,
+        num_classes=0,
+        global_pool="",
+    )
+    config.intermediate_features_ids = intermediate_features_ids
+    return TimmViT(config)
+
+def test_quantized_encoders_stay_close_to_fp32():
+    torch.manual_seed(0)
+    encoder = SlidingPyramidNetwork(
+        dims_encoder=[16, 32, 32, 32, 32],
+        patch_encoder=_create_vit([0, 1, 2, 3]),
+        image_encoder=_create_vit(None),
+    ).eval()
+    image = torch.rand(1, 3, 384, 384)
+    with torch.no_grad():
+        reference = encoder(image)
+
+    assert quantize_encoders(nn.Sequential(encoder)) == 2
+    assert not any(type(module) is nn.Linear for module in encoder.patch_encoder.modules())
+    assert not any(type(module) is nn.Linear for module in encoder.image_encoder.modules())
+    # Only the ViTs are quantized.
+    assert type(encoder.fuse_lowres) is nn.Conv2d
+
+    with torch.no_grad():
+        quantized = encoder(image)
+    for expected, actual in zip(reference, quantized):
+        assert actual.shape == expected.shape
+        relative_error = (actual - expected).norm() / expected.norm()
+        assert 0 < relative_error < 0.05
+
+def test_accuracy_metrics():
+    disparity = torch.full((1, 2, 4, 4), 2.0)
+    depth = compare_depth(disparity, disparity * 1.1)
+    assert depth["abs_rel"] == pytest.approx(0.1)
+    assert depth["delta_1"] == 1.0
+    assert compare_depth(disparity, disparity * 2)["delta_1"] == 0.0
+
+    num_gaussians = 8
+    reference = Gaussians3D(
+        mean_vectors=torch.tensor([[[0.0, 0.0, 2.0]]]).repeat(1, num_gaussians, 1),
+        singular_values=torch.full((1, num_gaussians, 3), 0.1),
+        quaternions=torch.tensor([[[1.0, 0.0, 0.0, 0.0]]]).repeat(1, num_gaussians, 1),
+        colors=torch.full((1, num_gaussians, 3), 0.5),
+        opacities=torch.full((1, num_gaussians), 0.5),
+    )
+    shifted = reference._replace(
+        mean_vectors=reference.mean_vectors + torch.tensor([0.0, 0.0, 0.2]),
+        colors=reference.colors + 0.1,
+    )
+    metrics = compare_gaussians(reference, shifted)
+    assert metrics["position_rel"] == pytest.approx(0.1)
+    assert metrics["color_abs"] == pytest.approx(0.1)
+    assert metrics["scale_rel"] == 0.0
+    assert metrics["opacity_abs"] == 0.0
@@ -0,0 +1,80 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.services import sharp_service as sharp_service_module
+
+if not sharp_service_module.ML_AVAILABLE:
+    pytest.skip("Sharp dependencies are not installed", allow_module_level=True)
+
+from PIL import Image
+from torch import nn
+
+from sharp.utils.gaussians import Gaussians3D
+from src.services.sharp_service import SharpService
+
+class _FakePredictor(nn.Module):
+    """Predicts two layers of Gaussians per pixel of its input, in NDC space."""
+
+    def __init__(self):
+        super().__init__()
+        self.monodepth_model = nn.Identity()
+
+    def forward(self, image, disparity_factor):
+        image = self.monodepth_model(image)
+        batch_size, _, height, width = image.shape
+        num_gaussians = 2 * height * width
+        ys, xs = torch.meshgrid(
+            torch.linspace(-1, 1, height), torch.linspace(-1, 1, width), indexing="ij"
+        )
+        depth = torch.cat([torch.full((height * width,), 2.0), torch.full((height * width,), 3.0)])
+        xy = torch.stack([xs.flatten(), ys.flatten()], dim=-1).repeat(2, 1)
+        mean_vectors = torch.cat([xy * depth[:, None], depth[:, None]], dim=-1)
+        return Gaussians3D(
+            mean_vectors=mean_vectors.expand(batch_size, -1, -1),
+            singular_values=torch.full((batch_size, num_gaussians, 3), 0.01),
+            quaternions=torch.tensor([1.0, 0.0, 0.0, 0.0]).expand(batch_size, num_gaussians, 4),
+            colors=image.flatten(2).transpose(1, 2).repeat(1, 2, 1),
+            opacities=torch.full((batch_size, num_gaussians), 0.5),
+        )
+
+@pytest.fixture
+def service():
+    service = SharpService()
+    service.device = "cpu"
+    service.precision = "fp32"
+    service.backend = "torch"
+    service.internal_shape = (8, 8)
+    service.model = _FakePredictor().eval()
+    return service
+
+def test_process_image_without_progress_callback(service, tmp_path, monkeypatch):
+    monkeypatch.setattr(sharp_service_module.settings, "LOD_FRACTIONS", [0.5])
+    input_path = tmp_path / "input.png"
+    Image.new("RGB", (16, 12), (200, 100, 50)).save(input_path)
+    output_path = tmp_path / "out" / "scene.ply"
+
+    # Stages with details pass a fourth argument to the callback.
+    service.process_image(input_path, output_path)
+
+    assert output_path.exists()
+    assert (tmp_path / "out" / "scene_lod1.ply").exists()
+
+def test_progress_receives_stage_details(service, tmp_path, monkeypatch):
+    monkeypatch.setattr(sharp_service_module.settings, "LOD_FRACTIONS", [0.5])
+    input_path = tmp_path / "input.png"
+    Image.new("RGB", (16, 12), (200, 100, 50)).save(input_path)
+
+    calls = []
+    service.process_image(input_path, tmp_path / "scene.ply", lambda *args: calls.append(args))
+
+    details = {args[0]: args[3] for args in calls if len(args) == 4}
+    assert details["prune"]["input"] == 2 * 8 * 8
+    assert details["lod"]["levels"][0] == details["prune"]["output"]
+    assert [args[0] for args in calls][:2] == ["load", "preprocess"]
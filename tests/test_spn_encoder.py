@@ -0,0 +1,66 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+torch = pytest.importorskip("torch")
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.services import sharp_service as sharp_service_module
+
+if not sharp_service_module.ML_AVAILABLE or sharp_service_module.create_predictor is None:
+    pytest.skip("Sharp model dependencies are not installed", allow_module_level=True)
+
+from sharp.models.encoders.spn_encoder import merge, split
+
+def _split_reference(image, overlap_ratio, patch_size):
+    stride = int(patch_size * (1 - overlap_ratio))
+    steps = (image.shape[-1] - patch_size) // stride + 1
+    return torch.cat(
+        [
+            image[..., j * stride : j * stride + patch_size, i * stride : i * stride + patch_size]
+            for j in range(steps)
+            for i in range(steps)
+        ]
+    )
+
+def _merge_reference(patches, batch_size, padding):
+    steps = int((patches.shape[0] // batch_size) ** 0.5)
+    size = patches.shape[-1]
+    rows = []
+    for j in range(steps):
+        row = []
+        for i in range(steps):
+            patch = patches[(j * steps + i) * batch_size : (j * steps + i + 1) * batch_size]
+            top = padding if j != 0 else 0
+            bottom = size - padding if j != steps - 1 else size
+            left = padding if i != 0 else 0
+            right = size - padding if i != steps - 1 else size
+            row.append(patch[..., top:bottom, left:right])
+        rows.append(torch.cat(row, dim=-1))
+    return torch.cat(rows, dim=-2)
+
+@pytest.mark.parametrize("batch_size", [1, 2])
+@pytest.mark.parametrize("image_size,overlap_ratio", [(384, 0.25), (192, 0.5), (384, 0.0)])
+def test_split_is_bit_identical_to_slicing(batch_size, image_size, overlap_ratio):
+    image = torch.randn(batch_size, 3, image_size, image_size)
+    expected = _split_reference(image, overlap_ratio, 96)
+    actual = split(image, overlap_ratio=overlap_ratio, patch_size=96)
+    assert torch.equal(actual, expected)
+
+@pytest.mark.parametrize("batch_size", [1, 2])
+@pytest.mark.parametrize("steps,padding", [(5, 3), (3, 6), (4, 0), (1, 0)])
+def test_merge_is_bit_identical_to_concatenation(batch_size, steps, padding):
+    patches = torch.randn(steps * steps * batch_size, 8, 24, 24)
+    expected = _merge_reference(patches, batch_size, padding)
+    actual = merge(patches, batch_size=batch_size, padding=padding)
+    assert torch.equal(actual, expected)
+    assert actual.is_contiguous()
+
+def test_merge_ignores_trailing_patches():
+    # SlidingPyramidNetwork merges latents from all 35 pyramid patches per image.
+    patches = torch.randn(35 * 2, 8, 24, 24)
+    expected = _merge_reference(patches[: 25 * 2], 2, 3)
+    assert torch.equal(merge(patches, batch_size=2, padding=3), expected)
@@ -1,6 +1,10 @@
+import asyncio
+import io
 import os
 import sys
 from pathlib import Path
+
+import pytest
 from fastapi.testclient import TestClient
 
 # Add project root to sys.path
@@ -19,9 +23,14 @@ except ImportError as e:
     # The code in sharp_service adds it to path, so it should be fine if we can import sharp_service.
     sys.exit(1)
 
-client = TestClient(app)
+@pytest.fixture(scope="module", autouse=True)
+def client():
+    # Entering the client runs the lifespan hook, which creates the tables; leaving it
+    # shuts the app (and anything its lifespan started) down again.
+    with TestClient(app) as client:
+        yield client
 
-def test_upload_ply():
+def test_upload_ply(client):
     # Create a dummy ply file content
     ply_content = b"ply\nformat ascii 1.0\nend_header\n"
     
@@ -40,6 +49,160 @@ def test_upload_ply():
     assert response.status_code == 200
     assert response.json()["status"] == "completed"
 
+def test_duplicate_image_reuses_in_flight_job(client):
+    from src.database import SessionLocal, Job
+
+    content = b"\xff\xd8\xff\xe0duplicate-" + os.urandom(16)
+    first = client.post("/api/upload/", files={"file": ("a.jpg", content, "image/jpeg")})
+    second = client.post("/api/upload/", files={"file": ("b.jpg", content, "image/jpeg")})
+    assert first.status_code == second.status_code == 200
+    assert second.json() == {"id": first.json()["id"], "status": "processing", "duplicate": True}
+
+    db = SessionLocal()
+    try:
+        assert db.query(Job).filter(Job.wallpaper_id == first.json()["id"]).count() == 1
+    finally:
+        db.close()
+
+def test_duplicate_ply_reuses_existing_file(client):
+    content = b"ply\nformat ascii 1.0\ncomment " + os.urandom(8).hex().encode() + b"\nend_header\n"
+    first = client.post("/api/upload/", files={"file": ("a.ply", content, "application/octet-stream")})
+    second = client.post("/api/upload/", files={"file": ("b.ply", content, "application/octet-stream")})
+    assert second.json() == {"id": first.json()["id"], "status": "completed", "duplicate": True}
+
+def _write_ksplat(path, section_sizes):
+    """Minimal .ksplat layout: file header, section headers, then section data."""
+    import struct
+
+    header = bytearray(4096)
+    struct.pack_into("<BBxxII", header, 0, 0, 1, len(section_sizes), len(section_sizes))
+    section_headers = bytearray(1024 * len(section_sizes))
+    for i, size in enumerate(section_sizes):
+        struct.pack_into("<I", section_headers, i * 1024 + 28, size)
+    path.write_bytes(bytes(header) + bytes(section_headers) + os.urandom(sum(section_sizes)))
+
+def test_scene_supports_range_requests_by_chunk(client):
+    from src.core.config import settings
+    from src.database import SessionLocal, Wallpaper
+
+    wp_id = "scene-test"
+    splat_path = settings.GENERATED_DIR / f"{wp_id}.ksplat"
+    _write_ksplat(splat_path, [100, 200])
+    db = SessionLocal()
+    try:
+        db.merge(Wallpaper(
+            id=wp_id, filename="scene.jpg", upload_path=f"data/uploads/{wp_id}.jpg",
+            ply_path=str(splat_path.with_suffix(".ply")), splat_path=str(splat_path),
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.get(f"/api/upload/{wp_id}/scene")
+    assert response.status_code == 200
+    assert response.headers["x-scene-format"] == "ksplat"
+    assert response.headers["x-splat-chunks"] == "0-6243,6244-6443"
+    assert response.content == splat_path.read_bytes()
+
+    first, last = response.headers["x-splat-chunks"].split(",")[1].split("-")
+    chunk = client.get(f"/api/upload/{wp_id}/scene", headers={"Range": f"bytes={first}-{last}"})
+    assert chunk.status_code == 206
+    assert chunk.content == splat_path.read_bytes()[int(first):]
+
+def test_scene_is_404_until_generated(client):
+    response = client.post(
+        "/api/upload/",
+        files={"file": ("c.jpg", b"\xff\xd8\xff\xe0pending-" + os.urandom(16), "image/jpeg")},
+    )
+    assert client.get(f"/api/upload/{response.json()['id']}/scene").status_code == 404
+    assert client.get("/api/upload/does-not-exist/scene").status_code == 404
+
+def test_gallery_pages_with_cursor_fields_and_status(client):
+    for i in range(3):
+        client.post("/api/upload/", files={"file": (f"p{i}.jpg", b"\xff\xd8\xff\xe0page-" + os.urandom(16), "image/jpeg")})
+
+    everything = client.get("/api/upload/", params={"limit": 200, "fields": "id"}).json()
+    paged, cursor = [], None
+    while True:
+        params = {"limit": 2, "fields": "id,ply_path"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/upload/", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert all(set(item) == {"id", "ply_path"} for item in page)
+        paged += [item["id"] for item in page]
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    assert paged == [item["id"] for item in everything]
+
+    pending = client.get("/api/upload/", params={"status": "pending", "limit": 200}).json()
+    completed = client.get("/api/upload/", params={"status": "completed", "limit": 200}).json()
+    assert pending and all(item["ply_path"] is None for item in pending)
+    assert all(item["ply_path"] is not None for item in completed)
+    assert len(pending) + len(completed) == len(everything)
+
+def test_gallery_rejects_unknown_fields_and_bad_cursors(client):
+    assert client.get("/api/upload/", params={"fields": "id,secret"}).status_code == 400
+    assert client.get("/api/upload/", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/api/upload/", params={"status": "failed"}).status_code == 422
+
+def test_upload_rejects_content_that_does_not_match_its_type(client):
+    from src.core.config import settings
+
+    before = set(settings.UPLOAD_DIR.iterdir())
+    fake_image = client.post("/api/upload/", files={"file": ("x.jpg", b"MZ\x90\x00not-an-image", "image/jpeg")})
+    assert fake_image.status_code == 400
+    fake_ply = client.post("/api/upload/", files={"file": ("x.ply", b"\xff\xd8\xff\xe0", "application/octet-stream")})
+    assert fake_ply.status_code == 400
+    assert set(settings.UPLOAD_DIR.iterdir()) == before
+
+    heic = b"\x00\x00\x00\x18ftypheic\x00\x00\x00\x00" + os.urandom(16)
+    assert client.post("/api/upload/", files={"file": ("x.heic", heic, "image/heic")}).status_code == 200
+
+def test_upload_size_limit(client, monkeypatch):
+    from fastapi import HTTPException, UploadFile
+    from src.core.config import settings
+    from src.routers import upload
+
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 1000)
+    before = set(settings.UPLOAD_DIR.iterdir())
+    content = b"\xff\xd8\xff\xe0" + os.urandom(2000)
+
+    # Turned away by Content-Length before the body is read.
+    response = client.post("/api/upload/", files={"file": ("big.jpg", content * 40, "image/jpeg")})
+    assert response.status_code == 413
+
+    # Rejected before anything is written when the parsed size is over the limit.
+    response = client.post("/api/upload/", files={"file": ("big.jpg", content, "image/jpeg")})
+    assert response.status_code == 413
+    assert set(settings.UPLOAD_DIR.iterdir()) == before
+
+    # Counted while the body is received when a chunked upload has no Content-Length.
+    boundary = "limit-boundary"
+    head = (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"big.jpg\"\r\n"
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode()
+    chunks = [head, *([content] * 40), f"\r\n--{boundary}--\r\n".encode()]
+    response = client.post(
+        "/api/upload/",
+        content=iter(chunks),
+        headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
+    )
+    assert response.status_code == 413
+    assert set(settings.UPLOAD_DIR.iterdir()) == before
+
+    # Enforced while streaming when the size is not known up front.
+    monkeypatch.setattr(upload, "UPLOAD_CHUNK_SIZE", 256)
+    source = UploadFile(io.BytesIO(content[256:]))
+    target = settings.UPLOAD_DIR / "streamed-too-large.jpg"
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(upload._save_and_hash(source, content[:256], target))
+    assert error.value.status_code == 413
+    assert not target.exists()
+
 if __name__ == "__main__":
     try:
         test_upload_ply()
@@ -0,0 +1,106 @@
+import sys
+from pathlib import Path
+import pytest
+from fastapi.testclient import TestClient
+
+# Add project root to sys.path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from src.main import app
+from src.database import SessionLocal, Wallpaper
+from src.services.view_cache import ViewConfigCache, view_config_cache
+
+@pytest.fixture(scope="module", autouse=True)
+def client():
+    # Entering the client runs the lifespan hook, which creates the tables; leaving it
+    # shuts the app (and anything its lifespan started) down again.
+    with TestClient(app) as client:
+        yield client
+
+def _add_wallpaper(wp_id):
+    db = SessionLocal()
+    try:
+        db.add(Wallpaper(id=wp_id, filename="v.jpg", upload_path=f"data/uploads/{wp_id}.jpg"))
+        db.commit()
+    finally:
+        db.close()
+
+def test_view_config_is_cached_until_saved(client):
+    _add_wallpaper("view-cache-test")
+    before = view_config_cache.stats()
+
+    assert client.get("/api/view/view-cache-test", params={"user": "carol"}).json()["fov"] == 60.0
+    assert client.get("/api/view/view-cache-test", params={"user": "carol"}).json()["fov"] == 60.0
+    stats = view_config_cache.stats()
+    assert stats["misses"] == before["misses"] + 1
+    assert stats["hits"] == before["hits"] + 1
+
+    # Saving the default config changes what carol falls back to.
+    payload = {"wallpaper_id": "view-cache-test", "user": "default", "fov": 75.0}
+    assert client.post("/api/view/", json=payload).status_code == 200
+    fallback = client.get("/api/view/view-cache-test", params={"user": "carol"}).json()
+    assert fallback["fov"] == 75.0 and fallback["user"] == "default"
+
+    payload = {"wallpaper_id": "view-cache-test", "user": "carol", "fov": 30.0}
+    client.post("/api/view/", json=payload)
+    assert client.get("/api/view/view-cache-test", params={"user": "carol"}).json()["fov"] == 30.0
+
+    assert client.get("/health/").json()["caches"]["view_configs"]["hits"] >= 1
+
+def test_cache_evicts_least_recently_used_and_expires():
+    cache = ViewConfigCache(maxsize=2, ttl=60)
+    cache.put("a", "default", {"fov": 1})
+    cache.put("b", "default", {"fov": 2})
+    assert cache.get("a", "default") == {"fov": 1}
+    cache.put("c", "default", {"fov": 3})
+    assert cache.get("b", "default") is None
+    assert cache.stats()["evictions"] == 1
+
+    expired = ViewConfigCache(maxsize=2, ttl=0)
+    expired.put("a", "default", {"fov": 1})
+    assert expired.get("a", "default") is None
+
+def test_cache_drops_configs_read_before_an_invalidation():
+    cache = ViewConfigCache(maxsize=4, ttl=60)
+    generation = cache.generation()
+    # A save invalidates while the config is being read.
+    cache.invalidate("a")
+    cache.put("a", "default", {"fov": 1}, generation)
+    assert cache.get("a", "default") is None
+
+    cache.put("a", "default", {"fov": 2}, cache.generation())
+    assert cache.get("a", "default") == {"fov": 2}
+    # Other wallpapers are not affected.
+    cache.put("b", "default", {"fov": 3}, generation)
+    assert cache.get("b", "default") == {"fov": 3}
+
+def test_cache_keeps_a_bounded_number_of_invalidations():
+    cache = ViewConfigCache(maxsize=2, ttl=60)
+    generation = cache.generation()
+    for i in range(100):
+        cache.invalidate(f"wp-{i}")
+    assert len(cache._invalidated) == 2
+    # Invalidations that were forgotten still drop configs read before them...
+    cache.put("wp-0", "default", {"fov": 1}, generation)
+    assert cache.get("wp-0", "default") is None
+    # ...but not configs read afterwards.
+    cache.put("wp-0", "default", {"fov": 2}, cache.generation())
+    assert cache.get("wp-0", "default") == {"fov": 2}
+
+def test_view_config_read_during_a_save_is_not_cached(client, monkeypatch):
+    _add_wallpaper("view-race-test")
+    view_config_cache.clear()
+    take_generation = view_config_cache.generation
+
+    def _generation_then_save():
+        generation = take_generation()
+        view_config_cache.invalidate("view-race-test")
+        return generation
+
+    monkeypatch.setattr(view_config_cache, "generation", _generation_then_save)
+    assert client.get("/api/view/view-race-test").json()["fov"] == 60.0
+    assert view_config_cache.get("view-race-test", "default") is None
+
+    monkeypatch.undo()
+    client.get("/api/view/view-race-test")
+    assert view_config_cache.get("view-race-test", "default") is not None